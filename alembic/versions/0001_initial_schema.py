@@ -0,0 +1,84 @@
+"""Initial schema: users, profiles, follower_history, alerts
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-07-20 10:00:00.000000
+
+Matches the tables `Base.metadata.create_all` used to create, so existing
+databases can be adopted with `alembic stamp 0001`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'profiles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('platform', sa.String(), nullable=True),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('current_follower_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_profiles_id', 'profiles', ['id'])
+
+    op.create_table(
+        'follower_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('profile_id', sa.Integer(), nullable=True),
+        sa.Column('follower_count', sa.Integer(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['profile_id'], ['profiles.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_follower_history_id', 'follower_history', ['id'])
+
+    op.create_table(
+        'alerts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('profile_id', sa.Integer(), nullable=True),
+        sa.Column('threshold', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('triggered', sa.Boolean(), nullable=True),
+        sa.Column('triggered_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['profile_id'], ['profiles.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_alerts_id', 'alerts', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_id', table_name='alerts')
+    op.drop_table('alerts')
+    op.drop_index('ix_follower_history_id', table_name='follower_history')
+    op.drop_table('follower_history')
+    op.drop_index('ix_profiles_id', table_name='profiles')
+    op.drop_table('profiles')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
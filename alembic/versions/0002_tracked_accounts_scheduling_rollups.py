@@ -0,0 +1,107 @@
+"""Tracked accounts, alert threshold bands, adaptive scheduling and history rollups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-07-20 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tracked_accounts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('follower_count', sa.Integer(), nullable=True),
+        sa.Column('last_checked_at', sa.DateTime(), nullable=True),
+        sa.Column('follower_change_rate', sa.Float(), nullable=True),
+        sa.Column('next_check_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('platform', 'username', name='uq_tracked_accounts_platform_username'),
+    )
+    op.create_index('ix_tracked_accounts_id', 'tracked_accounts', ['id'])
+    op.create_index('ix_tracked_accounts_next_check_at', 'tracked_accounts', ['next_check_at'])
+
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.add_column(sa.Column('tracked_account_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('next_alert_threshold', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('prev_alert_threshold', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_profiles_tracked_account_id', 'tracked_accounts', ['tracked_account_id'], ['id']
+        )
+        batch_op.create_index('ix_profiles_tracked_account_id', ['tracked_account_id'])
+
+    for table in ('follower_history_hourly', 'follower_history_daily'):
+        op.create_table(
+            table,
+            sa.Column('profile_id', sa.Integer(), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(), nullable=False),
+            sa.Column('min_count', sa.Integer(), nullable=False),
+            sa.Column('max_count', sa.Integer(), nullable=False),
+            sa.Column('first_count', sa.Integer(), nullable=False),
+            sa.Column('last_count', sa.Integer(), nullable=False),
+            sa.Column('first_at', sa.DateTime(), nullable=False),
+            sa.Column('last_at', sa.DateTime(), nullable=False),
+            sa.Column('sample_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['profile_id'], ['profiles.id']),
+            sa.PrimaryKeyConstraint('profile_id', 'bucket_start'),
+        )
+
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+    # Link existing profiles to shared accounts and compute their threshold bands
+    op.execute(
+        "INSERT INTO tracked_accounts (platform, username, created_at) "
+        "SELECT DISTINCT platform, username, CURRENT_TIMESTAMP FROM profiles "
+        "WHERE platform IS NOT NULL AND username IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE profiles SET tracked_account_id = ("
+        "SELECT t.id FROM tracked_accounts t "
+        "WHERE t.platform = profiles.platform AND t.username = profiles.username)"
+    )
+    op.execute(
+        "UPDATE profiles SET "
+        "next_alert_threshold = ("
+        "SELECT min(a.threshold) FROM alerts a WHERE a.profile_id = profiles.id "
+        "AND a.is_active AND NOT a.triggered "
+        "AND a.threshold > COALESCE(profiles.current_follower_count, 0)), "
+        "prev_alert_threshold = ("
+        "SELECT max(a.threshold) FROM alerts a WHERE a.profile_id = profiles.id "
+        "AND a.is_active AND NOT a.triggered "
+        "AND a.threshold <= COALESCE(profiles.current_follower_count, 0))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_table('follower_history_daily')
+    op.drop_table('follower_history_hourly')
+
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.drop_index('ix_profiles_tracked_account_id')
+        batch_op.drop_constraint('fk_profiles_tracked_account_id', type_='foreignkey')
+        batch_op.drop_column('prev_alert_threshold')
+        batch_op.drop_column('next_alert_threshold')
+        batch_op.drop_column('tracked_account_id')
+
+    op.drop_index('ix_tracked_accounts_next_check_at', table_name='tracked_accounts')
+    op.drop_index('ix_tracked_accounts_id', table_name='tracked_accounts')
+    op.drop_table('tracked_accounts')
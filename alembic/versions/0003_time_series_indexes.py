@@ -0,0 +1,40 @@
+"""Composite indexes for the hot follower_history, profile and alert queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-07-20 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+PENDING = sa.text("is_active AND NOT triggered")
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_follower_history_profile_id_recorded_at', 'follower_history', ['profile_id', 'recorded_at']
+    )
+    op.create_index(
+        'ix_profiles_user_id_platform_username', 'profiles', ['user_id', 'platform', 'username']
+    )
+    op.create_index('ix_alerts_user_id', 'alerts', ['user_id'])
+    op.create_index(
+        'ix_alerts_pending_profile_id_threshold', 'alerts', ['profile_id', 'threshold'],
+        postgresql_where=PENDING,
+        sqlite_where=PENDING
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_pending_profile_id_threshold', table_name='alerts')
+    op.drop_index('ix_alerts_user_id', table_name='alerts')
+    op.drop_index('ix_profiles_user_id_platform_username', table_name='profiles')
+    op.drop_index('ix_follower_history_profile_id_recorded_at', table_name='follower_history')
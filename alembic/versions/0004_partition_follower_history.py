@@ -0,0 +1,99 @@
+"""Optionally range-partition follower_history by month
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-07-20 10:15:00.000000
+
+Only runs on Postgres with HISTORY_PARTITIONING=true; otherwise a no-op.
+Rows are copied into monthly partitions covering the existing data plus
+HISTORY_PARTITION_PREMAKE_MONTHS ahead. The maintain_history_partitions task
+keeps creating upcoming partitions and drops expired ones.
+"""
+from datetime import date
+from alembic import op
+from app.core.config import settings
+from app.db.partitions import ensure_partitions, is_partitioned, add_months, month_start
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not settings.HISTORY_PARTITIONING or is_partitioned(bind):
+        return
+
+    op.execute("ALTER TABLE follower_history RENAME TO follower_history_unpartitioned")
+    op.execute(
+        "ALTER TABLE follower_history_unpartitioned "
+        "RENAME CONSTRAINT follower_history_pkey TO follower_history_unpartitioned_pkey"
+    )
+    op.execute("DROP INDEX ix_follower_history_id")
+    op.execute("DROP INDEX ix_follower_history_profile_id_recorded_at")
+
+    # The partition key has to be part of the primary key
+    op.execute(
+        "CREATE TABLE follower_history ("
+        "id INTEGER NOT NULL DEFAULT nextval('follower_history_id_seq'), "
+        "profile_id INTEGER REFERENCES profiles (id), "
+        "follower_count INTEGER, "
+        "recorded_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "PRIMARY KEY (id, recorded_at)"
+        ") PARTITION BY RANGE (recorded_at)"
+    )
+    op.execute("CREATE INDEX ix_follower_history_id ON follower_history (id)")
+    op.execute(
+        "CREATE INDEX ix_follower_history_profile_id_recorded_at "
+        "ON follower_history (profile_id, recorded_at)"
+    )
+
+    oldest = bind.exec_driver_sql("SELECT min(recorded_at) FROM follower_history_unpartitioned").scalar()
+    current = month_start(date.today())
+    first = month_start(oldest.date()) if oldest else current
+    ensure_partitions(bind, first, add_months(current, settings.HISTORY_PARTITION_PREMAKE_MONTHS))
+
+    op.execute(
+        "INSERT INTO follower_history (id, profile_id, follower_count, recorded_at) "
+        "SELECT id, profile_id, follower_count, COALESCE(recorded_at, now() AT TIME ZONE 'utc') "
+        "FROM follower_history_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE follower_history_id_seq OWNED BY follower_history.id")
+    op.execute("DROP TABLE follower_history_unpartitioned")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not is_partitioned(bind):
+        return
+
+    op.execute("ALTER TABLE follower_history RENAME TO follower_history_partitioned")
+    op.execute("DROP INDEX ix_follower_history_id")
+    op.execute("DROP INDEX ix_follower_history_profile_id_recorded_at")
+    op.execute(
+        "ALTER TABLE follower_history_partitioned "
+        "RENAME CONSTRAINT follower_history_pkey TO follower_history_partitioned_pkey"
+    )
+
+    op.execute(
+        "CREATE TABLE follower_history ("
+        "id INTEGER NOT NULL DEFAULT nextval('follower_history_id_seq') PRIMARY KEY, "
+        "profile_id INTEGER REFERENCES profiles (id), "
+        "follower_count INTEGER, "
+        "recorded_at TIMESTAMP WITHOUT TIME ZONE"
+        ")"
+    )
+    op.execute(
+        "INSERT INTO follower_history (id, profile_id, follower_count, recorded_at) "
+        "SELECT id, profile_id, follower_count, recorded_at FROM follower_history_partitioned"
+    )
+    op.execute("ALTER SEQUENCE follower_history_id_seq OWNED BY follower_history.id")
+    op.execute("DROP TABLE follower_history_partitioned")
+    op.execute("CREATE INDEX ix_follower_history_id ON follower_history (id)")
+    op.execute(
+        "CREATE INDEX ix_follower_history_profile_id_recorded_at "
+        "ON follower_history (profile_id, recorded_at)"
+    )
@@ -0,0 +1,52 @@
+"""Notification outbox and per-user Telegram chat ids
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-07-20 10:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+PENDING = sa.text("status = 'pending'")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('telegram_chat_id', sa.String(), nullable=True))
+
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('alert_id', sa.Integer(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['alert_id'], ['alerts.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_notification_outbox_pending_next_attempt_at', 'notification_outbox', ['next_attempt_at'],
+        postgresql_where=PENDING,
+        sqlite_where=PENDING
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_pending_next_attempt_at', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('telegram_chat_id')
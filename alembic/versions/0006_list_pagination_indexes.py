@@ -0,0 +1,35 @@
+"""Indexes for keyset-paginated profile and alert listing
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-07-20 10:25:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_profiles_user_id_id', 'profiles', ['user_id', 'id'])
+    op.create_index('ix_profiles_user_id_platform_id', 'profiles', ['user_id', 'platform', 'id'])
+    # (user_id, id) serves everything the plain user_id index did
+    op.drop_index('ix_alerts_user_id', table_name='alerts')
+    op.create_index('ix_alerts_user_id_id', 'alerts', ['user_id', 'id'])
+    op.create_index(
+        'ix_alerts_user_id_is_active_triggered_id', 'alerts', ['user_id', 'is_active', 'triggered', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_user_id_is_active_triggered_id', table_name='alerts')
+    op.drop_index('ix_alerts_user_id_id', table_name='alerts')
+    op.create_index('ix_alerts_user_id', 'alerts', ['user_id'])
+    op.drop_index('ix_profiles_user_id_platform_id', table_name='profiles')
+    op.drop_index('ix_profiles_user_id_id', table_name='profiles')
@@ -0,0 +1,30 @@
+"""Per-user collection versions for conditional GETs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-07-20 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('profiles_version', sa.Integer(), nullable=False, server_default=sa.text('1')))
+        batch_op.add_column(sa.Column('alerts_version', sa.Integer(), nullable=False, server_default=sa.text('1')))
+    op.create_index('ix_profiles_user_id_updated_at', 'profiles', ['user_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_profiles_user_id_updated_at', table_name='profiles')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('alerts_version')
+        batch_op.drop_column('profiles_version')
@@ -0,0 +1,26 @@
+"""follower_history.confirmed_at for change-only recording
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-07-20 10:35:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('follower_history') as batch_op:
+        batch_op.add_column(sa.Column('confirmed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('follower_history') as batch_op:
+        batch_op.drop_column('confirmed_at')
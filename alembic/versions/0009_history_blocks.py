@@ -0,0 +1,37 @@
+"""Delta-encoded per-day follower history blocks
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-07-20 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'follower_history_blocks',
+        sa.Column('profile_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('base_at', sa.DateTime(), nullable=False),
+        sa.Column('base_count', sa.Integer(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.Column('last_count', sa.Integer(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('time_deltas', sa.LargeBinary(), nullable=False),
+        sa.Column('count_deltas', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['profile_id'], ['profiles.id']),
+        sa.PrimaryKeyConstraint('profile_id', 'day'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('follower_history_blocks')
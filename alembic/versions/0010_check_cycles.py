@@ -0,0 +1,53 @@
+"""Check cycles and per-account check leases
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-07-20 10:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+RUNNING = sa.text("status = 'running'")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('tracked_accounts') as batch_op:
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+    op.create_table(
+        'check_cycles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('dispatched_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_until', sa.DateTime(), nullable=False),
+        sa.Column('cursor', sa.Integer(), nullable=False),
+        sa.Column('resumes', sa.Integer(), nullable=False),
+        sa.Column('accounts_claimed', sa.Integer(), nullable=False),
+        sa.Column('chunks_published', sa.Integer(), nullable=False),
+        sa.Column('accounts_checked', sa.Integer(), nullable=False),
+        sa.Column('accounts_failed', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_check_cycles_running', 'check_cycles', ['status'], unique=True,
+        postgresql_where=RUNNING,
+        sqlite_where=RUNNING
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_check_cycles_running', table_name='check_cycles')
+    op.drop_table('check_cycles')
+    with op.batch_alter_table('tracked_accounts') as batch_op:
+        batch_op.drop_column('lease_expires_at')
@@ -0,0 +1,26 @@
+"""Dispatch leases on notification outbox rows
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2025-07-20 10:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('notification_outbox') as batch_op:
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('notification_outbox') as batch_op:
+        batch_op.drop_column('lease_expires_at')
@@ -1,19 +1,84 @@
+import logging
+from typing import Optional
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials, HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.security import decode_access_token, verify_password_async
+from app.db.database import get_async_db
 from app.models import User
-from app.core.security import verify_password
+from app.schemas import User as UserSchema
 
-security = HTTPBasic()
+logger = logging.getLogger(__name__)
 
+bearer = HTTPBearer(auto_error=False)
+basic = HTTPBasic(auto_error=False)
 
-def authenticate_user(credentials: HTTPBasicCredentials = Depends(security), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == credentials.username).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+
+def user_cache_key(username: str) -> str:
+    return f"auth_user:{username}"
+
+
+async def _load_user(db: AsyncSession, username: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.username == username))
+
+
+async def _user_from_token(token: str, db: AsyncSession) -> Optional[UserSchema]:
+    """Resolve a bearer token; the user row is cached so most requests skip the database.
+
+    A cache outage falls back to the users table rather than rejecting the request.
+    """
+    username = decode_access_token(token)
+    if username is None:
+        return None
+
+    cache = get_cache()
+    try:
+        cached = cache.get(user_cache_key(username))
+    except Exception as e:
+        logger.error(f"Failed to read cached user {username}: {e}")
+        cache, cached = None, None
+    if cached is not None:
+        return UserSchema.model_validate_json(cached)
+
+    user = await _load_user(db, username)
+    if user is None:
+        return None
+    user = UserSchema.model_validate(user)
+    if cache is not None:
+        try:
+            cache.set(user_cache_key(username), user.model_dump_json(), settings.AUTH_USER_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to cache user {username}: {e}")
+    return user
+
+
+async def _user_from_basic(credentials: HTTPBasicCredentials, db: AsyncSession) -> Optional[UserSchema]:
+    user = await _load_user(db, credentials.username)
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
+        return None
+    return UserSchema.model_validate(user)
+
+
+async def authenticate_user(
+        token: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+        credentials: Optional[HTTPBasicCredentials] = Depends(basic),
+        db: AsyncSession = Depends(get_async_db)
+) -> UserSchema:
+    """Authenticate with a bearer token from /users/login, or HTTP Basic when AUTH_BASIC_FALLBACK is on"""
+    user = None
+    if token is not None:
+        user = await _user_from_token(token.credentials, db)
+    elif credentials is not None and settings.AUTH_BASIC_FALLBACK:
+        user = await _user_from_basic(credentials, db)
+
+    if user is None:
+        challenge = "Bearer, Basic" if settings.AUTH_BASIC_FALLBACK else "Bearer"
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Basic"},
+            headers={"WWW-Authenticate": challenge},
         )
     return user
@@ -0,0 +1,49 @@
+import base64
+import json
+from typing import Any, List, Optional
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """`limit` and `cursor` query parameters shared by the list endpoints"""
+
+    def __init__(
+            self,
+            limit: int = Query(None, ge=1, le=settings.PAGE_SIZE_MAX),
+            cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header")
+    ):
+        self.limit = limit or settings.PAGE_SIZE_DEFAULT
+        self.after_id = decode_cursor(cursor) if cursor else None
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(db: AsyncSession, stmt: Select, id_column, page: PageParams, response: Response) -> List[Any]:
+    """Run a keyset-paginated query ordered by `id_column`.
+
+    Fetches one extra row to learn whether another page exists; if so its
+    cursor goes in the X-Next-Cursor response header. Page N costs the same
+    as page 1 since the cursor turns into an index range condition.
+    """
+    if page.after_id is not None:
+        stmt = stmt.where(id_column > page.after_id)
+    rows = (await db.scalars(stmt.order_by(id_column).limit(page.limit + 1))).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    return rows
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, profiles, alerts
+from app.api.v1.endpoints import users, profiles, alerts, exports
 
 api_router = APIRouter()
 
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
 api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
@@ -1,38 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List
-from app.db.database import get_db
-from app.models import User, Alert, Profile
-from app.schemas import AlertCreate, Alert as AlertSchema, AlertUpdate
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.db.database import get_async_db
+from app.models import Alert, Profile
+from app.schemas import (
+    AlertCreate, Alert as AlertSchema, AlertUpdate, BulkAlertImport, BulkImportResult, User as UserSchema
+)
+from app.api.conditional import make_etag, not_modified
 from app.api.dependencies import authenticate_user
+from app.api.pagination import PageParams, paginate
+from app.services.bulk_import import import_alerts
+from app.services.versions import alerts_collection_version, bump_collection_versions
 
 router = APIRouter()
 
 
+async def _get_user_alert(db: AsyncSession, alert_id: int, user_id: int) -> Alert:
+    alert = await db.scalar(
+        select(Alert).where(and_(Alert.id == alert_id, Alert.user_id == user_id))
+    )
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
+
+async def _alerts_etag(db: AsyncSession, user_id: int, *extra) -> str:
+    """Alerts are small and change rarely, so every alert read shares the collection version"""
+    return make_etag(user_id, await db.scalar(alerts_collection_version(user_id)), *extra)
+
+
 @router.post("/", response_model=AlertSchema)
-def create_alert(
+async def create_alert(
         alert: AlertCreate,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Verify profile belongs to user
-    profile = db.query(Profile).filter(
-        and_(Profile.id == alert.profile_id, Profile.user_id == current_user.id)
-    ).first()
+    profile_id = await db.scalar(
+        select(Profile.id).where(and_(Profile.id == alert.profile_id, Profile.user_id == current_user.id))
+    )
 
-    if not profile:
+    if not profile_id:
         raise HTTPException(status_code=404, detail="Profile not found")
 
     # Check if alert already exists
-    existing_alert = db.query(Alert).filter(
-        and_(
-            Alert.user_id == current_user.id,
-            Alert.profile_id == alert.profile_id,
-            Alert.threshold == alert.threshold,
-            Alert.is_active == True
+    existing_alert = await db.scalar(
+        select(Alert.id).where(
+            and_(
+                Alert.user_id == current_user.id,
+                Alert.profile_id == alert.profile_id,
+                Alert.threshold == alert.threshold,
+                Alert.is_active == True
+            )
         )
-    ).first()
+    )
 
     if existing_alert:
         raise HTTPException(status_code=400, detail="Alert already exists")
@@ -43,71 +65,95 @@ def create_alert(
         threshold=alert.threshold
     )
     db.add(db_alert)
-    db.commit()
-    db.refresh(db_alert)
+    await db.execute(bump_collection_versions([current_user.id], alerts=True))
+    await db.commit()
     return db_alert
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_create_alerts(
+        payload: BulkAlertImport,
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_IMPORT_MAX_ITEMS alerts on the user's profiles in one transaction"""
+    result = await db.run_sync(import_alerts, current_user.id, payload.alerts)
+    if result.alerts_created:
+        await db.execute(bump_collection_versions([current_user.id], alerts=True))
+    await db.commit()
+    return result
+
+
 @router.get("/", response_model=List[AlertSchema])
-def get_alerts(
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+async def get_alerts(
+        request: Request,
+        response: Response,
+        is_active: Optional[bool] = None,
+        triggered: Optional[bool] = None,
+        min_threshold: Optional[int] = None,
+        max_threshold: Optional[int] = None,
+        page: PageParams = Depends(),
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(Alert).filter(Alert.user_id == current_user.id).all()
+    """List the user's alerts by id, one page at a time (see X-Next-Cursor)"""
+    cached = not_modified(request, response, await _alerts_etag(db, current_user.id))
+    if cached:
+        return cached
+
+    stmt = select(Alert).where(Alert.user_id == current_user.id)
+    if is_active is not None:
+        stmt = stmt.where(Alert.is_active == is_active)
+    if triggered is not None:
+        stmt = stmt.where(Alert.triggered == triggered)
+    if min_threshold is not None:
+        stmt = stmt.where(Alert.threshold >= min_threshold)
+    if max_threshold is not None:
+        stmt = stmt.where(Alert.threshold <= max_threshold)
+    return await paginate(db, stmt, Alert.id, page, response)
 
 
 @router.get("/{alert_id}", response_model=AlertSchema)
-def get_alert(
+async def get_alert(
         alert_id: int,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        request: Request,
+        response: Response,
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    alert = db.query(Alert).filter(
-        and_(Alert.id == alert_id, Alert.user_id == current_user.id)
-    ).first()
-
-    if not alert:
-        raise HTTPException(status_code=404, detail="Alert not found")
-
-    return alert
+    cached = not_modified(request, response, await _alerts_etag(db, current_user.id, alert_id))
+    if cached:
+        return cached
+    return await _get_user_alert(db, alert_id, current_user.id)
 
 
 @router.put("/{alert_id}", response_model=AlertSchema)
-def update_alert(
+async def update_alert(
         alert_id: int,
         alert_update: AlertUpdate,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    alert = db.query(Alert).filter(
-        and_(Alert.id == alert_id, Alert.user_id == current_user.id)
-    ).first()
-
-    if not alert:
-        raise HTTPException(status_code=404, detail="Alert not found")
+    alert = await _get_user_alert(db, alert_id, current_user.id)
 
     update_data = alert_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(alert, field, value)
 
-    db.commit()
-    db.refresh(alert)
+    await db.execute(bump_collection_versions([current_user.id], alerts=True))
+    await db.commit()
     return alert
 
 
 @router.delete("/{alert_id}")
-def delete_alert(
+async def delete_alert(
         alert_id: int,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    alert = db.query(Alert).filter(
-        and_(Alert.id == alert_id, Alert.user_id == current_user.id)
-    ).first()
-
-    if not alert:
-        raise HTTPException(status_code=404, detail="Alert not found")
+    alert = await _get_user_alert(db, alert_id, current_user.id)
 
-    db.delete(alert)
-    db.commit()
+    await db.delete(alert)
+    await db.execute(bump_collection_versions([current_user.id], alerts=True))
+    await db.commit()
     return {"message": "Alert deleted successfully"}
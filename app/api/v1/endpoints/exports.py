@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.database import get_async_db, get_async_session_factory
+from app.models import Profile, FollowerHistory
+from app.schemas import User as UserSchema
+from app.api.dependencies import authenticate_user
+
+router = APIRouter()
+
+EXPORT_COLUMNS = ["profile_id", "platform", "username", "follower_count", "recorded_at", "confirmed_at"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _format_ndjson(rows, header: bool) -> str:
+    return "".join(
+        json.dumps({
+            "profile_id": row.profile_id,
+            "platform": row.platform,
+            "username": row.username,
+            "follower_count": row.follower_count,
+            "recorded_at": row.recorded_at.isoformat(),
+            "confirmed_at": row.confirmed_at.isoformat() if row.confirmed_at else None
+        }) + "\n"
+        for row in rows
+    )
+
+
+def _format_csv(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        (
+            row.profile_id,
+            row.platform,
+            row.username,
+            row.follower_count,
+            row.recorded_at.isoformat(),
+            row.confirmed_at.isoformat() if row.confirmed_at else ""
+        )
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+FORMATTERS = {"ndjson": _format_ndjson, "csv": _format_csv}
+
+
+async def _stream_rows(session_factory, stmt, format: str) -> AsyncIterator[str]:
+    """Yield the export a cursor partition at a time; the session lives as long as the response"""
+    formatter = FORMATTERS[format]
+    header = True
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+        async for rows in result.partitions():
+            yield formatter(rows, header)
+            header = False
+        if header:
+            yield formatter([], header)
+
+
+@router.get("/history")
+async def export_history(
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        profile_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db),
+        session_factory=Depends(get_async_session_factory)
+):
+    """Stream raw follower history for one profile, or all of the user's profiles, over [start, end].
+
+    Rows come from a server-side cursor, so memory stays flat and the first
+    bytes go out before the query finishes. Raw samples are kept for
+    HISTORY_RAW_RETENTION_DAYS; older ranges only exist in /profiles/{id}/history rollups.
+    Each row's count holds from recorded_at until the profile's next row; confirmed_at
+    is the last check that saw it.
+    """
+    conditions = [Profile.user_id == current_user.id]
+    if profile_id is not None:
+        owned = await db.scalar(select(Profile.id).where(Profile.id == profile_id, Profile.user_id == current_user.id))
+        if not owned:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        conditions.append(FollowerHistory.profile_id == profile_id)
+    if start is not None:
+        conditions.append(FollowerHistory.recorded_at >= start)
+    if end is not None:
+        conditions.append(FollowerHistory.recorded_at <= end)
+
+    stmt = (
+        select(
+            FollowerHistory.profile_id,
+            Profile.platform,
+            Profile.username,
+            FollowerHistory.follower_count,
+            FollowerHistory.recorded_at,
+            FollowerHistory.confirmed_at
+        )
+        .join(Profile, Profile.id == FollowerHistory.profile_id)
+        .where(and_(*conditions))
+        .order_by(FollowerHistory.profile_id, FollowerHistory.recorded_at, FollowerHistory.id)
+    )
+    filename = f"follower_history_{profile_id or 'all'}.{format}"
+    return StreamingResponse(
+        _stream_rows(session_factory, stmt, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,145 +1,238 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, and_, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import List
-from app.db.database import get_db
-from app.models import User, Profile, FollowerHistory
-from app.schemas import ProfileCreate, Profile as ProfileSchema, ProfileWithInsights, ProfileUpdate
+from typing import List, Optional
+from app.db.database import get_async_db
+from app.models import Profile, FollowerHistory, FollowerHistoryHourly, FollowerHistoryDaily, FollowerHistoryBlock
+from app.schemas import (
+    ProfileCreate, Profile as ProfileSchema, ProfileWithInsights, ProfileUpdate, FollowerHistoryRange,
+    BulkProfileImport, BulkImportResult, ProfileCurrent, User as UserSchema
+)
+from app.api.conditional import make_etag, not_modified
 from app.api.dependencies import authenticate_user
+from app.api.pagination import PageParams, paginate
+from app.services.bulk_import import import_profiles
+from app.services.history import get_history_points
+from app.services.hot_state import drop_hot_state_on_commit, get_current_state
+from app.services.insights import get_insights, invalidate_insights_on_commit
+from app.services.tracked_accounts import get_or_create_tracked_account
+from app.services.versions import (
+    bump_collection_versions, insights_bucket, profile_version, profiles_collection_version
+)
 
 router = APIRouter()
 
 
+async def _get_user_profile(db: AsyncSession, profile_id: int, user_id: int) -> Profile:
+    profile = await db.scalar(
+        select(Profile).where(and_(Profile.id == profile_id, Profile.user_id == user_id))
+    )
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+async def _profile_etag(db: AsyncSession, profile_id: int, user_id: int, *extra) -> str:
+    updated_at = await db.scalar(profile_version(profile_id, user_id))
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return make_etag(profile_id, updated_at, *extra)
+
+
 @router.post("/", response_model=ProfileSchema)
-def create_profile(
+async def create_profile(
         profile: ProfileCreate,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db_profile = db.query(Profile).filter(
-        and_(
-            Profile.user_id == current_user.id,
-            Profile.platform == profile.platform,
-            Profile.username == profile.username
+    db_profile = await db.scalar(
+        select(Profile.id).where(
+            and_(
+                Profile.user_id == current_user.id,
+                Profile.platform == profile.platform,
+                Profile.username == profile.username
+            )
         )
-    ).first()
+    )
 
     if db_profile:
         raise HTTPException(status_code=400, detail="Profile already exists")
 
+    account = await db.run_sync(get_or_create_tracked_account, profile.platform, profile.username)
     db_profile = Profile(
         user_id=current_user.id,
+        tracked_account_id=account.id,
         platform=profile.platform,
         username=profile.username
     )
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.execute(bump_collection_versions([current_user.id], profiles=True))
+    await db.commit()
     return db_profile
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_create_profiles(
+        payload: BulkProfileImport,
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_IMPORT_MAX_ITEMS profiles, with optional alert thresholds, in one transaction"""
+    result = await db.run_sync(import_profiles, current_user.id, payload.profiles)
+    await db.execute(bump_collection_versions([current_user.id], profiles=True, alerts=result.alerts_created > 0))
+    await db.commit()
+    return result
+
+
 @router.get("/", response_model=List[ProfileSchema])
-def get_profiles(
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+async def get_profiles(
+        request: Request,
+        response: Response,
+        platform: Optional[str] = None,
+        page: PageParams = Depends(),
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(Profile).filter(Profile.user_id == current_user.id).all()
+    """List the user's profiles by id, one page at a time (see X-Next-Cursor)"""
+    version, newest = (await db.execute(profiles_collection_version(current_user.id))).one()
+    cached = not_modified(request, response, make_etag(current_user.id, version, newest or 0))
+    if cached:
+        return cached
+
+    stmt = select(Profile).where(Profile.user_id == current_user.id)
+    if platform is not None:
+        stmt = stmt.where(Profile.platform == platform)
+    return await paginate(db, stmt, Profile.id, page, response)
 
 
 @router.get("/{profile_id}", response_model=ProfileSchema)
-def get_profile(
+async def get_profile(
         profile_id: int,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        request: Request,
+        response: Response,
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(
-        and_(Profile.id == profile_id, Profile.user_id == current_user.id)
-    ).first()
-
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    return profile
+    cached = not_modified(request, response, await _profile_etag(db, profile_id, current_user.id))
+    if cached:
+        return cached
+    return await _get_user_profile(db, profile_id, current_user.id)
 
 
 @router.put("/{profile_id}", response_model=ProfileSchema)
-def update_profile(
+async def update_profile(
         profile_id: int,
         profile_update: ProfileUpdate,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(
-        and_(Profile.id == profile_id, Profile.user_id == current_user.id)
-    ).first()
-
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    profile = await _get_user_profile(db, profile_id, current_user.id)
 
     update_data = profile_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(profile, field, value)
 
-    db.commit()
-    db.refresh(profile)
+    if "platform" in update_data or "username" in update_data:
+        account = await db.run_sync(get_or_create_tracked_account, profile.platform, profile.username)
+        profile.tracked_account_id = account.id
+
+    invalidate_insights_on_commit(db, [profile.id])
+    await db.commit()
     return profile
 
 
 @router.delete("/{profile_id}")
-def delete_profile(
+async def delete_profile(
         profile_id: int,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(
-        and_(Profile.id == profile_id, Profile.user_id == current_user.id)
-    ).first()
+    profile = await _get_user_profile(db, profile_id, current_user.id)
+
+    # The ORM delete would only null raw history's profile_id, and doesn't reach rollups and history
+    # blocks at all; orphaned rows would stall the rollups
+    for history in (FollowerHistory, FollowerHistoryHourly, FollowerHistoryDaily, FollowerHistoryBlock):
+        await db.execute(delete(history).where(history.profile_id == profile.id))
+    await db.delete(profile)
+    # Its alerts are detached from it, so both collections change
+    await db.execute(bump_collection_versions([current_user.id], profiles=True, alerts=True))
+    invalidate_insights_on_commit(db, [profile.id])
+    drop_hot_state_on_commit(db, [profile.id])
+    await db.commit()
+    return {"message": "Profile deleted successfully"}
 
-    if not profile:
+
+@router.get("/{profile_id}/insights", response_model=ProfileWithInsights)
+async def get_profile_insights(
+        profile_id: int,
+        request: Request,
+        response: Response,
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    etag = await _profile_etag(db, profile_id, current_user.id, insights_bucket())
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    insights = await db.run_sync(get_insights, profile_id, current_user.id)
+
+    if not insights:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    db.delete(profile)
-    db.commit()
-    return {"message": "Profile deleted successfully"}
+    return insights
 
 
-@router.get("/{profile_id}/insights", response_model=ProfileWithInsights)
-def get_profile_insights(
+@router.get("/{profile_id}/current", response_model=ProfileCurrent)
+async def get_profile_current(
         profile_id: int,
-        current_user: User = Depends(authenticate_user),
-        db: Session = Depends(get_db)
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(
-        and_(Profile.id == profile_id, Profile.user_id == current_user.id)
-    ).first()
+    """Current count, last check time and recent samples, served from the hot state when enabled"""
+    state = await db.run_sync(get_current_state, profile_id, current_user.id)
 
-    if not profile:
+    if not state:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    # Get follower history for the last 24 hours
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    recent_history = db.query(FollowerHistory).filter(
-        and_(
-            FollowerHistory.profile_id == profile_id,
-            FollowerHistory.recorded_at >= yesterday
-        )
-    ).order_by(FollowerHistory.recorded_at.desc()).limit(10).all()
+    return ProfileCurrent(
+        profile_id=state.profile_id,
+        follower_count=state.follower_count,
+        checked_at=state.checked_at,
+        recent_samples=[
+            {"recorded_at": recorded_at, "follower_count": count} for recorded_at, count in state.samples
+        ]
+    )
 
-    # Calculate follower change in last 24 hours
-    oldest_record = db.query(FollowerHistory).filter(
-        and_(
-            FollowerHistory.profile_id == profile_id,
-            FollowerHistory.recorded_at >= yesterday
-        )
-    ).order_by(FollowerHistory.recorded_at).first()
 
-    follower_change_24h = 0
-    if oldest_record:
-        follower_change_24h = profile.current_follower_count - oldest_record.follower_count
+@router.get("/{profile_id}/history", response_model=FollowerHistoryRange)
+async def get_profile_history(
+        profile_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resolution: Optional[str] = Query(None, pattern="^(raw|hourly|daily)$"),
+        current_user: UserSchema = Depends(authenticate_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    profile = await db.scalar(
+        select(Profile.id).where(and_(Profile.id == profile_id, Profile.user_id == current_user.id))
+    )
+
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
 
-    return ProfileWithInsights(
-        **profile.__dict__,
-        follower_change_24h=follower_change_24h,
-        recent_history=recent_history
+    # Defaults to the last 24 hours; the table read depends on the range
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    resolution, points = await db.run_sync(get_history_points, profile_id, start, end, resolution)
+    return FollowerHistoryRange(
+        profile_id=profile_id,
+        resolution=resolution,
+        start=start,
+        end=end,
+        points=points
     )
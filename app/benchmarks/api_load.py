@@ -0,0 +1,277 @@
+"""Load-test the API with a weighted mix of profile, alert and insights calls.
+
+Seeds a scratch database like `check_cycle`, logs every synthetic user in,
+then runs --concurrency workers that each pick a random user, a random
+operation from --mix and one of that user's profiles, until --duration
+seconds or --requests requests have gone by. Reports overall RPS and
+per-route RPS, p50/p95/p99 latency and error counts as JSON:
+
+    python -m app.benchmarks.api_load --concurrency 32 --duration 20 --output bench/api.json
+    python -m app.benchmarks.api_load --reset --auth basic --baseline bench/api.json
+
+By default the app runs in-process over httpx's ASGI transport, against the
+seeded database. With --base-url it targets a running server instead, which
+must already use --database-url as its database.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from base64 import b64encode
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.benchmarks.check_cycle import SEED_PASSWORD, add_seed_arguments, seed_database
+from app.benchmarks.report import git_commit, compare, load_report, write_report
+from app.db.database import get_db, get_async_db, get_async_session_factory, async_database_url
+from app.models import User, Profile
+
+API = "/api/v1"
+
+
+# name -> (method, route template, builder of (path, json body) from a user's profile ids)
+OPERATIONS: Dict[str, Tuple[str, str, Callable]] = {
+    "list_profiles": ("GET", "/profiles/", lambda rng, ids: ("/profiles/", None)),
+    "get_profile": ("GET", "/profiles/{id}", lambda rng, ids: (f"/profiles/{rng.choice(ids)}", None)),
+    "profile_insights": (
+        "GET", "/profiles/{id}/insights", lambda rng, ids: (f"/profiles/{rng.choice(ids)}/insights", None)
+    ),
+    "profile_history": (
+        "GET", "/profiles/{id}/history", lambda rng, ids: (f"/profiles/{rng.choice(ids)}/history", None)
+    ),
+    "profile_current": (
+        "GET", "/profiles/{id}/current", lambda rng, ids: (f"/profiles/{rng.choice(ids)}/current", None)
+    ),
+    "list_alerts": ("GET", "/alerts/", lambda rng, ids: ("/alerts/", None)),
+    "create_alert": (
+        "POST", "/alerts/",
+        lambda rng, ids: ("/alerts/", {"profile_id": rng.choice(ids), "threshold": rng.randint(10 ** 6, 10 ** 9)})
+    ),
+}
+DEFAULT_MIX = "list_profiles=3,get_profile=2,profile_insights=3,profile_history=1,list_alerts=2,create_alert=1"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """"name=weight,..." into weights by operation name"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile_ms(latencies: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(latencies, q)) * 1000, 3) if latencies else None
+
+
+class LoadRecorder:
+    """Latencies and failures per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool):
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def results(self, elapsed: float) -> Tuple[Dict, Dict]:
+        all_latencies = [s for samples in self.latencies.values() for s in samples]
+        total = {
+            "requests": len(all_latencies),
+            "errors": sum(self.errors.values()),
+            "seconds": round(elapsed, 3),
+            "rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": percentile_ms(all_latencies, 50),
+            "p95_ms": percentile_ms(all_latencies, 95),
+            "p99_ms": percentile_ms(all_latencies, 99),
+        }
+        routes = {
+            route: {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": percentile_ms(samples, 50),
+                "p95_ms": percentile_ms(samples, 95),
+                "p99_ms": percentile_ms(samples, 99),
+            }
+            for route, samples in sorted(self.latencies.items())
+        }
+        return total, routes
+
+
+async def login_all(client: httpx.AsyncClient, usernames: List[str], auth: str, concurrency: int) -> Dict[str, dict]:
+    """Auth headers per user: a bearer token from /users/login, or Basic credentials sent on every request"""
+    if auth == "basic":
+        return {
+            username: {"Authorization": "Basic " + b64encode(f"{username}:{SEED_PASSWORD}".encode()).decode("ascii")}
+            for username in usernames
+        }
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def login(username):
+        async with limit:
+            response = await client.post(f"{API}/users/login", data={"username": username, "password": SEED_PASSWORD})
+            response.raise_for_status()
+            return username, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return dict(await asyncio.gather(*(login(username) for username in usernames)))
+
+
+async def run_load(
+        client: httpx.AsyncClient,
+        profiles_by_user: Dict[str, List[int]],
+        headers_by_user: Dict[str, dict],
+        weights: Dict[str, float],
+        concurrency: int,
+        duration: float,
+        max_requests: Optional[int],
+        seed_value: int = 0
+) -> Tuple[LoadRecorder, float]:
+    recorder = LoadRecorder()
+    names, name_weights = list(weights), list(weights.values())
+    usernames = [username for username, ids in profiles_by_user.items() if ids]
+    budget = [max_requests if max_requests is not None else float("inf")]
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        while time.perf_counter() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            username = rng.choice(usernames)
+            name = rng.choices(names, name_weights)[0]
+            method, route, build = OPERATIONS[name]
+            path, body = build(rng, profiles_by_user[username])
+            sent = time.perf_counter()
+            try:
+                response = await client.request(method, API + path, json=body, headers=headers_by_user[username])
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            recorder.record(f"{method} {route}", time.perf_counter() - sent, ok)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return recorder, time.perf_counter() - started
+
+
+def _in_process_client(engine: Engine) -> Tuple[httpx.AsyncClient, Callable]:
+    """An ASGI client for the app with its sessions bound to `engine`; call the returned function to undo"""
+    from app.main import app
+
+    url = engine.url.render_as_string(hide_password=False)
+    sync_sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(async_database_url(url))
+    async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        with sync_sessions() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides.update({
+        get_db: override_get_db,
+        get_async_db: override_get_async_db,
+        get_async_session_factory: lambda: async_sessions,
+    })
+
+    async def restore():
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous)
+        await async_engine.dispose()
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+    return client, restore
+
+
+async def _run(args, engine: Engine, weights: Dict[str, float]) -> Dict:
+    with Session(engine) as db:
+        profiles_by_user = defaultdict(list)
+        for row in db.execute(select(User.username, Profile.id).join(Profile, Profile.user_id == User.id)):
+            profiles_by_user[row.username].append(row.id)
+
+    if args.base_url:
+        client, restore = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout), None
+    else:
+        client, restore = _in_process_client(engine)
+    try:
+        async with client:
+            headers = await login_all(client, list(profiles_by_user), args.auth, args.concurrency)
+            recorder, elapsed = await run_load(
+                client, profiles_by_user, headers, weights,
+                args.concurrency, args.duration, args.requests, args.seed
+            )
+    finally:
+        if restore is not None:
+            await restore()
+    return recorder.results(elapsed)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser, users=50, history_per_profile=24)
+    parser.add_argument("--base-url", help="target a running server instead of the in-process app")
+    parser.add_argument("--auth", choices=["bearer", "basic"], default="bearer")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations, default {DEFAULT_MIX}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run for")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    args = parser.parse_args(argv)
+    baseline = load_report(args.baseline)
+    try:
+        weights = parse_mix(args.mix)
+        engine, seeded = seed_database(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        results, routes = asyncio.run(_run(args, engine, weights))
+    finally:
+        engine.dispose()
+
+    report = {
+        "benchmark": "api_load",
+        "commit": git_commit(),
+        "recorded_at": datetime.utcnow().isoformat(),
+        "database": engine.dialect.name,
+        "target": args.base_url or "asgi",
+        "auth": args.auth,
+        "concurrency": args.concurrency,
+        "mix": weights,
+        "seeded": seeded,
+        "results": results,
+        "routes": routes,
+    }
+    if baseline is not None:
+        report["vs_baseline"] = compare(results, baseline["results"])
+        report["routes_vs_baseline"] = {
+            route: compare(stats, baseline.get("routes", {})[route])
+            for route, stats in routes.items() if route in baseline.get("routes", {})
+        }
+
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
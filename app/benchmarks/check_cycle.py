@@ -0,0 +1,322 @@
+"""Benchmark one full follower check cycle against synthetic data.
+
+Seeds users, profiles, alerts and history with Faker, then runs
+`check_all_profiles` with Celery in eager mode, so every dispatched check runs
+inline in this process. Reports throughput, queries and commits per profile,
+peak memory and per-profile latency percentiles, and writes them as JSON so
+runs on different commits can be compared:
+
+    python -m app.benchmarks.check_cycle --users 200 --profiles-per-user 25 --output bench/batch.json
+    python -m app.benchmarks.check_cycle --mode single --baseline bench/batch.json
+
+Point --database-url at a scratch database: the tables are created there, and
+--reset drops them first.
+"""
+import argparse
+import logging
+import random
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from celery.signals import task_prerun, task_postrun
+from faker import Faker
+from sqlalchemy import create_engine, select, insert, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.database import Base, SessionLocal, engine_options
+from app.benchmarks.report import git_commit, compare, load_report, write_report
+from app.db.query_stats import count_queries
+from app.models import User, TrackedAccount, Profile, FollowerHistory, Alert
+from app.models.alert_thresholds import refresh_alert_thresholds
+from app.services.mock_social_api import mock_api
+from app.tasks.celery_app import celery_app
+from app.tasks.follower_tasks import check_all_profiles
+
+PLATFORMS = ["twitter", "instagram"]
+# Every seeded user logs in with this password
+SEED_PASSWORD = "benchmark"
+INSERT_CHUNK = 5000
+# Tasks that check profiles, and how to tell which accounts a call covers
+CHECK_TASKS = {
+    "app.tasks.follower_tasks.check_profile_followers": "profile",
+    "app.tasks.follower_tasks.check_accounts_batch": "accounts",
+    "app.tasks.follower_tasks.check_accounts_async": "accounts",
+}
+
+
+def _insert_chunked(db: Session, model, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.execute(insert(model), rows[start:start + INSERT_CHUNK])
+
+
+def seed(
+        db: Session,
+        users: int,
+        profiles_per_user: int,
+        alerts_per_profile: int,
+        history_per_profile: int,
+        shared_ratio: float = 0.2,
+        seed_value: int = 0,
+        now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Fill an empty database with synthetic data and prime the mock API with each account's count.
+
+    A `shared_ratio` share of profiles track a small pool of popular accounts,
+    so checks fan one lookup out to several users' profiles.
+    """
+    now = now or datetime.utcnow()
+    fake = Faker()
+    Faker.seed(seed_value)
+    rng = random.Random(seed_value)
+
+    password = get_password_hash(SEED_PASSWORD)
+    _insert_chunked(db, User, [
+        {"username": f"{fake.user_name()}_{i}", "hashed_password": password, "created_at": now}
+        for i in range(users)
+    ])
+    user_ids = db.scalars(select(User.id).order_by(User.id)).all()
+
+    total_profiles = users * profiles_per_user
+    popular = [(rng.choice(PLATFORMS), f"{fake.user_name()}_popular_{i}")
+               for i in range(max(1, total_profiles // 50))]
+    keys = []
+    for user_index in range(users):
+        # A user tracks each account at most once
+        chosen = set()
+        for i in range(profiles_per_user):
+            key = rng.choice(popular) if rng.random() < shared_ratio else None
+            if key is None or key in chosen:
+                key = (rng.choice(PLATFORMS), f"{fake.user_name()}_{user_index}_{i}")
+            chosen.add(key)
+            keys.append((user_ids[user_index], key))
+
+    counts = {key: rng.randint(100, 1_000_000) for _, key in keys}
+    _insert_chunked(db, TrackedAccount, [
+        {"platform": platform, "username": username, "follower_count": count}
+        for (platform, username), count in counts.items()
+    ])
+    account_ids = {
+        (row.platform, row.username): row.id
+        for row in db.execute(select(TrackedAccount.id, TrackedAccount.platform, TrackedAccount.username))
+    }
+    _insert_chunked(db, Profile, [
+        {
+            "user_id": user_id,
+            "tracked_account_id": account_ids[key],
+            "platform": key[0],
+            "username": key[1],
+            "current_follower_count": counts[key],
+            "created_at": now,
+            "updated_at": now
+        }
+        for user_id, key in keys
+    ])
+    profiles = db.execute(select(Profile.id, Profile.user_id, Profile.current_follower_count)).all()
+
+    _insert_chunked(db, Alert, [
+        {
+            "user_id": p.user_id,
+            "profile_id": p.id,
+            "threshold": p.current_follower_count + rng.randint(1, 200) * 10 ** j,
+            "is_active": True,
+            "triggered": False,
+            "created_at": now
+        }
+        for p in profiles
+        for j in range(alerts_per_profile)
+    ])
+    history = []
+    for p in profiles:
+        count = p.current_follower_count
+        for i in range(history_per_profile):
+            history.append({
+                "profile_id": p.id,
+                "follower_count": count,
+                "recorded_at": now - timedelta(minutes=5 * (i + 1))
+            })
+            count = max(0, count - rng.randint(-50, 100))
+            if len(history) >= INSERT_CHUNK:
+                _insert_chunked(db, FollowerHistory, history)
+                history = []
+    _insert_chunked(db, FollowerHistory, history)
+
+    refresh_alert_thresholds(db)
+    db.commit()
+
+    # The mock API draws its changes from the global generator
+    random.seed(seed_value)
+    for (platform, username), count in counts.items():
+        mock_api.set_follower_count(platform, username, count)
+    return {"users": users, "accounts": len(counts), "profiles": len(profiles),
+            "alerts": len(profiles) * alerts_per_profile, "history": len(profiles) * history_per_profile}
+
+
+class TaskTimer:
+    """Records how long each eager check task took and how many profiles it covered"""
+
+    def __init__(self, profiles_by_account: Dict[int, int], account_by_profile: Dict[int, int]):
+        self.profiles_by_account = profiles_by_account
+        self.account_by_profile = account_by_profile
+        self.started: Dict[str, float] = {}
+        # (seconds, profiles) per task call
+        self.calls: List[tuple] = []
+
+    def covered_profiles(self, kind: str, args) -> int:
+        if kind == "profile":
+            return self.profiles_by_account.get(self.account_by_profile.get(args[0]), 0)
+        return sum(self.profiles_by_account.get(account_id, 0) for account_id in args[0])
+
+    def on_prerun(self, task_id=None, task=None, **kwargs):
+        if task.name in CHECK_TASKS:
+            self.started[task_id] = time.perf_counter()
+
+    def on_postrun(self, task_id=None, task=None, args=None, **kwargs):
+        started = self.started.pop(task_id, None)
+        if started is not None:
+            profiles = self.covered_profiles(CHECK_TASKS[task.name], args)
+            if profiles:
+                self.calls.append((time.perf_counter() - started, profiles))
+
+    def per_profile_latencies(self) -> np.ndarray:
+        """Each call's time split evenly over the profiles it checked, one entry per profile"""
+        if not self.calls:
+            return np.zeros(0)
+        seconds, profiles = np.array(self.calls).T
+        return np.repeat(seconds / profiles, profiles.astype(int))
+
+
+@contextmanager
+def bound_to(engine: Engine, mode: str):
+    """Run tasks eagerly against `engine` with the given CHECK_MODE, restoring everything afterwards"""
+    previous_bind = SessionLocal.kw.get("bind")
+    previous_eager = celery_app.conf.task_always_eager
+    previous_mode = settings.CHECK_MODE
+    SessionLocal.configure(bind=engine)
+    celery_app.conf.task_always_eager = True
+    settings.CHECK_MODE = mode
+    try:
+        yield
+    finally:
+        SessionLocal.configure(bind=previous_bind)
+        celery_app.conf.task_always_eager = previous_eager
+        settings.CHECK_MODE = previous_mode
+
+
+def run_cycle(engine: Engine, mode: str, trace_memory: bool = False) -> Dict[str, float]:
+    """Run one check cycle over every due account and measure it"""
+    with Session(engine) as db:
+        profile_accounts = db.execute(select(Profile.id, Profile.tracked_account_id)).all()
+    account_by_profile = dict(profile_accounts)
+    profiles_by_account: Dict[int, int] = {}
+    for _, account_id in profile_accounts:
+        profiles_by_account[account_id] = profiles_by_account.get(account_id, 0) + 1
+
+    timer = TaskTimer(profiles_by_account, account_by_profile)
+    task_prerun.connect(timer.on_prerun, weak=False)
+    task_postrun.connect(timer.on_postrun, weak=False)
+    if trace_memory:
+        tracemalloc.start()
+    started_at = datetime.utcnow()
+    try:
+        with bound_to(engine, mode), count_queries(engine) as queries:
+            started = time.perf_counter()
+            check_all_profiles()
+            elapsed = time.perf_counter() - started
+    finally:
+        task_prerun.disconnect(timer.on_prerun)
+        task_postrun.disconnect(timer.on_postrun)
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    with Session(engine) as db:
+        checked = db.scalar(select(func.count(Profile.id)).where(Profile.updated_at >= started_at))
+    latencies = timer.per_profile_latencies()
+    per_profile = max(checked, 1)
+    results = {
+        "profiles_checked": checked,
+        "seconds": round(elapsed, 4),
+        "profiles_per_second": round(checked / elapsed, 2) if elapsed else 0.0,
+        "queries": queries.statements,
+        "queries_per_profile": round(queries.statements / per_profile, 3),
+        "commits": queries.commits,
+        "commits_per_profile": round(queries.commits / per_profile, 4),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies.size else None,
+        "latency_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3) if latencies.size else None,
+        # ru_maxrss is in kilobytes on Linux and covers the whole process, seeding included
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if traced_peak is not None:
+        results["traced_peak_mb"] = round(traced_peak / 2 ** 20, 2)
+    return results
+
+
+def add_seed_arguments(parser: argparse.ArgumentParser, users: int = 100, history_per_profile: int = 12):
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate the tables first")
+    parser.add_argument("--users", type=int, default=users)
+    parser.add_argument("--profiles-per-user", type=int, default=10)
+    parser.add_argument("--alerts-per-profile", type=int, default=2)
+    parser.add_argument("--history-per-profile", type=int, default=history_per_profile)
+    parser.add_argument("--shared-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def seed_database(args: argparse.Namespace) -> Tuple[Engine, Dict[str, int]]:
+    """Create the tables at --database-url and seed them; refuses a database that already has users"""
+    engine = create_engine(args.database_url, **engine_options(args.database_url))
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        if db.scalar(select(func.count(User.id))):
+            engine.dispose()
+            raise ValueError(f"{args.database_url} already has data; use --reset or a scratch database")
+        seeded = seed(
+            db, args.users, args.profiles_per_user, args.alerts_per_profile,
+            args.history_per_profile, args.shared_ratio, args.seed
+        )
+    return engine, seeded
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser)
+    parser.add_argument("--mode", choices=["batch", "async", "single"], default=settings.CHECK_MODE)
+    parser.add_argument("--trace-memory", action="store_true", help="also report the tracemalloc peak (slower)")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    args = parser.parse_args(argv)
+    baseline = load_report(args.baseline)
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        engine, seeded = seed_database(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = {
+        "benchmark": "check_cycle",
+        "commit": git_commit(),
+        "recorded_at": datetime.utcnow().isoformat(),
+        "database": engine.dialect.name,
+        "mode": args.mode,
+        "seeded": seeded,
+        "results": run_cycle(engine, args.mode, args.trace_memory),
+    }
+    if baseline is not None:
+        report["vs_baseline"] = compare(report["results"], baseline["results"])
+    engine.dispose()
+
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import json
+import subprocess
+from typing import Dict, Optional
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, so reports can be lined up against history"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """Ratio of each numeric result to the baseline's (above 1 means larger)"""
+    return {
+        name: round(value / baseline[name], 3) if baseline.get(name) else None
+        for name, value in results.items()
+        if isinstance(value, (int, float)) and name in baseline
+    }
+
+
+def load_report(path: Optional[str]) -> Optional[Dict]:
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_report(report: Dict, output: Optional[str]):
+    """Print the report and, when given a path, save it there as JSON"""
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
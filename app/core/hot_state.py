@@ -0,0 +1,168 @@
+"""Write-through hot state for profiles: current count, last check time and recent samples.
+
+Postgres stays the source of truth. Check tasks write here after their
+transaction commits, reads fall back to Postgres on a miss, and
+the `rebuild_hot_state` task repopulates everything after a cold start.
+"""
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+Sample = Tuple[datetime, int]
+
+
+@dataclass
+class HotProfileState:
+    profile_id: int
+    user_id: int
+    follower_count: int
+    checked_at: Optional[datetime]
+    # Newest first
+    samples: List[Sample] = field(default_factory=list)
+
+
+def _state_key(profile_id: int) -> str:
+    return f"hot:profile:{profile_id}"
+
+
+def _samples_key(profile_id: int) -> str:
+    return f"hot:samples:{profile_id}"
+
+
+def _encode_sample(sample: Sample) -> str:
+    return f"{sample[0].isoformat()}|{sample[1]}"
+
+
+def _decode_sample(value: str) -> Sample:
+    recorded_at, count = value.split("|")
+    return datetime.fromisoformat(recorded_at), int(count)
+
+
+class MemoryHotState:
+    """In-process stand-in for RedisHotState, for tests and single-process setups"""
+
+    def __init__(self, max_samples: int):
+        self.max_samples = max_samples
+        self._states: Dict[int, HotProfileState] = {}
+        self._lock = threading.Lock()
+
+    def record_checks(self, states: Sequence[HotProfileState]):
+        with self._lock:
+            for state in states:
+                previous = self._states.get(state.profile_id)
+                samples = state.samples + (previous.samples if previous else [])
+                self._states[state.profile_id] = HotProfileState(
+                    state.profile_id, state.user_id, state.follower_count, state.checked_at,
+                    samples[:self.max_samples]
+                )
+
+    def load(self, states: Sequence[HotProfileState]):
+        with self._lock:
+            for state in states:
+                self._states[state.profile_id] = HotProfileState(
+                    state.profile_id, state.user_id, state.follower_count, state.checked_at,
+                    state.samples[:self.max_samples]
+                )
+
+    def get_many(self, profile_ids: Sequence[int]) -> Dict[int, HotProfileState]:
+        with self._lock:
+            return {pid: self._states[pid] for pid in profile_ids if pid in self._states}
+
+    def delete(self, profile_ids: Iterable[int]):
+        with self._lock:
+            for profile_id in profile_ids:
+                self._states.pop(profile_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+class RedisHotState:
+    """Hash per profile plus a capped list of samples; every call is one pipelined round trip"""
+
+    def __init__(self, url: str, max_samples: int, ttl_seconds: int):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.max_samples = max_samples
+        self.ttl_seconds = ttl_seconds
+
+    def _write_state(self, pipe, state: HotProfileState):
+        key = _state_key(state.profile_id)
+        pipe.hset(key, mapping={
+            "user_id": state.user_id,
+            "follower_count": state.follower_count,
+            "checked_at": state.checked_at.isoformat() if state.checked_at else "",
+        })
+        pipe.expire(key, self.ttl_seconds)
+
+    def record_checks(self, states: Sequence[HotProfileState]):
+        pipe = self.client.pipeline(transaction=False)
+        for state in states:
+            self._write_state(pipe, state)
+            if not state.samples:
+                continue
+            samples_key = _samples_key(state.profile_id)
+            # LPUSH of [oldest, ..., newest] leaves the newest at the head
+            pipe.lpush(samples_key, *(_encode_sample(s) for s in reversed(state.samples)))
+            pipe.ltrim(samples_key, 0, self.max_samples - 1)
+            pipe.expire(samples_key, self.ttl_seconds)
+        pipe.execute()
+
+    def load(self, states: Sequence[HotProfileState]):
+        pipe = self.client.pipeline(transaction=False)
+        for state in states:
+            self._write_state(pipe, state)
+            samples_key = _samples_key(state.profile_id)
+            pipe.delete(samples_key)
+            samples = state.samples[:self.max_samples]
+            if samples:
+                pipe.rpush(samples_key, *(_encode_sample(s) for s in samples))
+                pipe.expire(samples_key, self.ttl_seconds)
+        pipe.execute()
+
+    def get_many(self, profile_ids: Sequence[int]) -> Dict[int, HotProfileState]:
+        pipe = self.client.pipeline(transaction=False)
+        for profile_id in profile_ids:
+            pipe.hgetall(_state_key(profile_id))
+            pipe.lrange(_samples_key(profile_id), 0, -1)
+        replies = pipe.execute()
+
+        states = {}
+        for index, profile_id in enumerate(profile_ids):
+            fields, samples = replies[2 * index], replies[2 * index + 1]
+            if fields:
+                states[profile_id] = HotProfileState(
+                    profile_id,
+                    int(fields["user_id"]),
+                    int(fields["follower_count"]),
+                    datetime.fromisoformat(fields["checked_at"]) if fields["checked_at"] else None,
+                    [_decode_sample(s) for s in samples]
+                )
+        return states
+
+    def delete(self, profile_ids: Iterable[int]):
+        keys = [key for pid in profile_ids for key in (_state_key(pid), _samples_key(pid))]
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        pass
+
+
+_hot_state = None
+
+
+def get_hot_state():
+    """The configured hot state backend, or None when HOT_STATE_BACKEND is "none" """
+    global _hot_state
+    if _hot_state is None and settings.HOT_STATE_BACKEND != "none":
+        if settings.HOT_STATE_BACKEND == "redis":
+            _hot_state = RedisHotState(
+                settings.REDIS_URL, settings.HOT_STATE_RECENT_SAMPLES, settings.HOT_STATE_TTL_SECONDS
+            )
+        else:
+            _hot_state = MemoryHotState(settings.HOT_STATE_RECENT_SAMPLES)
+    return _hot_state
@@ -0,0 +1,92 @@
+"""Prometheus metrics for the check pipeline and the API, served at /metrics.
+
+In a single process the default registry is served as is. With Celery prefork
+workers or several API workers, set PROMETHEUS_MULTIPROC_DIR (before startup,
+to an empty directory) for each service: each process then writes its samples
+there and /metrics adds them up across processes. A service should only ever
+empty its own directory. For the API's /metrics to also report other services,
+list their directories in METRICS_AGGREGATE_DIRS, comma-separated.
+"""
+import glob
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+
+# Follower lookups: one observation per upstream request (a batch, or a single account)
+FOLLOWER_FETCH_SECONDS = Histogram(
+    "follower_fetch_seconds", "Latency of upstream follower lookups", ["platform"]
+)
+FOLLOWER_FETCH_ACCOUNTS = Counter(
+    "follower_fetch_accounts_total", "Accounts looked up upstream, by outcome", ["platform", "outcome"]
+)
+
+# Celery tasks, timed by signal handlers in app.tasks.celery_app
+TASK_SECONDS = Histogram(
+    "celery_task_seconds", "Wall time of a Celery task", ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+# Checks
+CHECK_DB_SECONDS = Histogram(
+    "check_db_seconds", "Time a check task spends writing counts and committing", ["task"]
+)
+PROFILES_CHECKED = Counter("profiles_checked_total", "Profiles given a new follower count")
+HISTORY_SAMPLES = Counter(
+    "follower_history_samples_total", "Checks by how they were recorded in follower_history", ["recorded"]
+)
+ALERTS_EVALUATED = Counter("alerts_evaluated_total", "Pending alerts compared against a new count")
+ALERTS_TRIGGERED = Counter("alerts_triggered_total", "Alerts whose threshold was crossed")
+
+# Dispatch, set by check_all_profiles each cycle
+CHECK_DUE_ACCOUNTS = Gauge(
+    "check_due_accounts", "Tracked accounts claimed by the last dispatch", multiprocess_mode="mostrecent"
+)
+CHECK_OVERDUE_SECONDS = Gauge(
+    "check_overdue_seconds", "How long the most overdue account had been due at the last dispatch",
+    multiprocess_mode="mostrecent"
+)
+
+# API
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API request latency by route template", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "API requests being handled", multiprocess_mode="livesum"
+)
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def metrics_dirs():
+    """This process's multiprocess directory followed by METRICS_AGGREGATE_DIRS"""
+    extra = [path.strip() for path in os.environ.get("METRICS_AGGREGATE_DIRS", "").split(",") if path.strip()]
+    return [multiprocess_dir(), *extra]
+
+
+class DirectoriesCollector:
+    """Merges the multiprocess files of several directories, e.g. the API's and the workers'"""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def collect(self):
+        files = [name for path in self.paths for name in glob.glob(os.path.join(path, "*.db"))]
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def metrics_payload():
+    """(body, content type) for /metrics, aggregated across processes in multiprocess mode"""
+    registry = REGISTRY
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        registry.register(DirectoriesCollector(metrics_dirs()))
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Drop a finished process's live gauges in multiprocess mode"""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
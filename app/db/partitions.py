@@ -0,0 +1,108 @@
+"""Monthly range partitions of follower_history (Postgres only).
+
+Partitions are named follower_history_yYYYYmMM and cover [first of month,
+first of next month). Retention drops whole partitions, which is a catalog
+operation instead of a large DELETE.
+"""
+from datetime import date
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARENT_TABLE = "follower_history"
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    years, index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date:
+    suffix = name[len(PARENT_TABLE) + 2:]
+    year, month = suffix.split("m")
+    return date(int(year), int(month), 1)
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid))"
+    ), {"name": PARENT_TABLE}).scalar())
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :name AND pg_table_is_visible(parent.oid) "
+        "ORDER BY child.relname"
+    ), {"name": PARENT_TABLE}).scalars())
+
+
+def ensure_partitions(conn: Connection, first_month: date, last_month: date) -> List[str]:
+    """Create any missing monthly partitions from first_month through last_month"""
+    created = []
+    existing = set(list_partitions(conn))
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(month)
+        if name not in existing:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def carry_forward_current_rows(conn: Connection, name: str, boundary: date) -> int:
+    """Copy the rows of partition `name` that are still their profile's newest sample to `boundary`.
+
+    With change-only recording a stable profile's only row can be months old;
+    the copy keeps its count in the history once the old partition is dropped.
+    Returns the number of rows copied.
+    """
+    ensure_partitions(conn, boundary, boundary)
+    return conn.execute(text(
+        f"INSERT INTO {PARENT_TABLE} (profile_id, follower_count, recorded_at, confirmed_at) "
+        f"SELECT h.profile_id, h.follower_count, :boundary, "
+        f"CASE WHEN h.confirmed_at > :boundary THEN h.confirmed_at END "
+        f"FROM {name} h "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {PARENT_TABLE} n "
+        f"WHERE n.profile_id = h.profile_id AND n.recorded_at > h.recorded_at)"
+    ), {"boundary": boundary}).rowcount
+
+
+def drop_partitions_before(conn: Connection, cutoff: date, max_id: int) -> List[str]:
+    """Drop partitions that end on or before `cutoff` and hold no id above `max_id`.
+
+    `max_id` is the rollup watermark, so partitions are only dropped once their
+    rows have been folded into the rollups. Rows still current are first
+    carried forward to the start of the next month; having new ids, they hold
+    that partition back until the next rollup.
+    """
+    dropped = []
+    for name in list_partitions(conn):
+        boundary = add_months(partition_month(name), 1)
+        if boundary > cutoff:
+            continue
+        newest = conn.execute(text(f"SELECT max(id) FROM {name}")).scalar()
+        if newest is not None and newest > max_id:
+            continue
+        carry_forward_current_rows(conn, name, boundary)
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
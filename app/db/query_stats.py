@@ -0,0 +1,148 @@
+"""Count SQL statements, commits and database time per request, task or block.
+
+Listeners on every Engine attribute each statement to whatever tracking is
+active in the current context (`track_queries`, nested scopes all count it),
+so the API middleware, the Celery task hooks and tests can each measure
+their own unit of work. Identical SELECTs repeated QUERY_REPEAT_THRESHOLD
+times in one scope are reported as a likely N+1.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_active: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_stats", default=())
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    commits: int = 0
+    seconds: float = 0.0
+    # Statement text -> times run, for N+1 detection and budget failure messages
+    by_statement: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float):
+        self.statements += 1
+        self.seconds += seconds
+        self.by_statement[statement] += 1
+
+    def repeated_selects(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """SELECTs run at least `threshold` times, most repeated first"""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [
+            (statement, count) for statement, count in self.by_statement.most_common()
+            if count >= threshold and statement.lstrip().upper().startswith("SELECT")
+        ]
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [f"{self.statements} statements, {self.commits} commits, {self.seconds * 1000:.1f} ms"]
+        lines += [f"  {count}x {' '.join(statement.split())[:200]}"
+                  for statement, count in self.by_statement.most_common(limit)]
+        return "\n".join(lines)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    scopes = _active.get()
+    started = conn.info.get("query_started")
+    if not scopes or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for stats in scopes:
+        stats.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _forget_failed_statement(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+@event.listens_for(Engine, "commit")
+def _count_commit(conn):
+    for stats in _active.get():
+        stats.commits += 1
+
+
+def begin_tracking() -> Tuple[QueryStats, object]:
+    """Start a tracking scope; pass the token to `end_tracking` from the same context"""
+    stats = QueryStats()
+    return stats, _active.set(_active.get() + (stats,))
+
+
+def end_tracking(token):
+    _active.reset(token)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count what runs inside the block, in this context and tasks or greenlets started from it.
+
+    executemany batches count once, as the single round trip they are.
+    """
+    stats, token = begin_tracking()
+    try:
+        yield stats
+    finally:
+        end_tracking(token)
+
+
+def warn_on_repeats(stats: QueryStats, where: str):
+    for statement, count in stats.repeated_selects():
+        logger.warning(f"Possible N+1 in {where}: same SELECT ran {count} times: {' '.join(statement.split())[:300]}")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_statements: int, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """Fail if the block runs more than `max_statements` statements or repeats a SELECT.
+
+    A SELECT may run up to `max_repeats` times (default: below QUERY_REPEAT_THRESHOLD).
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.statements > max_statements:
+        raise QueryBudgetExceeded(f"Query budget of {max_statements} exceeded: {stats.summary()}")
+    allowed = max_repeats if max_repeats is not None else settings.QUERY_REPEAT_THRESHOLD - 1
+    repeats = stats.repeated_selects(allowed + 1)
+    if repeats:
+        raise QueryBudgetExceeded(f"Repeated SELECT ({repeats[0][1]}x), likely N+1: {stats.summary()}")
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[QueryStats]:
+    """Count everything run on `engine` inside the block, whichever context runs it"""
+    stats = QueryStats()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, 0.0)
+
+    def on_commit(conn):
+        stats.commits += 1
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(engine, "commit", on_commit)
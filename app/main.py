@@ -1,17 +1,34 @@
-from fastapi import FastAPI
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import api_router
-from app.db.database import engine
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_PROGRESS, mark_process_dead, metrics_payload
+from app.db.database import engine, async_engine
+from app.db.query_stats import track_queries, warn_on_repeats
 from app.models import Base
 
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic (`alembic upgrade head`); this is a local-dev shortcut
+if settings.AUTO_CREATE_TABLES:
+    Base.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await async_engine.dispose()
+    mark_process_dead(os.getpid())
+
 
 app = FastAPI(
     title="Social Network Engagement Bot API",
     description="API for tracking social media engagement and follower milestones",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -20,11 +37,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-DB-Queries", "Server-Timing"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency by route template, not raw path, so ids don't multiply the series.
+
+    Streamed responses are timed until their headers go out.
+    """
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_PROGRESS.dec()
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route is not None else "unmatched", str(status)
+        ).observe(time.perf_counter() - started)
+
+
+@app.middleware("http")
+async def report_query_stats(request: Request, call_next):
+    """With QUERY_STATS_ENABLED, X-DB-Queries and Server-Timing headers with the request's SQL.
+
+    Statements run while a streamed body is sent come after the headers and aren't counted.
+    """
+    if not settings.QUERY_STATS_ENABLED:
+        return await call_next(request)
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Queries"] = str(stats.statements)
+    response.headers["Server-Timing"] = f"db;dur={stats.seconds * 1000:.2f}"
+    route = request.scope.get("route")
+    warn_on_repeats(stats, f"{request.method} {route.path if route is not None else request.url.path}")
+    return response
+
+
 app.include_router(api_router, prefix="/api/v1")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = metrics_payload()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/")
 def root():
     return {"message": "Social Network Engagement Bot API", "docs": "/docs"}
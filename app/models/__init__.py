@@ -1,4 +1,13 @@
-from app.models.profile import User, Profile, FollowerHistory, Alert
+from app.models.profile import User, TrackedAccount, Profile, FollowerHistory, Alert
+from app.models.rollup import FollowerHistoryHourly, FollowerHistoryDaily, RollupWatermark
+from app.models.notification import NotificationOutbox
+from app.models.history_block import FollowerHistoryBlock
+from app.models.check_cycle import CheckCycle
+from app.models import alert_thresholds
 from app.db.database import Base
 
-__all__ = ["User", "Profile", "FollowerHistory", "Alert", "Base"]
+__all__ = [
+    "User", "TrackedAccount", "Profile", "FollowerHistory", "Alert",
+    "FollowerHistoryHourly", "FollowerHistoryDaily", "RollupWatermark",
+    "NotificationOutbox", "FollowerHistoryBlock", "CheckCycle", "Base"
+]
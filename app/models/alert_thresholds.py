@@ -0,0 +1,73 @@
+from typing import Iterable, Optional
+from sqlalchemy import select, func, and_, event, inspect
+from sqlalchemy.orm import Session
+from app.models.profile import Profile, Alert
+
+profiles_table = Profile.__table__
+alerts_table = Alert.__table__
+
+
+def refresh_alert_thresholds(db, profile_ids: Optional[Iterable[int]] = None):
+    """Recompute next/prev pending alert thresholds for the given profiles (all when None).
+
+    One UPDATE with correlated subqueries. Accepts a Session or a Connection.
+    """
+    if profile_ids is not None:
+        profile_ids = list(profile_ids)
+        if not profile_ids:
+            return
+
+    current = func.coalesce(profiles_table.c.current_follower_count, 0)
+    pending = and_(
+        alerts_table.c.profile_id == profiles_table.c.id,
+        alerts_table.c.is_active == True,
+        alerts_table.c.triggered == False
+    )
+    stmt = profiles_table.update().values(
+        next_alert_threshold=select(func.min(alerts_table.c.threshold))
+        .where(pending, alerts_table.c.threshold > current)
+        .scalar_subquery(),
+        prev_alert_threshold=select(func.max(alerts_table.c.threshold))
+        .where(pending, alerts_table.c.threshold <= current)
+        .scalar_subquery()
+    )
+    if profile_ids is not None:
+        stmt = stmt.where(profiles_table.c.id.in_(profile_ids))
+
+    if isinstance(db, Session):
+        db = db.connection()
+    db.execute(stmt)
+
+
+def needs_alert_work(new_count: int, next_threshold: Optional[int], prev_threshold: Optional[int]) -> bool:
+    """True when `new_count` leaves the band between the profile's pending thresholds"""
+    return (
+        (next_threshold is not None and new_count >= next_threshold)
+        or (prev_threshold is not None and new_count < prev_threshold)
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_threshold_changes(session, flush_context, instances):
+    """Note profiles whose pending thresholds may change through ORM unit-of-work edits"""
+    touched = session.info.setdefault("alert_threshold_profiles", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Alert):
+            # A new alert may only reference its profile through the relationship until flushed
+            touched.add(obj.profile_id if obj.profile_id is not None else obj)
+            touched.update(pid for pid in inspect(obj).attrs.profile_id.history.deleted if pid is not None)
+        elif isinstance(obj, Profile) and obj not in session.deleted:
+            if obj in session.new or inspect(obj).attrs.current_follower_count.history.has_changes():
+                touched.add(obj)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_touched_thresholds(session, flush_context):
+    touched = session.info.pop("alert_threshold_profiles", None)
+    if not touched:
+        return
+    profile_ids = {
+        obj.id if isinstance(obj, Profile) else obj.profile_id if isinstance(obj, Alert) else obj
+        for obj in touched
+    }
+    refresh_alert_thresholds(session.connection(), [pid for pid in profile_ids if pid is not None])
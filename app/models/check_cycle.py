@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
+from datetime import datetime
+from app.db.database import Base
+
+RUNNING = "running"
+FINISHED = "finished"
+
+
+class CheckCycle(Base):
+    """One run of check_all_profiles, from the first claimed page until every claimed account was checked.
+
+    Accounts claimed by the cycle have next_check_at set to its claimed_until
+    until their check writes the real next time; cursor is the highest account
+    id whose check has been published. heartbeat_at moves with every published
+    page and every finished chunk, which is how a crashed cycle is noticed.
+    """
+    __tablename__ = "check_cycles"
+    __table_args__ = (
+        # At most one running cycle; a dispatch that loses the race to start one skips
+        Index(
+            "uq_check_cycles_running", "status", unique=True,
+            postgresql_where=text("status = 'running'"),
+            sqlite_where=text("status = 'running'")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    status = Column(String, nullable=False, default=RUNNING)  # running, finished
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Set once every due page has been published
+    dispatched_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claimed_until = Column(DateTime, nullable=False)
+    cursor = Column(Integer, nullable=False, default=0)
+    resumes = Column(Integer, nullable=False, default=0)
+    accounts_claimed = Column(Integer, nullable=False, default=0)
+    chunks_published = Column(Integer, nullable=False, default=0)
+    accounts_checked = Column(Integer, nullable=False, default=0)
+    accounts_failed = Column(Integer, nullable=False, default=0)
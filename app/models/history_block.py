@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, LargeBinary, PrimaryKeyConstraint
+from app.db.database import Base
+
+
+class FollowerHistoryBlock(Base):
+    """One profile's samples for one UTC day, packed by app.services.history_blocks.
+
+    The first sample is stored as base_at/base_count; every later one as the
+    zigzag varint of its difference from the previous sample, microseconds in
+    time_deltas and followers in count_deltas. last_at/last_count let a check
+    append without decoding the block.
+    """
+    __tablename__ = "follower_history_blocks"
+    __table_args__ = (PrimaryKeyConstraint("profile_id", "day"),)
+
+    profile_id = Column(Integer, ForeignKey("profiles.id"))
+    day = Column(Date)
+    base_at = Column(DateTime, nullable=False)
+    base_count = Column(Integer, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+    last_count = Column(Integer, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    time_deltas = Column(LargeBinary, nullable=False)
+    count_deltas = Column(LargeBinary, nullable=False)
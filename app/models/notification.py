@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
+from datetime import datetime
+from app.db.database import Base
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+UNDELIVERABLE = "undeliverable"
+
+
+class NotificationOutbox(Base):
+    """A milestone message written with the alert that triggered it and sent later by the dispatcher"""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Only pending rows are ever polled
+        Index(
+            "ix_notification_outbox_pending_next_attempt_at", "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="SET NULL"), nullable=True)
+    message = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default=PENDING)  # pending, sent, failed, undeliverable
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    # Set while a dispatcher is sending the row; lapses if that dispatcher dies
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
@@ -10,41 +10,101 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    # Where milestone notifications are sent; users without one get none
+    telegram_chat_id = Column(String, nullable=True)
+    # Bumped whenever the user's set of profiles or alerts changes; part of the list ETags
+    profiles_version = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    alerts_version = Column(Integer, nullable=False, default=1, server_default=text("1"))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     profiles = relationship("Profile", back_populates="user")
     alerts = relationship("Alert", back_populates="user")
 
 
+class TrackedAccount(Base):
+    """A (platform, username) pair fetched once per cycle and shared by every user's Profile"""
+    __tablename__ = "tracked_accounts"
+    __table_args__ = (
+        UniqueConstraint("platform", "username", name="uq_tracked_accounts_platform_username"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    platform = Column(String, nullable=False)
+    username = Column(String, nullable=False)
+    follower_count = Column(Integer, nullable=True)
+    last_checked_at = Column(DateTime, nullable=True)
+    # Smoothed absolute change in followers per hour, drives the adaptive check interval
+    follower_change_rate = Column(Float, nullable=True)
+    next_check_at = Column(DateTime, nullable=True, index=True)
+    # Held by the check in flight, so no two workers check the account at once; cleared when it finishes
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    profiles = relationship("Profile", back_populates="tracked_account")
+
+
 class Profile(Base):
     __tablename__ = "profiles"
+    __table_args__ = (
+        # Duplicate check on create
+        Index("ix_profiles_user_id_platform_username", "user_id", "platform", "username"),
+        # Keyset-paginated listing, unfiltered and by platform
+        Index("ix_profiles_user_id_id", "user_id", "id"),
+        Index("ix_profiles_user_id_platform_id", "user_id", "platform", "id"),
+        # Newest change among a user's profiles, for the collection ETag
+        Index("ix_profiles_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    tracked_account_id = Column(Integer, ForeignKey("tracked_accounts.id"), nullable=True, index=True)
     platform = Column(String)  # twitter, instagram
     username = Column(String)
     current_follower_count = Column(Integer, default=0)
+    # Lowest pending alert threshold above the current count and highest one at or
+    # below it; a check only needs alert work when the new count leaves that band
+    next_alert_threshold = Column(Integer, nullable=True)
+    prev_alert_threshold = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="profiles")
+    tracked_account = relationship("TrackedAccount", back_populates="profiles")
     follower_history = relationship("FollowerHistory", back_populates="profile")
     alerts = relationship("Alert", back_populates="profile")
 
 
 class FollowerHistory(Base):
     __tablename__ = "follower_history"
+    __table_args__ = (
+        # Insights and history range reads: one profile, ordered by time
+        Index("ix_follower_history_profile_id_recorded_at", "profile_id", "recorded_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     profile_id = Column(Integer, ForeignKey("profiles.id"))
     follower_count = Column(Integer)
     recorded_at = Column(DateTime, default=datetime.utcnow)
+    # With change-only recording, the last check that still saw this count;
+    # the count holds from recorded_at until the profile's next sample
+    confirmed_at = Column(DateTime, nullable=True)
 
     profile = relationship("Profile", back_populates="follower_history")
 
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Keyset-paginated listing, unfiltered and by status
+        Index("ix_alerts_user_id_id", "user_id", "id"),
+        Index("ix_alerts_user_id_is_active_triggered_id", "user_id", "is_active", "triggered", "id"),
+        # Pending alerts only: crossing checks and threshold band refreshes
+        Index(
+            "ix_alerts_pending_profile_id_threshold", "profile_id", "threshold",
+            postgresql_where=text("is_active AND NOT triggered"),
+            sqlite_where=text("is_active AND NOT triggered")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, PrimaryKeyConstraint
+from datetime import datetime
+from app.db.database import Base
+
+
+class FollowerHistoryRollupMixin:
+    """Aggregated follower samples for one profile over one time bucket"""
+
+    # (profile_id, bucket_start) so range reads for one profile walk the primary key
+    __table_args__ = (PrimaryKeyConstraint("profile_id", "bucket_start"),)
+
+    profile_id = Column(Integer, ForeignKey("profiles.id"))
+    bucket_start = Column(DateTime)
+    min_count = Column(Integer, nullable=False)
+    max_count = Column(Integer, nullable=False)
+    first_count = Column(Integer, nullable=False)
+    last_count = Column(Integer, nullable=False)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+
+
+class FollowerHistoryHourly(FollowerHistoryRollupMixin, Base):
+    __tablename__ = "follower_history_hourly"
+
+
+class FollowerHistoryDaily(FollowerHistoryRollupMixin, Base):
+    __tablename__ = "follower_history_daily"
+
+
+class RollupWatermark(Base):
+    """Highest raw follower_history id already folded into the rollups"""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
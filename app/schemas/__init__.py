@@ -2,12 +2,16 @@ from app.schemas.user import User, UserCreate, UserUpdate, Token, TokenData
 from app.schemas.profile import (
     Profile, ProfileCreate, ProfileUpdate,
     Alert, AlertCreate, AlertUpdate,
-    FollowerHistory, ProfileWithInsights
+    FollowerHistory, ProfileWithInsights,
+    HistoryPoint, FollowerHistoryRange, FollowerSample, ProfileCurrent,
+    ProfileImport, BulkProfileImport, BulkAlertImport, ImportItemResult, BulkImportResult
 )
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "Token", "TokenData",
     "Profile", "ProfileCreate", "ProfileUpdate",
     "Alert", "AlertCreate", "AlertUpdate",
-    "FollowerHistory", "ProfileWithInsights"
+    "FollowerHistory", "ProfileWithInsights",
+    "HistoryPoint", "FollowerHistoryRange", "FollowerSample", "ProfileCurrent",
+    "ProfileImport", "BulkProfileImport", "BulkAlertImport", "ImportItemResult", "BulkImportResult"
 ]
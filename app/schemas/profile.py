@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
+from app.core.config import settings
 
 
 class ProfileBase(BaseModel):
@@ -35,10 +36,28 @@ class FollowerHistory(FollowerHistoryBase):
     id: int
     profile_id: int
     recorded_at: datetime
+    confirmed_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
 
+class HistoryPoint(BaseModel):
+    bucket_start: datetime
+    min_count: int
+    max_count: int
+    first_count: int
+    last_count: int
+    sample_count: int
+
+
+class FollowerHistoryRange(BaseModel):
+    profile_id: int
+    resolution: str  # raw, hourly, daily
+    start: datetime
+    end: datetime
+    points: List[HistoryPoint]
+
+
 class AlertBase(BaseModel):
     profile_id: int
     threshold: int
@@ -64,6 +83,44 @@ class Alert(AlertBase):
     model_config = {"from_attributes": True}
 
 
+class FollowerSample(BaseModel):
+    follower_count: int
+    recorded_at: datetime
+
+
+class ProfileCurrent(BaseModel):
+    profile_id: int
+    follower_count: int
+    checked_at: Optional[datetime]
+    recent_samples: List[FollowerSample]
+
+
 class ProfileWithInsights(Profile):
     follower_change_24h: int
     recent_history: List[FollowerHistory]
+
+
+class ProfileImport(ProfileBase):
+    alert_thresholds: List[int] = []
+
+
+class BulkProfileImport(BaseModel):
+    profiles: List[ProfileImport] = Field(..., max_length=settings.BULK_IMPORT_MAX_ITEMS)
+
+
+class BulkAlertImport(BaseModel):
+    alerts: List[AlertCreate] = Field(..., max_length=settings.BULK_IMPORT_MAX_ITEMS)
+
+
+class ImportItemResult(BaseModel):
+    index: int
+    status: str  # created, exists, duplicate, not_found
+    profile_id: Optional[int] = None
+    alert_ids: List[int] = []
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    skipped: int
+    alerts_created: int
+    items: List[ImportItemResult]
@@ -9,6 +9,7 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     password: str
+    telegram_chat_id: Optional[str] = None
 
 
 class UserUpdate(UserBase):
@@ -17,6 +18,7 @@ class UserUpdate(UserBase):
 
 class User(UserBase):
     id: int
+    telegram_chat_id: Optional[str] = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from app.services.check_cycles import record_cycle_progress
+from app.services.follower_checks import (
+    apply_account_counts, group_by_platform, lease_accounts, reschedule_failed_accounts, resolve_lookup
+)
+from app.core.metrics import FOLLOWER_FETCH_SECONDS, CHECK_DB_SECONDS
+from app.services.social_api import (
+    AsyncSocialMediaAPI, BatchLookupResult, record_lookup_outcomes, split_batches
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_follower_counts(
+        api: AsyncSocialMediaAPI,
+        accounts: Sequence,
+        concurrency_per_platform: int
+) -> Tuple[Dict[int, int], Dict[int, str]]:
+    """Look up all accounts with concurrent batch requests.
+
+    Accounts are grouped by platform and split into the platform's maximum
+    batch size; at most `concurrency_per_platform` requests are in flight per
+    platform. Returns (counts, errors), both keyed by account id.
+    """
+    semaphores = defaultdict(lambda: asyncio.Semaphore(concurrency_per_platform))
+
+    async def fetch(platform, batch):
+        result = BatchLookupResult()
+        async with semaphores[platform]:
+            try:
+                with FOLLOWER_FETCH_SECONDS.labels(platform).time():
+                    batch_result = await api.lookup_batch(platform, batch)
+                result.merge(batch_result, batch)
+            except Exception as e:
+                result.errors.update({username: str(e) for username in batch})
+        record_lookup_outcomes(platform, result)
+        return platform, result
+
+    grouped = group_by_platform(accounts)
+    results = await asyncio.gather(*(
+        fetch(platform, batch)
+        for platform, ids_by_username in grouped.items()
+        for batch in split_batches(platform, list(ids_by_username))
+    ))
+
+    counts, errors = {}, {}
+    for platform, result in results:
+        resolve_lookup(grouped[platform], result, counts, errors)
+    return counts, errors
+
+
+def run_check_cycle(
+        db: Session,
+        api: AsyncSocialMediaAPI,
+        account_ids: Sequence[int],
+        batch_size: int,
+        concurrency_per_platform: int,
+        cycle_id: Optional[int] = None
+) -> Dict[str, int]:
+    """Check the given tracked accounts from one process.
+
+    Accounts are handled in windows of `batch_size`: each window's accounts are
+    leased, their lookups run concurrently on one event loop, then the results
+    are written in bulk and committed before the next window starts. Accounts
+    another check holds are skipped.
+    """
+    stats = {"accounts": len(account_ids), "fetched": 0, "failed": 0, "skipped": 0, "alerts_triggered": 0}
+
+    async def run():
+        for start in range(0, len(account_ids), batch_size):
+            window = account_ids[start:start + batch_size]
+            accounts = lease_accounts(db, window)
+            db.commit()
+            stats["skipped"] += len(window) - len(accounts)
+            counts, errors = await fetch_follower_counts(api, accounts, concurrency_per_platform)
+
+            with CHECK_DB_SECONDS.labels("check_accounts_async").time():
+                stats["alerts_triggered"] += apply_account_counts(db, accounts, counts)
+                reschedule_failed_accounts(db, list(errors))
+                record_cycle_progress(db, cycle_id, len(counts), len(errors), datetime.utcnow())
+                db.commit()
+
+            stats["fetched"] += len(counts)
+            stats["failed"] += len(errors)
+            for account_id, error in errors.items():
+                logger.warning(f"Follower lookup failed for account {account_id}: {error}")
+
+    asyncio.run(run())
+    return stats
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import TrackedAccount, Profile, Alert
+from app.models.alert_thresholds import refresh_alert_thresholds
+from app.schemas import ProfileImport, AlertCreate, ImportItemResult, BulkImportResult
+
+UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+
+def _tracked_account_ids(db: Session, keys: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """Ids of the shared accounts for (platform, username) pairs, creating missing ones in one statement"""
+    if not keys:
+        return {}
+
+    def lookup():
+        return {
+            (row.platform, row.username): row.id
+            for row in db.execute(
+                select(TrackedAccount.id, TrackedAccount.platform, TrackedAccount.username)
+                .where(tuple_(TrackedAccount.platform, TrackedAccount.username).in_(keys))
+            )
+        }
+
+    ids = lookup()
+    missing = [{"platform": platform, "username": username} for platform, username in keys if (platform, username) not in ids]
+    if missing:
+        dialect = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+        # Tolerate accounts created concurrently by another import or a single create
+        stmt = (
+            dialect.insert(TrackedAccount).on_conflict_do_nothing(index_elements=["platform", "username"])
+            if dialect else insert(TrackedAccount)
+        )
+        db.execute(stmt, missing)
+        ids = lookup()
+    return ids
+
+
+def _insert_alerts(db: Session, user_id: int, thresholds_by_profile: Dict[int, List[int]]) -> Dict[int, List[int]]:
+    """Multi-row insert of alerts; returns new alert ids by profile and refreshes the profiles' threshold bands"""
+    rows = [
+        {"user_id": user_id, "profile_id": profile_id, "threshold": threshold}
+        for profile_id, thresholds in thresholds_by_profile.items()
+        for threshold in thresholds
+    ]
+    if not rows:
+        return {}
+
+    created = defaultdict(list)
+    for row in db.execute(insert(Alert).returning(Alert.id, Alert.profile_id, sort_by_parameter_order=True), rows):
+        created[row.profile_id].append(row.id)
+    refresh_alert_thresholds(db, list(created))
+    return created
+
+
+def import_profiles(db: Session, user_id: int, items: Sequence[ProfileImport]) -> BulkImportResult:
+    """Create many profiles, and their alert thresholds, with set-based statements.
+
+    Duplicates (within the request or already tracked by the user) are found
+    with one query; new tracked accounts, profiles and alerts are each
+    written with a single multi-row insert. Existing profiles still get any
+    thresholds they don't have an active alert for. Does not commit.
+    """
+    results: List[ImportItemResult] = []
+    first_index: Dict[Tuple[str, str], int] = {}
+    for index, item in enumerate(items):
+        key = (item.platform, item.username)
+        if key in first_index:
+            results.append(ImportItemResult(index=index, status="duplicate"))
+        else:
+            first_index[key] = index
+            results.append(ImportItemResult(index=index, status="created"))
+
+    keys = list(first_index)
+    profile_ids = {
+        (row.platform, row.username): row.id
+        for row in db.execute(
+            select(Profile.id, Profile.platform, Profile.username)
+            .where(Profile.user_id == user_id, tuple_(Profile.platform, Profile.username).in_(keys))
+        )
+    } if keys else {}
+    for key in profile_ids:
+        results[first_index[key]].status = "exists"
+
+    new_keys = [key for key in keys if key not in profile_ids]
+    if new_keys:
+        account_ids = _tracked_account_ids(db, new_keys)
+        inserted = db.execute(
+            insert(Profile).returning(Profile.id, Profile.platform, Profile.username, sort_by_parameter_order=True),
+            [
+                {"user_id": user_id, "tracked_account_id": account_ids[key], "platform": key[0], "username": key[1]}
+                for key in new_keys
+            ]
+        )
+        profile_ids.update({(row.platform, row.username): row.id for row in inserted})
+
+    existing_thresholds = defaultdict(set)
+    existing_ids = [profile_ids[key] for key in keys if results[first_index[key]].status == "exists"]
+    if existing_ids:
+        for row in db.execute(
+            select(Alert.profile_id, Alert.threshold)
+            .where(Alert.profile_id.in_(existing_ids), Alert.is_active == True)
+        ):
+            existing_thresholds[row.profile_id].add(row.threshold)
+
+    thresholds_by_profile = {}
+    for key, index in first_index.items():
+        profile_id = profile_ids[key]
+        results[index].profile_id = profile_id
+        thresholds = [t for t in dict.fromkeys(items[index].alert_thresholds) if t not in existing_thresholds[profile_id]]
+        if thresholds:
+            thresholds_by_profile[profile_id] = thresholds
+
+    alert_ids = _insert_alerts(db, user_id, thresholds_by_profile)
+    for key, index in first_index.items():
+        results[index].alert_ids = alert_ids.get(profile_ids[key], [])
+
+    created = sum(1 for r in results if r.status == "created")
+    return BulkImportResult(
+        created=created,
+        skipped=len(results) - created,
+        alerts_created=sum(len(ids) for ids in alert_ids.values()),
+        items=results
+    )
+
+
+def import_alerts(db: Session, user_id: int, items: Sequence[AlertCreate]) -> BulkImportResult:
+    """Create many alerts on the user's profiles: one ownership query, one duplicate query, one insert. Does not commit."""
+    profile_ids = {item.profile_id for item in items}
+    owned = set(db.scalars(
+        select(Profile.id).where(Profile.user_id == user_id, Profile.id.in_(profile_ids))
+    )) if profile_ids else set()
+    existing = {
+        (row.profile_id, row.threshold)
+        for row in db.execute(
+            select(Alert.profile_id, Alert.threshold)
+            .where(Alert.user_id == user_id, Alert.profile_id.in_(owned), Alert.is_active == True)
+        )
+    } if owned else set()
+
+    results: List[ImportItemResult] = []
+    seen = set()
+    thresholds_by_profile = defaultdict(list)
+    indexes_by_profile = defaultdict(list)
+    for index, item in enumerate(items):
+        key = (item.profile_id, item.threshold)
+        if item.profile_id not in owned:
+            status = "not_found"
+        elif key in existing:
+            status = "exists"
+        elif key in seen:
+            status = "duplicate"
+        else:
+            status = "created"
+            seen.add(key)
+            thresholds_by_profile[item.profile_id].append(item.threshold)
+            indexes_by_profile[item.profile_id].append(index)
+        results.append(ImportItemResult(index=index, status=status, profile_id=item.profile_id))
+
+    alert_ids = _insert_alerts(db, user_id, thresholds_by_profile)
+    # Alerts come back per profile in insertion order, which is request order
+    for profile_id, ids in alert_ids.items():
+        for index, alert_id in zip(indexes_by_profile[profile_id], ids):
+            results[index].alert_ids = [alert_id]
+
+    created = len(seen)
+    return BulkImportResult(
+        created=created,
+        skipped=len(results) - created,
+        alerts_created=created,
+        items=results
+    )
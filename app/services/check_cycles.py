@@ -0,0 +1,84 @@
+"""Check cycles: one row per run of check_all_profiles, so runs never overlap and a crashed one resumes.
+
+A cycle claims due accounts page by page, moving each one's next_check_at to
+the cycle's claimed_until, and advances its cursor past a page once the
+page's checks are published. It stays running until none of its accounts is
+still at claimed_until, i.e. every claimed account was checked or
+rescheduled; dispatches in the meantime skip. A cycle that has made no
+progress for CHECK_CYCLE_STALE_SECONDS is resumed by the next dispatch:
+claiming restarts after the cursor, or from the start once every page had
+been published, and claimed accounts never checked are sent again.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, update, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import CheckCycle, TrackedAccount
+from app.models.check_cycle import RUNNING, FINISHED
+
+
+def running_cycle(db: Session) -> Optional[CheckCycle]:
+    return db.scalars(select(CheckCycle).where(CheckCycle.status == RUNNING)).first()
+
+
+def begin_cycle(db: Session, now: datetime) -> Optional[CheckCycle]:
+    """Start a cycle, or return None if another dispatch started one first. Does not commit."""
+    cycle = CheckCycle(
+        status=RUNNING,
+        started_at=now,
+        heartbeat_at=now,
+        claimed_until=now + timedelta(seconds=settings.CHECK_MAX_INTERVAL_SECONDS)
+    )
+    try:
+        with db.begin_nested():
+            db.add(cycle)
+    except IntegrityError:
+        return None
+    return cycle
+
+
+def is_stale(cycle: CheckCycle, now: datetime) -> bool:
+    return cycle.heartbeat_at < now - timedelta(seconds=settings.CHECK_CYCLE_STALE_SECONDS)
+
+
+def has_unchecked_accounts(db: Session, cycle: CheckCycle) -> bool:
+    """Whether any account the cycle claimed is still waiting for its check"""
+    return db.scalar(select(exists().where(
+        TrackedAccount.next_check_at == cycle.claimed_until,
+        TrackedAccount.profiles.any()
+    )))
+
+
+def resume_cycle(cycle: CheckCycle, now: datetime):
+    """Pick a stalled cycle back up: from its cursor, or from the start once it had published every page"""
+    if cycle.dispatched_at is not None:
+        cycle.cursor = 0
+        cycle.dispatched_at = None
+    cycle.resumes += 1
+    cycle.heartbeat_at = now
+
+
+def finish_cycle(cycle: CheckCycle, now: datetime):
+    cycle.status = FINISHED
+    cycle.finished_at = now
+
+
+def record_cycle_progress(db: Session, cycle_id: Optional[int], checked: int, failed: int, now: datetime):
+    """Count a finished chunk towards its cycle; a no-op for checks outside a cycle. Does not commit.
+
+    Every chunk of a cycle updates the same row, so run this last before committing.
+    """
+    if cycle_id is None:
+        return
+    db.execute(
+        update(CheckCycle)
+        .where(CheckCycle.id == cycle_id)
+        .values(
+            accounts_checked=CheckCycle.accounts_checked + checked,
+            accounts_failed=CheckCycle.accounts_failed + failed,
+            heartbeat_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,264 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, insert, update, func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import TrackedAccount, Profile, FollowerHistory, Alert, NotificationOutbox
+from app.models.alert_thresholds import needs_alert_work, refresh_alert_thresholds
+from app.core.hot_state import HotProfileState
+from app.core.metrics import PROFILES_CHECKED, HISTORY_SAMPLES, ALERTS_EVALUATED, ALERTS_TRIGGERED
+from app.services.history import confirm_latest_samples
+from app.services.history_blocks import append_samples
+from app.services.hot_state import record_hot_state_on_commit
+from app.services.insights import invalidate_insights_on_commit
+from app.services.scheduling import update_change_rate, next_check_at
+from app.services.social_api import SocialMediaAPI, BatchLookupResult
+from app.services.versions import bump_collection_versions
+
+logger = logging.getLogger(__name__)
+
+
+def milestone_message(username: str, platform: str, threshold: int) -> str:
+    return f"🎉 Milestone reached! @{username} on {platform} has reached {threshold} followers!"
+
+
+def lease_accounts(db: Session, account_ids: Sequence[int], now: Optional[datetime] = None) -> List:
+    """Take the check lease on the accounts of a chunk that no other check holds, and load them.
+
+    One UPDATE ... RETURNING; accounts leased by a check still in flight are
+    left out. Commit before fetching so other workers see the lease; writing
+    the account's new count (or rescheduling a failed lookup) releases it,
+    and an abandoned lease lapses after CHECK_LEASE_SECONDS.
+    """
+    if not account_ids:
+        return []
+    now = now or datetime.utcnow()
+    return db.execute(
+        update(TrackedAccount)
+        .where(
+            TrackedAccount.id.in_(account_ids),
+            or_(TrackedAccount.lease_expires_at.is_(None), TrackedAccount.lease_expires_at <= now)
+        )
+        .values(lease_expires_at=now + timedelta(seconds=settings.CHECK_LEASE_SECONDS))
+        .returning(
+            TrackedAccount.id,
+            TrackedAccount.platform,
+            TrackedAccount.username,
+            TrackedAccount.follower_count,
+            TrackedAccount.last_checked_at,
+            TrackedAccount.follower_change_rate
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def group_by_platform(accounts: Sequence) -> Dict[str, Dict[str, int]]:
+    """Map platform -> {username: account id}"""
+    grouped = defaultdict(dict)
+    for account in accounts:
+        grouped[account.platform][account.username] = account.id
+    return grouped
+
+
+def resolve_lookup(
+        ids_by_username: Dict[str, int],
+        result: BatchLookupResult,
+        counts: Dict[int, int],
+        errors: Dict[int, str]
+):
+    """Re-key a platform's batch result from usernames to account ids"""
+    for username, count in result.counts.items():
+        counts[ids_by_username[username]] = count
+    for username, error in result.errors.items():
+        errors[ids_by_username[username]] = error
+
+
+def fetch_account_counts(api: SocialMediaAPI, accounts: Sequence) -> Tuple[Dict[int, int], Dict[int, str]]:
+    """Look up a chunk of accounts with one batch call per platform.
+
+    Returns (counts, errors), both keyed by account id.
+    """
+    counts, errors = {}, {}
+    for platform, ids_by_username in group_by_platform(accounts).items():
+        result = api.get_follower_counts(platform, list(ids_by_username))
+        resolve_lookup(ids_by_username, result, counts, errors)
+    return counts, errors
+
+
+def load_profile_states(db: Session, account_ids: Sequence[int]) -> List:
+    """Load the columns a check needs for every profile of a chunk of accounts in one query"""
+    return db.execute(
+        select(
+            Profile.id,
+            Profile.user_id,
+            Profile.tracked_account_id,
+            Profile.platform,
+            Profile.username,
+            Profile.current_follower_count,
+            Profile.next_alert_threshold,
+            Profile.prev_alert_threshold
+        ).where(Profile.tracked_account_id.in_(account_ids))
+    ).all()
+
+
+def apply_account_counts(
+        db: Session,
+        accounts: Sequence,
+        account_counts: Dict[int, int],
+        checked_at: Optional[datetime] = None
+) -> int:
+    """Store fetched counts on tracked accounts and fan them out to every user's profile.
+
+    `accounts` are rows from `lease_accounts`. Each account's
+    change rate and next check time are updated from the new sample and the
+    nearest pending alert threshold across its profiles, and its check lease is
+    released. Does not commit. Returns the number of alerts triggered.
+    """
+    checked_at = checked_at or datetime.utcnow()
+    accounts = [a for a in accounts if a.id in account_counts]
+    if not accounts:
+        return 0
+
+    account_ids = [a.id for a in accounts]
+    profiles = load_profile_states(db, account_ids)
+    counts = {p.id: account_counts[p.tracked_account_id] for p in profiles}
+    triggered = apply_follower_counts(db, profiles, counts, checked_at)
+
+    nearest_thresholds = dict(db.execute(
+        select(Profile.tracked_account_id, func.min(Profile.next_alert_threshold))
+        .where(Profile.tracked_account_id.in_(account_ids))
+        .group_by(Profile.tracked_account_id)
+    ).all())
+
+    updates = []
+    for account in accounts:
+        count = account_counts[account.id]
+        rate = update_change_rate(
+            account.follower_change_rate,
+            account.follower_count,
+            count,
+            account.last_checked_at,
+            checked_at
+        )
+        threshold = nearest_thresholds.get(account.id)
+        updates.append({
+            "id": account.id,
+            "follower_count": count,
+            "last_checked_at": checked_at,
+            "follower_change_rate": rate,
+            "next_check_at": next_check_at(checked_at, rate, threshold - count if threshold is not None else None),
+            "lease_expires_at": None
+        })
+    db.execute(update(TrackedAccount), updates)
+
+    return triggered
+
+
+def reschedule_failed_accounts(db: Session, account_ids: Sequence[int], checked_at: Optional[datetime] = None):
+    """Retry accounts whose lookup failed after the minimum check interval, releasing their leases"""
+    if not account_ids:
+        return
+    checked_at = checked_at or datetime.utcnow()
+    db.execute(
+        update(TrackedAccount)
+        .where(TrackedAccount.id.in_(account_ids))
+        .values(next_check_at=next_check_at(checked_at, None, None), lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_follower_counts(
+        db: Session,
+        profiles: Sequence,
+        counts: Dict[int, int],
+        checked_at: Optional[datetime] = None
+) -> int:
+    """Write new follower counts for a chunk of profiles using set-based statements.
+
+    `profiles` are rows from `load_profile_states` (the old counts), `counts` maps
+    profile id to the freshly fetched count. History rows are written according
+    to HISTORY_RECORDING. Does not commit. Returns the number
+    of alerts triggered.
+    """
+    checked_at = checked_at or datetime.utcnow()
+    rows = [p for p in profiles if p.id in counts]
+    if not rows:
+        return 0
+
+    changed = rows
+    if settings.HISTORY_RECORDING == "changes":
+        # An unchanged count extends the latest sample instead of adding a row;
+        # profiles without a sample yet (e.g. after pruning) still get one
+        confirmed = set(confirm_latest_samples(
+            db, [p.id for p in rows if counts[p.id] == p.current_follower_count], checked_at
+        ))
+        changed = [p for p in rows if p.id not in confirmed]
+    if changed:
+        db.execute(insert(FollowerHistory), [
+            {"profile_id": p.id, "follower_count": counts[p.id], "recorded_at": checked_at}
+            for p in changed
+        ])
+        if settings.HISTORY_BLOCKS_ENABLED:
+            append_samples(db, {p.id: counts[p.id] for p in changed}, checked_at)
+    db.execute(update(Profile), [
+        {"id": p.id, "current_follower_count": counts[p.id], "updated_at": checked_at}
+        for p in rows
+    ])
+    invalidate_insights_on_commit(db, [p.id for p in rows])
+    changed_ids = {p.id for p in changed}
+    record_hot_state_on_commit(db, [
+        HotProfileState(
+            p.id, p.user_id, counts[p.id], checked_at,
+            [(checked_at, counts[p.id])] if p.id in changed_ids else []
+        )
+        for p in rows
+    ])
+    PROFILES_CHECKED.inc(len(rows))
+    HISTORY_SAMPLES.labels("inserted").inc(len(changed))
+    HISTORY_SAMPLES.labels("confirmed").inc(len(rows) - len(changed))
+
+    # Only profiles whose new count leaves their pending-threshold band need alert work
+    old_counts = {p.id: p.current_follower_count or 0 for p in rows}
+    crossing = [p for p in rows if p.next_alert_threshold is not None and counts[p.id] >= p.next_alert_threshold]
+    stale = [p.id for p in rows if needs_alert_work(counts[p.id], p.next_alert_threshold, p.prev_alert_threshold)]
+    if not stale:
+        return 0
+
+    alerts = []
+    if crossing:
+        alerts = db.execute(
+            select(Alert.id, Alert.user_id, Alert.profile_id, Alert.threshold).where(
+                Alert.profile_id.in_([p.id for p in crossing]),
+                Alert.is_active == True,
+                Alert.triggered == False,
+                Alert.threshold > min(old_counts[p.id] for p in crossing),
+                Alert.threshold <= max(counts[p.id] for p in crossing)
+            )
+        ).all()
+
+    by_id = {p.id: p for p in rows}
+    triggered = [
+        a for a in alerts
+        if old_counts[a.profile_id] < a.threshold <= counts[a.profile_id]
+    ]
+    ALERTS_EVALUATED.inc(len(alerts))
+    ALERTS_TRIGGERED.inc(len(triggered))
+    if triggered:
+        db.execute(update(Alert), [
+            {"id": a.id, "triggered": True, "triggered_at": checked_at}
+            for a in triggered
+        ])
+        # Notifications go out through the outbox, committed together with the trigger
+        outbox = []
+        for a in triggered:
+            profile = by_id[a.profile_id]
+            message = milestone_message(profile.username, profile.platform, a.threshold)
+            logger.info(f"Alert triggered for profile {profile.username}: {message}")
+            outbox.append({"user_id": a.user_id, "alert_id": a.id, "message": message, "next_attempt_at": checked_at})
+        db.execute(insert(NotificationOutbox), outbox)
+        db.execute(bump_collection_versions([a.user_id for a in triggered], alerts=True))
+
+    refresh_alert_thresholds(db, stale)
+    return len(triggered)
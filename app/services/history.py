@@ -0,0 +1,400 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.orm import Session, aliased
+from app.core.config import settings
+from app.db.partitions import add_months, drop_partitions_before, ensure_partitions, is_partitioned, month_start
+from app.models import FollowerHistory, FollowerHistoryHourly, FollowerHistoryDaily, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "follower_history"
+
+
+def truncate_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def truncate_day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+ROLLUPS: List[Tuple[type, Callable[[datetime], datetime]]] = [
+    (FollowerHistoryHourly, truncate_hour),
+    (FollowerHistoryDaily, truncate_day),
+]
+
+
+def confirm_latest_samples(db: Session, profile_ids: Sequence[int], checked_at: datetime) -> List[int]:
+    """Mark each profile's newest sample as still current at `checked_at`.
+
+    One UPDATE ... RETURNING; returns the profiles that had a sample, so the
+    caller can insert one for the others.
+    """
+    if not profile_ids:
+        return []
+    newer = aliased(FollowerHistory)
+    newest = (
+        select(func.max(newer.recorded_at))
+        .where(newer.profile_id == FollowerHistory.profile_id)
+        .scalar_subquery()
+    )
+    return list(db.scalars(
+        update(FollowerHistory)
+        .where(FollowerHistory.profile_id.in_(profile_ids), FollowerHistory.recorded_at == newest)
+        .values(confirmed_at=checked_at)
+        .returning(FollowerHistory.profile_id)
+        .execution_options(synchronize_session=False)
+    ))
+
+
+def compact_follower_history(db: Session) -> Dict[str, int]:
+    """Collapse runs of equal consecutive samples into the run's first row.
+
+    One-off cleanup for history written before change-only recording: each
+    run keeps its first row, whose confirmed_at becomes the run's last
+    recorded_at, and the rest are deleted. Works through profiles in id order,
+    HISTORY_COMPACT_PROFILES_PER_BATCH at a time, committing each batch.
+    """
+    stats = {"profiles": 0, "deleted": 0}
+    last_profile_id = 0
+    while True:
+        profile_ids = db.scalars(
+            select(FollowerHistory.profile_id)
+            .where(FollowerHistory.profile_id > last_profile_id)
+            .group_by(FollowerHistory.profile_id)
+            .order_by(FollowerHistory.profile_id)
+            .limit(settings.HISTORY_COMPACT_PROFILES_PER_BATCH)
+        ).all()
+        if not profile_ids:
+            break
+
+        rows = db.execute(
+            select(
+                FollowerHistory.id,
+                FollowerHistory.profile_id,
+                FollowerHistory.follower_count,
+                FollowerHistory.recorded_at,
+                FollowerHistory.confirmed_at
+            )
+            .where(FollowerHistory.profile_id.in_(profile_ids))
+            .order_by(FollowerHistory.profile_id, FollowerHistory.recorded_at, FollowerHistory.id)
+        ).all()
+
+        duplicate_ids, confirmed = [], {}
+        head = None
+        for row in rows:
+            if head is not None and row.profile_id == head.profile_id and row.follower_count == head.follower_count:
+                duplicate_ids.append(row.id)
+                seen_at = row.confirmed_at or row.recorded_at
+                confirmed[head.id] = max(confirmed.get(head.id, seen_at), seen_at)
+            else:
+                head = row
+
+        if confirmed:
+            db.execute(update(FollowerHistory), [
+                {"id": head_id, "confirmed_at": confirmed_at} for head_id, confirmed_at in confirmed.items()
+            ])
+        for start in range(0, len(duplicate_ids), settings.HISTORY_PRUNE_BATCH_SIZE):
+            db.execute(delete(FollowerHistory).where(
+                FollowerHistory.id.in_(duplicate_ids[start:start + settings.HISTORY_PRUNE_BATCH_SIZE])
+            ))
+        db.commit()
+
+        stats["profiles"] += len(profile_ids)
+        stats["deleted"] += len(duplicate_ids)
+        last_profile_id = profile_ids[-1]
+    return stats
+
+
+def _aggregate(rows, truncate) -> Dict[Tuple[int, datetime], dict]:
+    buckets = {}
+    for row in rows:
+        key = (row.profile_id, truncate(row.recorded_at))
+        sample = {
+            "profile_id": key[0],
+            "bucket_start": key[1],
+            "min_count": row.follower_count,
+            "max_count": row.follower_count,
+            "first_count": row.follower_count,
+            "last_count": row.follower_count,
+            "first_at": row.recorded_at,
+            "last_at": row.recorded_at,
+            "sample_count": 1,
+        }
+        buckets[key] = _merge(buckets[key], sample) if key in buckets else sample
+    return buckets
+
+
+def _merge(a: dict, b: dict) -> dict:
+    merged = dict(a)
+    merged["min_count"] = min(a["min_count"], b["min_count"])
+    merged["max_count"] = max(a["max_count"], b["max_count"])
+    if b["first_at"] < a["first_at"]:
+        merged["first_count"], merged["first_at"] = b["first_count"], b["first_at"]
+    if b["last_at"] >= a["last_at"]:
+        merged["last_count"], merged["last_at"] = b["last_count"], b["last_at"]
+    merged["sample_count"] = a["sample_count"] + b["sample_count"]
+    return merged
+
+
+def _fold_into(db: Session, model, buckets: Dict[Tuple[int, datetime], dict]):
+    """Merge new bucket aggregates into a rollup table with one read and at most two bulk writes"""
+    profile_ids = {key[0] for key in buckets}
+    starts = [key[1] for key in buckets]
+    columns = [c for c in model.__table__.c]
+    existing = {
+        (row.profile_id, row.bucket_start): row._asdict()
+        for row in db.execute(
+            select(*columns).where(
+                model.profile_id.in_(profile_ids),
+                model.bucket_start.between(min(starts), max(starts))
+            )
+        )
+    }
+
+    inserts, updates = [], []
+    for key, bucket in buckets.items():
+        if key in existing:
+            updates.append(_merge(existing[key], bucket))
+        else:
+            inserts.append(bucket)
+    if inserts:
+        db.execute(insert(model), inserts)
+    if updates:
+        db.execute(update(model), updates)
+
+
+def _watermark(db: Session) -> RollupWatermark:
+    watermark = db.get(RollupWatermark, WATERMARK_NAME)
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK_NAME, last_id=0)
+        db.add(watermark)
+        db.flush()
+    return watermark
+
+
+def rollup_follower_history(db: Session, now: Optional[datetime] = None) -> int:
+    """Fold raw rows added since the watermark into the hourly and daily rollups.
+
+    Works in id order in batches of ROLLUP_BATCH_SIZE, committing the rollups
+    and the advanced watermark together. Rows younger than ROLLUP_LAG_SECONDS
+    are left for the next run so transactions still in flight are not skipped.
+    Returns the number of raw rows processed.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    watermark = _watermark(db)
+    processed = 0
+
+    for _ in range(settings.ROLLUP_MAX_BATCHES):
+        rows = db.execute(
+            select(
+                FollowerHistory.id,
+                FollowerHistory.profile_id,
+                FollowerHistory.follower_count,
+                FollowerHistory.recorded_at
+            )
+            .where(FollowerHistory.id > watermark.last_id, FollowerHistory.profile_id.is_not(None))
+            .order_by(FollowerHistory.id)
+            .limit(settings.ROLLUP_BATCH_SIZE)
+        ).all()
+
+        settled = []
+        for row in rows:
+            if row.recorded_at >= cutoff:
+                break
+            settled.append(row)
+        if not settled:
+            break
+
+        for model, truncate in ROLLUPS:
+            _fold_into(db, model, _aggregate(settled, truncate))
+        watermark.last_id = settled[-1].id
+        db.commit()
+        processed += len(settled)
+
+        if len(settled) < settings.ROLLUP_BATCH_SIZE:
+            break
+
+    return processed
+
+
+def prune_follower_history(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Delete raw and hourly history past their retention windows in bounded batches.
+
+    Raw rows are only deleted once the rollups have absorbed them. With
+    change-only recording a row stays current until the profile's next
+    sample, so a row is only past retention once it has been superseded and
+    was last confirmed before the cutoff; each profile's newest row is kept.
+    When follower_history is partitioned, raw retention is left to
+    `maintain_history_partitions`, which drops whole months instead. Rows
+    orphaned by profile deletes, which the rollups skip, are deleted
+    whatever their age.
+    """
+    now = now or datetime.utcnow()
+    watermark = _watermark(db)
+    deleted = {"raw": 0, "hourly": 0, "orphaned": 0}
+
+    for _ in range(settings.HISTORY_PRUNE_MAX_BATCHES):
+        ids = db.scalars(
+            select(FollowerHistory.id)
+            .where(FollowerHistory.profile_id.is_(None))
+            .limit(settings.HISTORY_PRUNE_BATCH_SIZE)
+        ).all()
+        if not ids:
+            break
+        db.execute(delete(FollowerHistory).where(FollowerHistory.id.in_(ids)))
+        db.commit()
+        deleted["orphaned"] += len(ids)
+
+    raw_cutoff = now - timedelta(days=settings.HISTORY_RAW_RETENTION_DAYS)
+    newer = aliased(FollowerHistory)
+    superseded = (
+        select(newer.id)
+        .where(newer.profile_id == FollowerHistory.profile_id, newer.recorded_at > FollowerHistory.recorded_at)
+        .exists()
+    )
+    raw_batches = 0 if is_partitioned(db.connection()) else settings.HISTORY_PRUNE_MAX_BATCHES
+    for _ in range(raw_batches):
+        ids = db.scalars(
+            select(FollowerHistory.id)
+            .where(
+                func.coalesce(FollowerHistory.confirmed_at, FollowerHistory.recorded_at) < raw_cutoff,
+                FollowerHistory.id <= watermark.last_id,
+                superseded
+            )
+            .order_by(FollowerHistory.id)
+            .limit(settings.HISTORY_PRUNE_BATCH_SIZE)
+        ).all()
+        if not ids:
+            break
+        db.execute(delete(FollowerHistory).where(FollowerHistory.id.in_(ids)))
+        db.commit()
+        deleted["raw"] += len(ids)
+
+    # Hourly buckets are deleted a group of profiles at a time, about a day of buckets each
+    hourly_cutoff = now - timedelta(days=settings.HISTORY_HOURLY_RETENTION_DAYS)
+    profiles_per_batch = max(1, settings.HISTORY_PRUNE_BATCH_SIZE // 24)
+    for _ in range(settings.HISTORY_PRUNE_MAX_BATCHES):
+        profile_ids = db.scalars(
+            select(FollowerHistoryHourly.profile_id)
+            .where(FollowerHistoryHourly.bucket_start < hourly_cutoff)
+            .distinct()
+            .limit(profiles_per_batch)
+        ).all()
+        if not profile_ids:
+            break
+        result = db.execute(
+            delete(FollowerHistoryHourly).where(
+                FollowerHistoryHourly.profile_id.in_(profile_ids),
+                FollowerHistoryHourly.bucket_start < hourly_cutoff
+            )
+        )
+        db.commit()
+        deleted["hourly"] += result.rowcount
+
+    return deleted
+
+
+def maintain_history_partitions(db: Session, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+    """Create the upcoming monthly partitions and drop those past raw retention.
+
+    No-op unless follower_history is partitioned (see migration 0004).
+    """
+    now = now or datetime.utcnow()
+    conn = db.connection()
+    if not is_partitioned(conn):
+        return {"created": [], "dropped": []}
+
+    current = month_start(now.date())
+    created = ensure_partitions(conn, current, add_months(current, settings.HISTORY_PARTITION_PREMAKE_MONTHS))
+    cutoff = (now - timedelta(days=settings.HISTORY_RAW_RETENTION_DAYS)).date()
+    dropped = drop_partitions_before(conn, cutoff, _watermark(db).last_id)
+    db.commit()
+    return {"created": created, "dropped": dropped}
+
+
+def choose_resolution(start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+    """Pick the coarsest table that still gives a useful series for [start, end].
+
+    Short, recent ranges read raw samples; longer ones read hourly rollups and
+    anything beyond that, or older than the hourly retention, reads daily ones.
+    """
+    now = now or datetime.utcnow()
+    span = end - start
+    if (span <= timedelta(hours=settings.HISTORY_RAW_MAX_RANGE_HOURS)
+            and start >= now - timedelta(days=settings.HISTORY_RAW_RETENTION_DAYS)):
+        return "raw"
+    if (span <= timedelta(days=settings.HISTORY_HOURLY_MAX_RANGE_DAYS)
+            and start >= now - timedelta(days=settings.HISTORY_HOURLY_RETENTION_DAYS)):
+        return "hourly"
+    return "daily"
+
+
+def get_history_points(
+        db: Session,
+        profile_id: int,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None
+) -> Tuple[str, List[dict]]:
+    """Return (resolution, points) for a profile over [start, end], oldest first.
+
+    History is a step function: with change-only recording a count holds
+    until the next point. The last point before `start` is included so the
+    value at the start of the range is known even if nothing changed in it.
+    """
+    resolution = resolution or choose_resolution(start, end)
+
+    if resolution == "raw":
+        columns = (FollowerHistory.follower_count, FollowerHistory.recorded_at)
+        before = db.execute(
+            select(*columns)
+            .where(FollowerHistory.profile_id == profile_id, FollowerHistory.recorded_at < start)
+            .order_by(FollowerHistory.recorded_at.desc())
+            .limit(1)
+        ).all()
+        rows = before + db.execute(
+            select(*columns)
+            .where(
+                FollowerHistory.profile_id == profile_id,
+                FollowerHistory.recorded_at.between(start, end)
+            )
+            .order_by(FollowerHistory.recorded_at)
+        ).all()
+        return resolution, [
+            {
+                "bucket_start": row.recorded_at,
+                "min_count": row.follower_count,
+                "max_count": row.follower_count,
+                "first_count": row.follower_count,
+                "last_count": row.follower_count,
+                "sample_count": 1,
+            }
+            for row in rows
+        ]
+
+    model = FollowerHistoryHourly if resolution == "hourly" else FollowerHistoryDaily
+    truncate = truncate_hour if resolution == "hourly" else truncate_day
+    columns = (
+        model.bucket_start,
+        model.min_count,
+        model.max_count,
+        model.first_count,
+        model.last_count,
+        model.sample_count
+    )
+    before = db.execute(
+        select(*columns)
+        .where(model.profile_id == profile_id, model.bucket_start < truncate(start))
+        .order_by(model.bucket_start.desc())
+        .limit(1)
+    ).all()
+    rows = before + db.execute(
+        select(*columns)
+        .where(model.profile_id == profile_id, model.bucket_start.between(truncate(start), end))
+        .order_by(model.bucket_start)
+    ).all()
+    return resolution, [row._asdict() for row in rows]
@@ -0,0 +1,171 @@
+"""Compact follower history: one row per profile per day, delta-encoded.
+
+Each block stores its first sample in full and every later one as the
+difference from the previous sample, zigzag-mapped to unsigned and packed as
+LEB128 varints. A day of five-minute samples with a mostly flat count comes
+to a few bytes per point instead of a full follower_history row. Encoding and
+decoding work on whole numpy arrays; appending a sample only encodes its own
+deltas, so the check path never decodes a block.
+"""
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select, insert, update
+from sqlalchemy.orm import Session
+from app.models import FollowerHistoryBlock
+
+VARINT_MAX_BYTES = 10
+EPOCH = np.datetime64(0, "us")
+
+
+def zigzag_encode(values: np.ndarray) -> np.ndarray:
+    """Map signed to unsigned so small magnitudes of either sign stay small: 0, -1, 1, -2 -> 0, 1, 2, 3"""
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def zigzag_decode(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.uint64)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+
+def _varint_bytes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """LEB128 bytes of every value, concatenated, and the number of bytes each took"""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(values.size, dtype=np.int64)
+    for k in range(1, VARINT_MAX_BYTES):
+        lengths += values >= np.uint64(1 << (7 * k))
+
+    owner = np.repeat(np.arange(values.size), lengths)
+    starts = np.cumsum(lengths) - lengths
+    position = np.arange(owner.size) - starts[owner]
+    payload = (values[owner] >> (np.uint64(7) * position.astype(np.uint64))) & np.uint64(0x7F)
+    more = position < lengths[owner] - 1
+    return (payload | (more.astype(np.uint64) << np.uint64(7))).astype(np.uint8), lengths
+
+
+def varint_encode(values: np.ndarray) -> bytes:
+    """Pack unsigned integers as LEB128 varints: 7 bits per byte, high bit set on all but the last"""
+    return _varint_bytes(values)[0].tobytes()
+
+
+def varint_encode_each(values: np.ndarray) -> List[bytes]:
+    """Encode many values in one pass, returning each one's bytes separately"""
+    data, lengths = _varint_bytes(values)
+    return [part.tobytes() for part in np.split(data, np.cumsum(lengths)[:-1])]
+
+
+def varint_decode(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    last = (raw & 0x80) == 0
+    if not last[-1]:
+        raise ValueError("Truncated varint")
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    owner = np.cumsum(np.concatenate(([0], last[:-1].astype(np.int64))))
+    position = (np.arange(raw.size) - starts[owner]).astype(np.uint64)
+    payload = (raw & 0x7F).astype(np.uint64) << (np.uint64(7) * position)
+    return np.bitwise_or.reduceat(payload, starts)
+
+
+def _microseconds(times) -> np.ndarray:
+    return (np.asarray(times, dtype="datetime64[us]") - EPOCH).astype(np.int64)
+
+
+def encode_block(times: Sequence[datetime], counts: Sequence[int]) -> Dict:
+    """Column values of a block holding these samples, oldest first"""
+    micros = _microseconds(times)
+    counts = np.asarray(counts, dtype=np.int64)
+    if micros.size == 0:
+        raise ValueError("A block needs at least one sample")
+    return {
+        "base_at": times[0],
+        "base_count": int(counts[0]),
+        "last_at": times[-1],
+        "last_count": int(counts[-1]),
+        "sample_count": int(micros.size),
+        "time_deltas": varint_encode(zigzag_encode(np.diff(micros))),
+        "count_deltas": varint_encode(zigzag_encode(np.diff(counts)))
+    }
+
+
+def decode_block(block) -> Tuple[np.ndarray, np.ndarray]:
+    """(times as datetime64[us], counts as int64) of a block row"""
+    micros = np.cumsum(np.concatenate((
+        _microseconds([block.base_at]),
+        zigzag_decode(varint_decode(block.time_deltas))
+    )))
+    counts = np.cumsum(np.concatenate((
+        [np.int64(block.base_count)],
+        zigzag_decode(varint_decode(block.count_deltas))
+    )))
+    return EPOCH + micros.astype("timedelta64[us]"), counts
+
+
+def append_samples(db: Session, counts: Dict[int, int], recorded_at: datetime):
+    """Append one sample per profile to its block for recorded_at's day.
+
+    One query loads the day's block tails, the deltas for all profiles are
+    encoded in one vectorized pass, then existing blocks are extended with a
+    bulk UPDATE and missing ones created with a multi-row INSERT. Samples must
+    arrive in time order per profile. Does not commit.
+    """
+    if not counts:
+        return
+    day = recorded_at.date()
+    tails = db.execute(
+        select(
+            FollowerHistoryBlock.profile_id,
+            FollowerHistoryBlock.last_at,
+            FollowerHistoryBlock.last_count,
+            FollowerHistoryBlock.sample_count,
+            FollowerHistoryBlock.time_deltas,
+            FollowerHistoryBlock.count_deltas
+        ).where(FollowerHistoryBlock.profile_id.in_(list(counts)), FollowerHistoryBlock.day == day)
+    ).all()
+
+    if tails:
+        now = _microseconds([recorded_at])[0]
+        time_deltas = varint_encode_each(zigzag_encode(now - _microseconds([t.last_at for t in tails])))
+        count_deltas = varint_encode_each(zigzag_encode([counts[t.profile_id] - t.last_count for t in tails]))
+        db.execute(update(FollowerHistoryBlock), [
+            {
+                "profile_id": tail.profile_id,
+                "day": day,
+                "last_at": recorded_at,
+                "last_count": counts[tail.profile_id],
+                "sample_count": tail.sample_count + 1,
+                "time_deltas": tail.time_deltas + time_deltas[i],
+                "count_deltas": tail.count_deltas + count_deltas[i]
+            }
+            for i, tail in enumerate(tails)
+        ])
+
+    extended = {t.profile_id for t in tails}
+    new_blocks = [
+        {"profile_id": profile_id, "day": day, **encode_block([recorded_at], [count])}
+        for profile_id, count in counts.items() if profile_id not in extended
+    ]
+    if new_blocks:
+        db.execute(insert(FollowerHistoryBlock), new_blocks)
+
+
+def read_history_blocks(db: Session, profile_id: int, start: datetime, end: datetime) -> Tuple[np.ndarray, np.ndarray]:
+    """A profile's samples in [start, end] as (datetime64[us] times, int64 counts), oldest first"""
+    blocks = db.execute(
+        select(FollowerHistoryBlock)
+        .where(
+            FollowerHistoryBlock.profile_id == profile_id,
+            FollowerHistoryBlock.day.between(start.date(), end.date())
+        )
+        .order_by(FollowerHistoryBlock.day)
+    ).scalars().all()
+    if not blocks:
+        return np.zeros(0, dtype="datetime64[us]"), np.zeros(0, dtype=np.int64)
+
+    decoded = [decode_block(block) for block in blocks]
+    times = np.concatenate([t for t, _ in decoded])
+    counts = np.concatenate([c for _, c in decoded])
+    in_range = (times >= np.datetime64(start, "us")) & (times <= np.datetime64(end, "us"))
+    return times[in_range], counts[in_range]
@@ -0,0 +1,124 @@
+import logging
+from collections import defaultdict
+from typing import Iterable, Optional, Sequence
+from sqlalchemy import select, func, event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.hot_state import HotProfileState, get_hot_state
+from app.models import TrackedAccount, Profile, FollowerHistory
+
+logger = logging.getLogger(__name__)
+
+
+def record_hot_state_on_commit(db: Session, states: Sequence[HotProfileState]):
+    """Write these checks to the hot state once the current transaction commits"""
+    if get_hot_state() is not None:
+        db.info.setdefault("hot_state_checks", []).extend(states)
+
+
+def drop_hot_state_on_commit(db: Session, profile_ids: Iterable[int]):
+    if get_hot_state() is not None:
+        db.info.setdefault("hot_state_deletes", set()).update(profile_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _write_hot_state(session):
+    """Runs once Postgres has the data, so a hot state outage is logged rather than failing the
+    check or request; rebuild_hot_state repairs what was missed"""
+    checks = session.info.pop("hot_state_checks", None)
+    deletes = session.info.pop("hot_state_deletes", None)
+    hot_state = get_hot_state()
+    if hot_state is None:
+        return
+    try:
+        if checks:
+            hot_state.record_checks(checks)
+        if deletes:
+            hot_state.delete(deletes)
+    except Exception as e:
+        logger.error(f"Failed to update hot state for {len(checks or ())} checks, {len(deletes or ())} deletes: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_hot_state(session):
+    session.info.pop("hot_state_checks", None)
+    session.info.pop("hot_state_deletes", None)
+
+
+def load_hot_states(db: Session, profile_ids: Sequence[int]) -> list:
+    """Hot state for these profiles as stored in Postgres: profile columns plus the newest samples, in two queries"""
+    profiles = db.execute(
+        select(Profile.id, Profile.user_id, Profile.current_follower_count, TrackedAccount.last_checked_at)
+        .outerjoin(TrackedAccount, TrackedAccount.id == Profile.tracked_account_id)
+        .where(Profile.id.in_(profile_ids))
+    ).all()
+    if not profiles:
+        return []
+
+    ranked = select(
+        FollowerHistory.profile_id,
+        FollowerHistory.follower_count,
+        FollowerHistory.recorded_at,
+        func.row_number().over(
+            partition_by=FollowerHistory.profile_id,
+            order_by=(FollowerHistory.recorded_at.desc(), FollowerHistory.id.desc())
+        ).label("position")
+    ).where(FollowerHistory.profile_id.in_(profile_ids)).subquery()
+    samples = defaultdict(list)
+    for row in db.execute(
+        select(ranked.c.profile_id, ranked.c.follower_count, ranked.c.recorded_at)
+        .where(ranked.c.position <= settings.HOT_STATE_RECENT_SAMPLES)
+        .order_by(ranked.c.profile_id, ranked.c.position)
+    ):
+        samples[row.profile_id].append((row.recorded_at, row.follower_count))
+
+    return [
+        HotProfileState(p.id, p.user_id, p.current_follower_count or 0, p.last_checked_at, samples[p.id])
+        for p in profiles
+    ]
+
+
+def get_current_state(db: Session, profile_id: int, user_id: int) -> Optional[HotProfileState]:
+    """A profile's current count and recent samples, from the hot state when it has them.
+
+    Postgres is the source of truth, so a hot state outage falls back to it.
+    """
+    hot_state = get_hot_state()
+    if hot_state is not None:
+        try:
+            state = hot_state.get_many([profile_id]).get(profile_id)
+        except Exception as e:
+            logger.error(f"Failed to read hot state for profile {profile_id}: {e}")
+            hot_state = None
+        else:
+            if state is not None:
+                return state if state.user_id == user_id else None
+
+    states = load_hot_states(db, [profile_id])
+    if not states or states[0].user_id != user_id:
+        return None
+    if hot_state is not None:
+        try:
+            hot_state.load(states)
+        except Exception as e:
+            logger.error(f"Failed to load hot state for profile {profile_id}: {e}")
+    return states[0]
+
+
+def repopulate_hot_state(db: Session, batch_size: int = 1000) -> int:
+    """Repopulate the hot state from Postgres, walking profiles in id order. Returns the number loaded."""
+    hot_state = get_hot_state()
+    if hot_state is None:
+        return 0
+
+    loaded, last_id = 0, 0
+    while True:
+        profile_ids = db.scalars(
+            select(Profile.id).where(Profile.id > last_id).order_by(Profile.id).limit(batch_size)
+        ).all()
+        if not profile_ids:
+            break
+        hot_state.load(load_hot_states(db, profile_ids))
+        loaded += len(profile_ids)
+        last_id = profile_ids[-1]
+    return loaded
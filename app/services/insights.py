@@ -0,0 +1,135 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import select, func, event
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.models import Profile, FollowerHistory
+from app.schemas import ProfileWithInsights, Profile as ProfileSchema, FollowerHistory as FollowerHistorySchema
+
+logger = logging.getLogger(__name__)
+
+RECENT_HISTORY_LIMIT = 10
+
+
+def insights_key(profile_id: int) -> str:
+    return f"insights:{profile_id}"
+
+
+def compute_insights(db: Session, profile_id: int, user_id: int) -> Optional[ProfileWithInsights]:
+    """Build a profile's insights with a single query.
+
+    Window functions number the last 24 hours of samples newest first and carry
+    the oldest count in the window on every row; the profile is outer-joined to
+    the ten newest so a profile without history still comes back.
+
+    History is a step function (a count holds until the next sample), so the
+    24h change is measured from the newest sample at or before 24 hours ago,
+    falling back to the oldest sample in the window for younger profiles.
+    """
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    window = (
+        select(
+            FollowerHistory.id,
+            FollowerHistory.profile_id,
+            FollowerHistory.follower_count,
+            FollowerHistory.recorded_at,
+            FollowerHistory.confirmed_at,
+            func.row_number().over(
+                order_by=(FollowerHistory.recorded_at.desc(), FollowerHistory.id.desc())
+            ).label("position"),
+            func.first_value(FollowerHistory.follower_count).over(
+                order_by=(FollowerHistory.recorded_at, FollowerHistory.id)
+            ).label("oldest_count")
+        )
+        .where(FollowerHistory.profile_id == profile_id, FollowerHistory.recorded_at >= yesterday)
+        .subquery()
+    )
+    baseline = (
+        select(FollowerHistory.follower_count)
+        .where(FollowerHistory.profile_id == profile_id, FollowerHistory.recorded_at < yesterday)
+        .order_by(FollowerHistory.recorded_at.desc(), FollowerHistory.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(Profile, window, baseline.label("baseline_count"))
+        .outerjoin(window, window.c.position <= RECENT_HISTORY_LIMIT)
+        .where(Profile.id == profile_id, Profile.user_id == user_id)
+        .order_by(window.c.position)
+    ).all()
+
+    if not rows:
+        return None
+
+    profile = rows[0].Profile
+    recent_history = [
+        FollowerHistorySchema(
+            id=row.id,
+            profile_id=row.profile_id,
+            follower_count=row.follower_count,
+            recorded_at=row.recorded_at,
+            confirmed_at=row.confirmed_at
+        )
+        for row in rows if row.id is not None
+    ]
+    baseline_count = rows[0].baseline_count
+    if baseline_count is None:
+        baseline_count = rows[0].oldest_count
+    follower_change_24h = 0
+    if baseline_count is not None:
+        follower_change_24h = profile.current_follower_count - baseline_count
+
+    return ProfileWithInsights(
+        **ProfileSchema.model_validate(profile).model_dump(),
+        follower_change_24h=follower_change_24h,
+        recent_history=recent_history
+    )
+
+
+def get_insights(db: Session, profile_id: int, user_id: int) -> Optional[ProfileWithInsights]:
+    """Serve insights from the cache, computing and caching them on a miss.
+
+    A cache outage is treated as a miss, and the result isn't cached.
+    """
+    cache = get_cache()
+    try:
+        cached = cache.get(insights_key(profile_id))
+    except Exception as e:
+        logger.error(f"Failed to read cached insights for profile {profile_id}: {e}")
+        return compute_insights(db, profile_id, user_id)
+    if cached is not None:
+        insights = ProfileWithInsights.model_validate_json(cached)
+        return insights if insights.user_id == user_id else None
+
+    insights = compute_insights(db, profile_id, user_id)
+    if insights is not None:
+        try:
+            cache.set(insights_key(profile_id), insights.model_dump_json(), settings.INSIGHTS_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to cache insights for profile {profile_id}: {e}")
+    return insights
+
+
+def invalidate_insights_on_commit(db: Session, profile_ids: Iterable[int]):
+    """Drop cached insights for these profiles once the current transaction commits"""
+    db.info.setdefault("stale_insights", set()).update(profile_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_stale_insights(session):
+    """Runs after the data is committed, so a cache outage is logged rather than failing the write;
+    entries missed here expire after INSIGHTS_CACHE_TTL_SECONDS"""
+    profile_ids = session.info.pop("stale_insights", None)
+    if not profile_ids:
+        return
+    try:
+        get_cache().delete_many(insights_key(profile_id) for profile_id in profile_ids)
+    except Exception as e:
+        logger.error(f"Failed to invalidate cached insights for {len(profile_ids)} profiles: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_insights(session):
+    session.info.pop("stale_insights", None)
@@ -1,17 +1,24 @@
+import asyncio
 import random
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.social_api import SocialMediaAPI, AsyncSocialMediaAPI, BatchLookupResult, max_batch_size
 
 
-class MockSocialMediaAPI:
+class MockSocialMediaAPI(SocialMediaAPI):
     """Mock social media API that simulates follower count changes"""
 
     def __init__(self):
         self._follower_data = {}
+        self._lookup_errors = {}
 
     def get_follower_count(self, platform: str, username: str) -> int:
         """Get follower count for a social media profile"""
         key = f"{platform}:{username}"
 
+        if key in self._lookup_errors:
+            raise LookupError(self._lookup_errors[key])
+
         if key not in self._follower_data:
             # Initialize with random follower count
             self._follower_data[key] = random.randint(100, 5000)
@@ -23,11 +30,68 @@ class MockSocialMediaAPI:
 
         return self._follower_data[key]
 
+    def lookup_batch(self, platform: str, usernames: List[str]) -> BatchLookupResult:
+        """Simulate one batch request, as a platform's batch endpoint answers it.
+
+        Requests over the platform's batch size are rejected as a whole;
+        otherwise accounts with an injected error are reported individually
+        and the rest resolve. Counts come from `get_follower_count`, so
+        patching it drives single and batch lookups alike.
+        """
+        limit = max_batch_size(platform)
+        if len(usernames) > limit:
+            raise ValueError(f"Batch of {len(usernames)} accounts exceeds the {platform} limit of {limit}")
+
+        result = BatchLookupResult()
+        for username in usernames:
+            message = self._lookup_errors.get(f"{platform}:{username}")
+            if message is not None:
+                result.errors[username] = message
+            else:
+                result.counts[username] = self.get_follower_count(platform, username)
+        return result
+
     def set_follower_count(self, platform: str, username: str, count: int):
         """Set follower count for testing purposes"""
         key = f"{platform}:{username}"
         self._follower_data[key] = count
 
+    def set_lookup_error(self, platform: str, username: str, message: Optional[str]):
+        """Make lookups for a profile fail with `message` (None clears it) for testing purposes"""
+        key = f"{platform}:{username}"
+        if message is None:
+            self._lookup_errors.pop(key, None)
+        else:
+            self._lookup_errors[key] = message
+
+
+class AsyncMockSocialMediaAPI(AsyncSocialMediaAPI):
+    """Async mock that sleeps for a simulated network latency, then answers from a sync mock"""
+
+    def __init__(self, source: Optional[MockSocialMediaAPI] = None, min_latency_ms: int = 0, max_latency_ms: int = 0):
+        self.source = source or MockSocialMediaAPI()
+        self.min_latency_ms = min_latency_ms
+        self.max_latency_ms = max(min_latency_ms, max_latency_ms)
+
+    async def get_follower_count(self, platform: str, username: str) -> int:
+        """Get follower count after a random delay in [min_latency_ms, max_latency_ms]"""
+        await self._simulate_latency()
+        return self.source.get_follower_count(platform, username)
+
+    async def lookup_batch(self, platform: str, usernames: List[str]) -> BatchLookupResult:
+        """Simulate one batch request: a single delay for the whole batch"""
+        await self._simulate_latency()
+        return self.source.lookup_batch(platform, usernames)
+
+    async def _simulate_latency(self):
+        if self.max_latency_ms:
+            await asyncio.sleep(random.uniform(self.min_latency_ms, self.max_latency_ms) / 1000)
+
 
-# Global instance
+# Global instances
 mock_api = MockSocialMediaAPI()
+async_mock_api = AsyncMockSocialMediaAPI(
+    mock_api,
+    min_latency_ms=settings.MOCK_API_MIN_LATENCY_MS,
+    max_latency_ms=settings.MOCK_API_MAX_LATENCY_MS
+)
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update, or_
+from sqlalchemy.orm import Session
+from telegram.error import BadRequest, Forbidden
+from app.core.config import settings
+from app.models import NotificationOutbox, User
+from app.models.notification import PENDING, SENT, FAILED, UNDELIVERABLE
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+# The chat is gone or the bot was blocked; retrying won't help
+PERMANENT_ERRORS = (Forbidden, BadRequest)
+
+
+class RateLimiter:
+    """Spaces sends to stay under a global rate and a minimum interval per chat.
+
+    Slots are reserved before sleeping, so concurrent senders never share one.
+    """
+
+    def __init__(self, global_per_second: float, chat_interval: float, clock=time.monotonic, sleep=asyncio.sleep):
+        self.global_interval = 1.0 / global_per_second
+        self.chat_interval = chat_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._next_global = 0.0
+        self._next_chat: Dict[str, float] = {}
+
+    async def wait(self, chat_id: str):
+        now = self.clock()
+        start = max(now, self._next_global, self._next_chat.get(chat_id, 0.0))
+        self._next_global = start + self.global_interval
+        self._next_chat[chat_id] = start + self.chat_interval
+        if start > now:
+            await self.sleep(start - now)
+
+
+def coalesce_messages(messages: List[str]) -> List[Tuple[str, int]]:
+    """Join one user's pending messages into as few Telegram messages as fit.
+
+    Returns (text, number of messages joined into it) pairs, in order.
+    """
+    texts, current, count = [], "", 0
+    for message in messages:
+        candidate = f"{current}\n{message}" if current else message
+        if current and len(candidate) > TELEGRAM_MAX_MESSAGE_LENGTH:
+            texts.append((current, count))
+            candidate, count = message, 0
+        current = candidate
+        count += 1
+    if current:
+        texts.append((current, count))
+    return texts
+
+
+def retry_delay(attempts: int, error: Exception) -> float:
+    """Exponential backoff, or the wait Telegram asked for on flood control"""
+    retry_after = getattr(error, "retry_after", None)
+    if isinstance(retry_after, timedelta):
+        retry_after = retry_after.total_seconds()
+    if retry_after:
+        return float(retry_after)
+    return min(settings.NOTIFICATION_RETRY_MAX_SECONDS, settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+async def _deliver(
+        bot,
+        limiter: RateLimiter,
+        texts_by_chat: Dict[str, List[Tuple[str, List[int]]]],
+        on_sent: Callable[[List[int]], None]
+) -> Dict[str, Tuple[List[int], Exception]]:
+    """Send every chat's texts concurrently, in order within a chat.
+
+    `on_sent` gets the row ids of each text as soon as it is delivered. A
+    chat stops at its first error; returns, per failed chat, the ids of the
+    rows left unsent and the error.
+    """
+
+    async def send_chat(chat_id, texts):
+        for index, (text, row_ids) in enumerate(texts):
+            await limiter.wait(chat_id)
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+            except Exception as e:
+                return chat_id, ([row_id for _, ids in texts[index:] for row_id in ids], e)
+            on_sent(row_ids)
+        return chat_id, None
+
+    async with bot:
+        results = await asyncio.gather(*(send_chat(chat_id, texts) for chat_id, texts in texts_by_chat.items()))
+    return {chat_id: failure for chat_id, failure in results if failure is not None}
+
+
+def lease_notifications(db: Session, now: datetime) -> List:
+    """Take the dispatch lease on up to NOTIFICATION_BATCH_SIZE due rows that no other dispatcher holds.
+
+    One UPDATE ... RETURNING, re-checking the lease so concurrent dispatchers
+    never take the same row. Commit before sending so no row lock is held
+    across network calls; recording the row's outcome releases the lease, and
+    an abandoned one lapses after NOTIFICATION_LEASE_SECONDS.
+    """
+    unleased = or_(NotificationOutbox.lease_expires_at.is_(None), NotificationOutbox.lease_expires_at <= now)
+    due = (
+        select(NotificationOutbox.id)
+        .where(NotificationOutbox.status == PENDING, NotificationOutbox.next_attempt_at <= now, unleased)
+        .order_by(NotificationOutbox.id)
+        .limit(settings.NOTIFICATION_BATCH_SIZE)
+    )
+    rows = db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(due.scalar_subquery()), NotificationOutbox.status == PENDING, unleased)
+        .values(lease_expires_at=now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS))
+        .returning(
+            NotificationOutbox.id,
+            NotificationOutbox.user_id,
+            NotificationOutbox.message,
+            NotificationOutbox.attempts
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    return sorted(rows, key=lambda row: row.id)
+
+
+def dispatch_notifications(
+        db: Session,
+        bot,
+        limiter: Optional[RateLimiter] = None,
+        now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Send one batch of due outbox rows and record the outcome.
+
+    Rows are leased (see `lease_notifications`) so parallel dispatchers never
+    send the same row. A user's rows are coalesced into as few messages as
+    fit, and each row is marked sent as soon as its message is delivered.
+    Rows whose message failed are retried with backoff up to
+    NOTIFICATION_MAX_ATTEMPTS. Commits. Returns counts of rows by outcome.
+    """
+    now = now or datetime.utcnow()
+    limiter = limiter or RateLimiter(settings.TELEGRAM_GLOBAL_RATE_PER_SECOND, settings.TELEGRAM_CHAT_MIN_INTERVAL_SECONDS)
+    stats = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0, "undeliverable": 0}
+
+    rows = lease_notifications(db, now)
+    db.commit()
+    stats["claimed"] = len(rows)
+    if not rows:
+        return stats
+
+    chat_ids = dict(db.execute(
+        select(User.id, User.telegram_chat_id).where(User.id.in_({row.user_id for row in rows}))
+    ).all())
+    rows_by_chat = defaultdict(list)
+    for row in rows:
+        rows_by_chat[chat_ids.get(row.user_id)].append(row)
+    no_chat = rows_by_chat.pop(None, [])
+
+    texts_by_chat = {}
+    for chat_id, chat_rows in rows_by_chat.items():
+        texts, start = [], 0
+        for text, count in coalesce_messages([row.message for row in chat_rows]):
+            texts.append((text, [row.id for row in chat_rows[start:start + count]]))
+            start += count
+        texts_by_chat[chat_id] = texts
+
+    def mark_sent(row_ids: List[int]):
+        db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(row_ids))
+            .values(status=SENT, attempts=NotificationOutbox.attempts + 1, sent_at=now, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        stats["sent"] += len(row_ids)
+
+    failures = asyncio.run(_deliver(bot, limiter, texts_by_chat, mark_sent)) if texts_by_chat else {}
+
+    updates = [
+        {"id": row.id, "status": UNDELIVERABLE, "last_error": "User has no Telegram chat id", "lease_expires_at": None}
+        for row in no_chat
+    ]
+    stats["undeliverable"] += len(no_chat)
+    attempts_by_id = {row.id: row.attempts + 1 for row in rows}
+    for chat_id, (row_ids, error) in failures.items():
+        for row_id in row_ids:
+            attempts = attempts_by_id[row_id]
+            row_update = {"id": row_id, "attempts": attempts, "last_error": str(error), "lease_expires_at": None}
+            if isinstance(error, PERMANENT_ERRORS):
+                row_update["status"] = UNDELIVERABLE
+                stats["undeliverable"] += 1
+            elif attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                row_update["status"] = FAILED
+                stats["failed"] += 1
+            else:
+                row_update["next_attempt_at"] = now + timedelta(seconds=retry_delay(attempts, error))
+                stats["retrying"] += 1
+            updates.append(row_update)
+        logger.warning(f"Notification to chat {chat_id} failed: {error}")
+
+    if updates:
+        db.execute(update(NotificationOutbox), updates)
+        db.commit()
+    return stats
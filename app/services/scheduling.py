@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import TrackedAccount
+
+
+def update_change_rate(
+        previous_rate: Optional[float],
+        old_count: Optional[int],
+        new_count: int,
+        last_checked_at: Optional[datetime],
+        checked_at: datetime
+) -> Optional[float]:
+    """Fold the latest observed change into the account's smoothed followers-per-hour rate"""
+    if old_count is None or last_checked_at is None:
+        return previous_rate
+
+    hours = (checked_at - last_checked_at).total_seconds() / 3600
+    if hours <= 0:
+        return previous_rate
+
+    observed = abs(new_count - old_count) / hours
+    if previous_rate is None:
+        return observed
+
+    alpha = settings.CHECK_RATE_SMOOTHING
+    return alpha * observed + (1 - alpha) * previous_rate
+
+
+def next_check_interval(change_rate: Optional[float], distance_to_threshold: Optional[int]) -> float:
+    """Seconds until the next check.
+
+    Volatile accounts are checked often enough to see about CHECK_TARGET_CHANGE
+    followers move between samples; accounts approaching a pending alert are
+    checked CHECK_SAMPLES_BEFORE_THRESHOLD times before they are expected to
+    cross it. Accounts with no observed rate yet are checked at the minimum
+    interval until one is learned. The result is clamped to
+    [CHECK_MIN_INTERVAL_SECONDS, CHECK_MAX_INTERVAL_SECONDS].
+    """
+    low, high = settings.CHECK_MIN_INTERVAL_SECONDS, settings.CHECK_MAX_INTERVAL_SECONDS
+    if change_rate is None:
+        return low
+
+    per_second = change_rate / 3600
+    if per_second <= 0:
+        return high
+
+    interval = settings.CHECK_TARGET_CHANGE / per_second
+    if distance_to_threshold is not None:
+        time_to_threshold = max(distance_to_threshold, 0) / per_second
+        interval = min(interval, time_to_threshold / settings.CHECK_SAMPLES_BEFORE_THRESHOLD)
+
+    return min(max(interval, low), high)
+
+
+def next_check_at(
+        checked_at: datetime,
+        change_rate: Optional[float],
+        distance_to_threshold: Optional[int]
+) -> datetime:
+    return checked_at + timedelta(seconds=next_check_interval(change_rate, distance_to_threshold))
+
+
+def _is_due(now: datetime):
+    return or_(TrackedAccount.next_check_at.is_(None), TrackedAccount.next_check_at <= now)
+
+
+def _due_conditions(now: datetime):
+    return TrackedAccount.profiles.any(), _is_due(now)
+
+
+def oldest_due_at(db: Session, now: Optional[datetime] = None) -> Optional[datetime]:
+    """When the longest-waiting due account became due (its creation time if it was never checked)"""
+    now = now or datetime.utcnow()
+    return db.scalar(
+        select(func.min(func.coalesce(TrackedAccount.next_check_at, TrackedAccount.created_at)))
+        .where(*_due_conditions(now))
+    )
+
+
+def claim_due_accounts(
+        db: Session,
+        now: datetime,
+        claimed_until: datetime,
+        after_id: int = 0,
+        page_size: int = 5000
+) -> Iterator[List[int]]:
+    """Yield the IDs of tracked accounts due for a check, a page at a time in ID order,
+    pushing each page's next check out to `claimed_until` as it is claimed.
+
+    Claimed accounts are not picked by the next dispatch while their check is
+    queued; the check itself then sets the real next time. Accounts already at
+    `claimed_until` are claimed again, so a resumed cycle re-sends pages whose
+    checks it may not have published. Pages are found by keyset on the primary
+    key from `after_id`, so memory stays at one page however many accounts are
+    due. Does not commit; commit each page before publishing its checks.
+    """
+    last_id = after_id
+    while True:
+        account_ids = db.scalars(
+            select(TrackedAccount.id)
+            .where(
+                TrackedAccount.profiles.any(),
+                or_(_is_due(now), TrackedAccount.next_check_at == claimed_until),
+                TrackedAccount.id > last_id
+            )
+            .order_by(TrackedAccount.id)
+            .limit(page_size)
+        ).all()
+        if not account_ids:
+            return
+
+        db.execute(
+            update(TrackedAccount)
+            .where(TrackedAccount.id.in_(account_ids))
+            .values(next_check_at=claimed_until)
+            .execution_options(synchronize_session=False)
+        )
+        yield list(account_ids)
+        last_id = account_ids[-1]
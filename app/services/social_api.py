@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+from app.core.config import settings
+from app.core.metrics import FOLLOWER_FETCH_SECONDS, FOLLOWER_FETCH_ACCOUNTS
+
+
+@dataclass
+class BatchLookupResult:
+    """Outcome of a batch lookup: counts for the accounts that resolved, an error message for the rest"""
+    counts: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def merge(self, other: "BatchLookupResult", requested: Sequence[str]):
+        self.counts.update(other.counts)
+        self.errors.update(other.errors)
+        for username in requested:
+            if username not in other.counts and username not in other.errors:
+                self.errors[username] = "Not returned by platform"
+
+
+def max_batch_size(platform: str) -> int:
+    """Largest number of accounts a single upstream request may ask for on `platform`"""
+    return settings.PLATFORM_BATCH_SIZES.get(platform, settings.DEFAULT_PLATFORM_BATCH_SIZE)
+
+
+def split_batches(platform: str, usernames: Sequence[str]) -> List[List[str]]:
+    size = max_batch_size(platform)
+    return [list(usernames[start:start + size]) for start in range(0, len(usernames), size)]
+
+
+def record_lookup_outcomes(platform: str, result: BatchLookupResult):
+    FOLLOWER_FETCH_ACCOUNTS.labels(platform, "ok").inc(len(result.counts))
+    FOLLOWER_FETCH_ACCOUNTS.labels(platform, "error").inc(len(result.errors))
+
+
+class SocialMediaAPI(ABC):
+    """Blocking follower lookups"""
+
+    @abstractmethod
+    def get_follower_count(self, platform: str, username: str) -> int:
+        ...
+
+    def lookup_batch(self, platform: str, usernames: List[str]) -> BatchLookupResult:
+        """One upstream request for at most `max_batch_size(platform)` accounts.
+
+        Platforms with a native batch endpoint override this; the default falls
+        back to single lookups.
+        """
+        result = BatchLookupResult()
+        for username in usernames:
+            try:
+                result.counts[username] = self.get_follower_count(platform, username)
+            except Exception as e:
+                result.errors[username] = str(e)
+        return result
+
+    def get_follower_counts(self, platform: str, usernames: Sequence[str]) -> BatchLookupResult:
+        """Look up any number of accounts, split into requests of the platform's maximum batch size"""
+        result = BatchLookupResult()
+        for batch in split_batches(platform, usernames):
+            try:
+                with FOLLOWER_FETCH_SECONDS.labels(platform).time():
+                    batch_result = self.lookup_batch(platform, batch)
+                result.merge(batch_result, batch)
+            except Exception as e:
+                result.errors.update({username: str(e) for username in batch})
+        record_lookup_outcomes(platform, result)
+        return result
+
+
+class AsyncSocialMediaAPI(ABC):
+    """Non-blocking follower lookups, meant to be awaited many at a time"""
+
+    @abstractmethod
+    async def get_follower_count(self, platform: str, username: str) -> int:
+        ...
+
+    async def lookup_batch(self, platform: str, usernames: List[str]) -> BatchLookupResult:
+        """Async counterpart of `SocialMediaAPI.lookup_batch`"""
+        result = BatchLookupResult()
+        for username in usernames:
+            try:
+                result.counts[username] = await self.get_follower_count(platform, username)
+            except Exception as e:
+                result.errors[username] = str(e)
+        return result
+
+    async def get_follower_counts(self, platform: str, usernames: Sequence[str]) -> BatchLookupResult:
+        """Async counterpart of `SocialMediaAPI.get_follower_counts`"""
+        result = BatchLookupResult()
+        for batch in split_batches(platform, usernames):
+            try:
+                with FOLLOWER_FETCH_SECONDS.labels(platform).time():
+                    batch_result = await self.lookup_batch(platform, batch)
+                result.merge(batch_result, batch)
+            except Exception as e:
+                result.errors.update({username: str(e) for username in batch})
+        record_lookup_outcomes(platform, result)
+        return result
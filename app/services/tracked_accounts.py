@@ -0,0 +1,51 @@
+from typing import Optional, Sequence
+from sqlalchemy import select, insert, update, exists, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import TrackedAccount, Profile
+
+
+def get_or_create_tracked_account(db: Session, platform: str, username: str) -> TrackedAccount:
+    """Return the shared account for (platform, username), creating it if needed"""
+    account = db.query(TrackedAccount).filter(
+        and_(TrackedAccount.platform == platform, TrackedAccount.username == username)
+    ).first()
+    if account:
+        return account
+
+    try:
+        with db.begin_nested():
+            account = TrackedAccount(platform=platform, username=username)
+            db.add(account)
+    except IntegrityError:
+        # Another request created it concurrently
+        account = db.query(TrackedAccount).filter(
+            and_(TrackedAccount.platform == platform, TrackedAccount.username == username)
+        ).one()
+    return account
+
+
+def link_untracked_profiles(db: Session, profile_ids: Optional[Sequence[int]] = None) -> None:
+    """Attach profiles that have no tracked account yet, in two set-based statements.
+
+    Links every such profile, or only those among `profile_ids` if given.
+    """
+    same_account = and_(
+        TrackedAccount.platform == Profile.platform,
+        TrackedAccount.username == Profile.username
+    )
+    untracked = [Profile.tracked_account_id.is_(None)]
+    if profile_ids is not None:
+        untracked.append(Profile.id.in_(profile_ids))
+    missing = select(Profile.platform, Profile.username).where(
+        *untracked,
+        ~exists().where(same_account)
+    ).distinct()
+    db.execute(insert(TrackedAccount).from_select(["platform", "username"], missing))
+
+    db.execute(
+        update(Profile)
+        .where(*untracked)
+        .values(tracked_account_id=select(TrackedAccount.id).where(same_account).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
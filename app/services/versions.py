@@ -0,0 +1,41 @@
+"""Version stamps behind the ETags of the read endpoints.
+
+A profile's stamp is its updated_at, which every check and every edit
+moves forward. A user's profile and alert collections carry counters that
+the endpoints and the check path bump when rows are added, removed or
+triggered. The helpers build statements so they work from sync and async
+sessions alike.
+"""
+from datetime import datetime
+from typing import Iterable
+from sqlalchemy import Select, Update, select, update, func
+from app.core.config import settings
+from app.models import User, Profile
+
+
+def bump_collection_versions(user_ids: Iterable[int], profiles: bool = False, alerts: bool = False) -> Update:
+    values = {}
+    if profiles:
+        values["profiles_version"] = User.profiles_version + 1
+    if alerts:
+        values["alerts_version"] = User.alerts_version + 1
+    return update(User).where(User.id.in_(sorted(set(user_ids)))).values(**values)
+
+
+def profile_version(profile_id: int, user_id: int) -> Select:
+    return select(Profile.updated_at).where(Profile.id == profile_id, Profile.user_id == user_id)
+
+
+def profiles_collection_version(user_id: int) -> Select:
+    newest = select(func.max(Profile.updated_at)).where(Profile.user_id == user_id).scalar_subquery()
+    return select(User.profiles_version, newest).where(User.id == user_id)
+
+
+def alerts_collection_version(user_id: int) -> Select:
+    return select(User.alerts_version).where(User.id == user_id)
+
+
+def insights_bucket(now: datetime = None) -> int:
+    """Insights also drift as samples leave the 24h window; they are allowed to be as stale as their cache entry"""
+    now = now or datetime.utcnow()
+    return int(now.timestamp()) // settings.INSIGHTS_CACHE_TTL_SECONDS
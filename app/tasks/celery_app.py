@@ -1,12 +1,20 @@
+import logging
+import os
+import time
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_prerun, task_postrun, worker_process_shutdown
 from app.core.config import settings
+from app.core.metrics import TASK_SECONDS, mark_process_dead
+from app.db.query_stats import begin_tracking, end_tracking, warn_on_repeats
+
+logger = logging.getLogger(__name__)
 
 celery_app = Celery(
     'social_bot',
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=['app.tasks.follower_tasks']
+    include=['app.tasks.follower_tasks', 'app.tasks.history_tasks', 'app.tasks.notification_tasks']
 )
 
 celery_app.conf.update(
@@ -20,6 +28,55 @@ celery_app.conf.update(
 celery_app.conf.beat_schedule = {
     'check-follower-counts': {
         'task': 'app.tasks.follower_tasks.check_all_profiles',
-        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+        # Dispatches only accounts whose adaptive next check time has passed
+        'schedule': settings.CHECK_DISPATCH_INTERVAL_SECONDS,
+    },
+    'dispatch-notifications': {
+        'task': 'app.tasks.notification_tasks.dispatch_pending_notifications',
+        'schedule': settings.NOTIFICATION_DISPATCH_INTERVAL_SECONDS,
+    },
+    'rollup-follower-history': {
+        'task': 'app.tasks.history_tasks.rollup_history',
+        'schedule': crontab(minute='*/5'),
+    },
+    'prune-follower-history': {
+        'task': 'app.tasks.history_tasks.prune_history',
+        'schedule': crontab(minute=30),  # Hourly
+    },
+    'maintain-follower-history-partitions': {
+        'task': 'app.tasks.history_tasks.maintain_partitions',
+        'schedule': crontab(hour=0, minute=15),  # Daily
     },
 }
+
+# Task start times by task id, for celery_task_seconds
+_task_started = {}
+# (QueryStats, context token) by task id, with QUERY_STATS_ENABLED
+_task_queries = {}
+
+
+@task_prerun.connect
+def _start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    if settings.QUERY_STATS_ENABLED:
+        _task_queries[task_id] = begin_tracking()
+
+
+@task_postrun.connect
+def _observe_task_time(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+    tracked = _task_queries.pop(task_id, None)
+    if tracked is not None:
+        stats, token = tracked
+        end_tracking(token)
+        logger.info(
+            f"task={task.name} queries={stats.statements} commits={stats.commits} db_ms={stats.seconds * 1000:.1f}"
+        )
+        warn_on_repeats(stats, task.name)
+
+
+@worker_process_shutdown.connect
+def _drop_worker_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
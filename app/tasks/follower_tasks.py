@@ -1,18 +1,39 @@
 from celery import shared_task
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Dict, List, Optional
 import logging
+from app.core.config import settings
+from app.core.metrics import CHECK_DB_SECONDS, FOLLOWER_FETCH_SECONDS, CHECK_DUE_ACCOUNTS, CHECK_OVERDUE_SECONDS
 from app.db.database import SessionLocal
-from app.models import Profile, FollowerHistory, Alert
-from app.services.mock_social_api import mock_api
+from app.models import Profile, CheckCycle
+from app.models.alert_thresholds import refresh_alert_thresholds
+from app.services.async_checks import run_check_cycle
+from app.services.check_cycles import (
+    begin_cycle, finish_cycle, has_unchecked_accounts, is_stale, record_cycle_progress, resume_cycle, running_cycle
+)
+from app.services.follower_checks import (
+    apply_account_counts, fetch_account_counts, lease_accounts, reschedule_failed_accounts
+)
+from app.services.hot_state import repopulate_hot_state
+from app.services.mock_social_api import mock_api, async_mock_api
+from app.services.scheduling import claim_due_accounts, oldest_due_at
 from app.services.telegram_service import telegram_service
+from app.services.tracked_accounts import get_or_create_tracked_account, link_untracked_profiles
 
 logger = logging.getLogger(__name__)
 
 
 @shared_task
-def check_profile_followers(profile_id: int):
-    """Check follower count for a specific profile"""
+def check_profile_followers(profile_id: int, cycle_id: Optional[int] = None):
+    """Check follower count for a specific profile.
+
+    The count is stored on the profile's tracked account and fanned out to every
+    profile tracking the same account, so all users see the same number. Skipped
+    if another check holds the account's lease.
+    """
     db = SessionLocal()
     try:
         profile = db.query(Profile).filter(Profile.id == profile_id).first()
@@ -20,61 +41,261 @@ def check_profile_followers(profile_id: int):
             logger.error(f"Profile {profile_id} not found")
             return
 
-        # Get current follower count from mock API
-        new_follower_count = mock_api.get_follower_count(
-            profile.platform,
-            profile.username
-        )
+        if profile.tracked_account_id is None:
+            profile.tracked_account = get_or_create_tracked_account(db, profile.platform, profile.username)
+            db.flush()
 
-        # Record history
-        history = FollowerHistory(
-            profile_id=profile.id,
-            follower_count=new_follower_count
-        )
-        db.add(history)
+        accounts = lease_accounts(db, [profile.tracked_account_id])
+        db.commit()
+        if not accounts:
+            logger.info(f"Profile {profile_id}'s account is already being checked")
+            return
+
+        # Get current follower count from mock API
+        with FOLLOWER_FETCH_SECONDS.labels(profile.platform).time():
+            new_follower_count = mock_api.get_follower_count(
+                profile.platform,
+                profile.username
+            )
 
-        # Update profile
         old_count = profile.current_follower_count
-        profile.current_follower_count = new_follower_count
+        with CHECK_DB_SECONDS.labels("check_profile_followers").time():
+            apply_account_counts(db, accounts, {profile.tracked_account_id: new_follower_count})
+            record_cycle_progress(db, cycle_id, 1, 0, datetime.utcnow())
+            db.commit()
+        logger.info(f"Updated profile {profile.username}: {old_count} -> {new_follower_count}")
 
-        # Check alerts
-        alerts = db.query(Alert).filter(
-            Alert.profile_id == profile.id,
-            Alert.is_active == True,
-            Alert.triggered == False
-        ).all()
+    except Exception as e:
+        logger.error(f"Error checking profile {profile_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
 
-        for alert in alerts:
-            if old_count < alert.threshold <= new_follower_count:
-                alert.triggered = True
-                alert.triggered_at = datetime.utcnow()
 
-                # Send notification
-                message = f"🎉 Milestone reached! @{profile.username} on {profile.platform} has reached {alert.threshold} followers!"
+@shared_task
+def check_accounts_batch(account_ids: List[int], cycle_id: Optional[int] = None):
+    """Fetch a chunk of tracked accounts once each and fan the counts out in a single transaction.
 
-                logger.info(f"Alert triggered for profile {profile.username}: {message}")
+    Accounts whose lease another check holds are skipped.
+    """
+    db = SessionLocal()
+    try:
+        accounts = lease_accounts(db, account_ids)
+        db.commit()
+        if not accounts:
+            return
 
+        counts, errors = fetch_account_counts(mock_api, accounts)
+        with CHECK_DB_SECONDS.labels("check_accounts_batch").time():
+            triggered = apply_account_counts(db, accounts, counts)
+            reschedule_failed_accounts(db, list(errors))
+            record_cycle_progress(db, cycle_id, len(counts), len(errors), datetime.utcnow())
+            db.commit()
+        for account_id, error in errors.items():
+            logger.warning(f"Follower lookup failed for account {account_id}: {error}")
+        logger.info(
+            f"Checked {len(counts)}/{len(accounts)} accounts in batch, "
+            f"{len(errors)} failed, {len(account_ids) - len(accounts)} already being checked, "
+            f"{triggered} alerts triggered"
+        )
+        return {"fetched": len(counts), "failed": len(errors), "alerts_triggered": triggered}
+
+    except Exception as e:
+        logger.error(f"Error checking account batch {account_ids[:1]}..{account_ids[-1:]}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@shared_task
+def check_profiles_batch(profile_ids: List[int], cycle_id: Optional[int] = None):
+    """Check the tracked accounts behind a chunk of profiles, linking any of them not tracked yet.
+
+    Check cycles dispatch tracked accounts, so this is for checks of chosen
+    profiles outside one; `cycle_id` is passed on to `check_accounts_batch`
+    for callers that do run it within a cycle.
+    """
+    db = SessionLocal()
+    try:
+        link_untracked_profiles(db, profile_ids)
         db.commit()
-        logger.info(f"Updated profile {profile.username}: {old_count} -> {new_follower_count}")
 
+        account_ids = db.scalars(
+            select(Profile.tracked_account_id)
+            .where(Profile.id.in_(profile_ids), Profile.tracked_account_id.is_not(None))
+            .distinct()
+        ).all()
+    finally:
+        db.close()
+
+    if account_ids:
+        check_accounts_batch(list(account_ids), cycle_id=cycle_id)
+
+
+@shared_task
+def check_accounts_async(account_ids: List[int], cycle_id: Optional[int] = None):
+    """Check the given accounts in this worker using concurrent async lookups"""
+    db = SessionLocal()
+    try:
+        stats = run_check_cycle(
+            db,
+            async_mock_api,
+            account_ids,
+            batch_size=settings.CHECK_BATCH_SIZE,
+            concurrency_per_platform=settings.FETCH_CONCURRENCY_PER_PLATFORM,
+            cycle_id=cycle_id
+        )
+        logger.info(f"Async check cycle finished: {stats}")
+        return stats
     except Exception as e:
-        logger.error(f"Error checking profile {profile_id}: {e}")
+        logger.error(f"Error running async check cycle: {e}")
         db.rollback()
     finally:
         db.close()
 
 
+def check_queue(account_id: int) -> Optional[str]:
+    """The queue for an account's checks: a fixed shard by account id, or None for the default queue"""
+    shards = settings.CHECK_QUEUE_SHARDS
+    return f"checks.{account_id % shards}" if shards > 1 else None
+
+
+@contextmanager
+def _producer(task):
+    """One pooled broker connection for a whole dispatch, rather than a checkout per message"""
+    if task.app.conf.task_always_eager:
+        yield None
+    else:
+        with task.app.producer_or_acquire() as producer:
+            yield producer
+
+
+def _dispatch_cycle(db, cycle: CheckCycle, now: datetime) -> int:
+    """Claim due accounts page by page from the cycle's cursor and publish their checks.
+
+    Each page is claimed and committed, its checks published (split by shard
+    queue in "batch" and "async" modes), then the cursor is moved past it. A
+    crash between the two leaves the page at claimed_until, so resuming
+    claims and sends it again. Returns how many accounts were claimed.
+    """
+    mode = settings.CHECK_MODE
+    task = {"batch": check_accounts_batch, "async": check_accounts_async}.get(mode, check_profile_followers)
+    chunk_size = settings.CHECK_BATCH_SIZE if mode == "batch" else settings.CHECK_DISPATCH_PAGE_SIZE
+    cycle_id = cycle.id
+    pages = claim_due_accounts(db, now, cycle.claimed_until, cycle.cursor, settings.CHECK_DISPATCH_PAGE_SIZE)
+    claimed = 0
+
+    with _producer(task) as producer:
+        for account_ids in pages:
+            db.commit()
+            published = 0
+            if task is check_profile_followers:
+                # One representative profile per account; its check fans out to the others
+                for account_id, profile_id in db.execute(
+                    select(Profile.tracked_account_id, func.min(Profile.id))
+                    .where(Profile.tracked_account_id.in_(account_ids))
+                    .group_by(Profile.tracked_account_id)
+                ).all():
+                    task.apply_async(
+                        args=[profile_id], kwargs={"cycle_id": cycle_id},
+                        queue=check_queue(account_id), producer=producer
+                    )
+                    published += 1
+            else:
+                by_queue: Dict[Optional[str], List[int]] = defaultdict(list)
+                for account_id in account_ids:
+                    by_queue[check_queue(account_id)].append(account_id)
+                for queue, queued_ids in by_queue.items():
+                    for start in range(0, len(queued_ids), chunk_size):
+                        task.apply_async(
+                            args=[queued_ids[start:start + chunk_size]], kwargs={"cycle_id": cycle_id},
+                            queue=queue, producer=producer
+                        )
+                        published += 1
+
+            cycle.cursor = account_ids[-1]
+            cycle.accounts_claimed += len(account_ids)
+            cycle.chunks_published += published
+            cycle.heartbeat_at = datetime.utcnow()
+            db.commit()
+            claimed += len(account_ids)
+    return claimed
+
+
 @shared_task
 def check_all_profiles():
-    """Check all active profiles for follower updates"""
+    """Dispatch checks for every tracked account that is due, as one check cycle.
+
+    While the previous cycle still has unchecked accounts this dispatch is
+    skipped, so cycles never overlap; a cycle that stopped making progress is
+    resumed from its cursor instead.
+    """
     db = SessionLocal()
     try:
-        profiles = db.query(Profile).all()
-        for profile in profiles:
-            check_profile_followers.delay(profile.id)
+        link_untracked_profiles(db)
+        now = datetime.utcnow()
+        oldest = oldest_due_at(db, now)
+        db.commit()
+
+        cycle = running_cycle(db)
+        if cycle is not None and cycle.dispatched_at is not None and not has_unchecked_accounts(db, cycle):
+            finish_cycle(cycle, now)
+            db.commit()
+            cycle = None
+        if cycle is not None:
+            if not is_stale(cycle, now):
+                logger.info(f"Check cycle {cycle.id} is still running; skipping this dispatch")
+                return
+            logger.warning(f"Check cycle {cycle.id} stopped making progress; resuming after account {cycle.cursor}")
+            resume_cycle(cycle, now)
+        else:
+            cycle = begin_cycle(db, now)
+            if cycle is None:
+                logger.info("Another dispatch started a check cycle; skipping this one")
+                return
+        db.commit()
 
-        logger.info(f"Scheduled checks for {len(profiles)} profiles")
+        claimed = _dispatch_cycle(db, cycle, now)
+        cycle.dispatched_at = datetime.utcnow()
+        if not has_unchecked_accounts(db, cycle):
+            finish_cycle(cycle, cycle.dispatched_at)
+        db.commit()
+        CHECK_DUE_ACCOUNTS.set(claimed)
+        CHECK_OVERDUE_SECONDS.set((now - oldest).total_seconds() if oldest else 0)
+        logger.info(f"Check cycle {cycle.id}: scheduled checks for {claimed} due tracked accounts")
     except Exception as e:
         logger.error(f"Error scheduling profile checks: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@shared_task
+def refresh_all_alert_thresholds():
+    """Rebuild every profile's pending-threshold band, e.g. after importing alerts outside the ORM"""
+    db = SessionLocal()
+    try:
+        refresh_alert_thresholds(db)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error refreshing alert thresholds: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@shared_task
+def rebuild_hot_state():
+    """Repopulate the hot state from Postgres, e.g. after Redis was flushed or restarted empty.
+
+    celery -A app.tasks.celery_app call app.tasks.follower_tasks.rebuild_hot_state
+    """
+    db = SessionLocal()
+    try:
+        loaded = repopulate_hot_state(db)
+        logger.info(f"Rebuilt hot state for {loaded} profiles")
+        return loaded
+    except Exception as e:
+        logger.error(f"Error rebuilding hot state: {e}")
     finally:
         db.close()
@@ -0,0 +1,68 @@
+from celery import shared_task
+import logging
+from app.db.database import SessionLocal
+from app.services.history import (
+    rollup_follower_history, prune_follower_history, maintain_history_partitions, compact_follower_history
+)
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rollup_history():
+    """Fold new follower_history rows into the hourly and daily rollups"""
+    db = SessionLocal()
+    try:
+        processed = rollup_follower_history(db)
+        logger.info(f"Rolled up {processed} follower history rows")
+        return processed
+    except Exception as e:
+        logger.error(f"Error rolling up follower history: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@shared_task
+def prune_history():
+    """Delete follower history past its retention window"""
+    db = SessionLocal()
+    try:
+        deleted = prune_follower_history(db)
+        logger.info(f"Pruned follower history: {deleted}")
+        return deleted
+    except Exception as e:
+        logger.error(f"Error pruning follower history: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@shared_task
+def maintain_partitions():
+    """Create upcoming follower_history partitions and drop expired ones"""
+    db = SessionLocal()
+    try:
+        changes = maintain_history_partitions(db)
+        logger.info(f"Follower history partitions: {changes}")
+        return changes
+    except Exception as e:
+        logger.error(f"Error maintaining follower history partitions: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@shared_task
+def compact_history():
+    """One-off: collapse runs of unchanged follower history samples into their first row"""
+    db = SessionLocal()
+    try:
+        stats = compact_follower_history(db)
+        logger.info(f"Compacted follower history: {stats}")
+        return stats
+    except Exception as e:
+        logger.error(f"Error compacting follower history: {e}")
+        db.rollback()
+    finally:
+        db.close()
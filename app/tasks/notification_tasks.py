@@ -0,0 +1,34 @@
+from celery import shared_task
+import logging
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services.notifications import RateLimiter, dispatch_notifications
+from app.services.telegram_service import telegram_service
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def dispatch_pending_notifications():
+    """Drain due rows from the notification outbox, NOTIFICATION_BATCH_SIZE at a time"""
+    if telegram_service.bot is None:
+        logger.warning("Telegram bot not initialized, leaving notifications in the outbox")
+        return
+
+    limiter = RateLimiter(settings.TELEGRAM_GLOBAL_RATE_PER_SECOND, settings.TELEGRAM_CHAT_MIN_INTERVAL_SECONDS)
+    totals = {}
+    db = SessionLocal()
+    try:
+        for _ in range(settings.NOTIFICATION_MAX_BATCHES):
+            stats = dispatch_notifications(db, telegram_service.bot, limiter)
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+            if stats["claimed"] < settings.NOTIFICATION_BATCH_SIZE:
+                break
+        logger.info(f"Dispatched notifications: {totals}")
+        return totals
+    except Exception as e:
+        logger.error(f"Error dispatching notifications: {e}")
+        db.rollback()
+    finally:
+        db.close()
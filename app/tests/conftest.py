@@ -1,9 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.db.database import Base, get_db
+from app.db.database import Base, get_db, get_async_db, get_async_session_factory
+from app.core.cache import get_cache
 from app.core.config import settings
 from app.models import User
 from app.core.security import get_password_hash
@@ -16,6 +19,10 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient may run each request on a fresh event loop, so async connections aren't pooled
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def override_get_db():
     try:
@@ -25,9 +32,15 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="function")
 def db():
     Base.metadata.create_all(bind=engine)
+    get_cache().clear()
     yield TestingSessionLocal()
     Base.metadata.drop_all(bind=engine)
 
@@ -35,9 +48,24 @@ def db():
 @pytest.fixture(scope="function")
 def client(db):
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_session_factory] = lambda: TestingAsyncSessionLocal
     yield TestClient(app)
 
 
+@pytest.fixture
+def enforce_foreign_keys():
+    """SQLite skips foreign key checks unless asked, per connection; Postgres always enforces them"""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(async_engine.sync_engine, "connect", on_connect)
+    yield
+    event.remove(async_engine.sync_engine, "connect", on_connect)
+
+
 @pytest.fixture
 def test_user(db):
     user = User(
@@ -55,3 +83,10 @@ def auth_headers():
     from base64 import b64encode
     credentials = b64encode(b"testuser:testpassword").decode("ascii")
     return {"Authorization": f"Basic {credentials}"}
+
+
+@pytest.fixture
+def query_budget():
+    """`with query_budget(n):` fails the test if the block runs more than n statements or an N+1 loop"""
+    from app.db.query_stats import query_budget
+    return query_budget
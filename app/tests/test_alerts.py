@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.models import Profile, Alert
 
 
 def test_create_alert(client: TestClient, test_user, auth_headers):
@@ -79,6 +80,32 @@ def test_get_alerts(client: TestClient, test_user, auth_headers):
     assert {a["threshold"] for a in data} == {1000, 5000}
 
 
+def test_get_alerts_filtered_and_paginated(client: TestClient, db, test_user, auth_headers):
+    profile = Profile(user_id=test_user.id, platform="twitter", username="test_handle")
+    db.add(profile)
+    db.commit()
+    db.add_all([
+        Alert(user_id=test_user.id, profile_id=profile.id, threshold=threshold, triggered=threshold <= 2000)
+        for threshold in (1000, 2000, 3000, 4000, 5000)
+    ])
+    db.commit()
+
+    response = client.get("/api/v1/alerts/", params={"triggered": False, "limit": 2}, headers=auth_headers)
+    assert [a["threshold"] for a in response.json()] == [3000, 4000]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(
+        "/api/v1/alerts/", params={"triggered": False, "limit": 2, "cursor": cursor}, headers=auth_headers
+    )
+    assert [a["threshold"] for a in response.json()] == [5000]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get(
+        "/api/v1/alerts/", params={"min_threshold": 2000, "max_threshold": 3000}, headers=auth_headers
+    )
+    assert [a["threshold"] for a in response.json()] == [2000, 3000]
+
+
 def test_update_alert(client: TestClient, test_user, auth_headers):
     # Create profile and alert
     response = client.post(
@@ -130,3 +157,55 @@ def test_delete_alert(client: TestClient, test_user, auth_headers):
     # Verify deletion
     response = client.get(f"/api/v1/alerts/{alert_id}", headers=auth_headers)
     assert response.status_code == 404
+
+
+def test_alert_changes_maintain_profile_thresholds(client: TestClient, db, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/profiles/",
+        json={"platform": "twitter", "username": "test_handle"},
+        headers=auth_headers
+    )
+    profile_id = response.json()["id"]
+
+    def thresholds():
+        db.expire_all()
+        profile = db.query(Profile).filter(Profile.id == profile_id).first()
+        return profile.prev_alert_threshold, profile.next_alert_threshold
+
+    low = client.post(
+        "/api/v1/alerts/",
+        json={"profile_id": profile_id, "threshold": 1000},
+        headers=auth_headers
+    ).json()["id"]
+    client.post(
+        "/api/v1/alerts/",
+        json={"profile_id": profile_id, "threshold": 5000},
+        headers=auth_headers
+    )
+    assert thresholds() == (None, 1000)
+
+    client.put(f"/api/v1/alerts/{low}", json={"is_active": False}, headers=auth_headers)
+    assert thresholds() == (None, 5000)
+
+    client.put(f"/api/v1/alerts/{low}", json={"is_active": True, "threshold": 2000}, headers=auth_headers)
+    assert thresholds() == (None, 2000)
+
+    client.delete(f"/api/v1/alerts/{low}", headers=auth_headers)
+    assert thresholds() == (None, 5000)
+
+
+def test_alert_reads_answer_conditional_gets(client: TestClient, test_user, auth_headers):
+    profile_id = client.post(
+        "/api/v1/profiles/", json={"platform": "twitter", "username": "test_handle"}, headers=auth_headers
+    ).json()["id"]
+    alert_id = client.post(
+        "/api/v1/alerts/", json={"profile_id": profile_id, "threshold": 1000}, headers=auth_headers
+    ).json()["id"]
+
+    etag = client.get("/api/v1/alerts/", headers=auth_headers).headers["ETag"]
+    assert client.get("/api/v1/alerts/", headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    client.put(f"/api/v1/alerts/{alert_id}", json={"is_active": False}, headers=auth_headers)
+    response = client.get("/api/v1/alerts/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["is_active"] is False
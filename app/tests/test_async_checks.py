@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.config import settings
+from app.models import Profile, FollowerHistory, TrackedAccount
+from app.services.async_checks import fetch_follower_counts
+from app.services.mock_social_api import MockSocialMediaAPI, AsyncMockSocialMediaAPI
+from app.services.social_api import AsyncSocialMediaAPI
+from app.tasks.follower_tasks import check_accounts_async, check_all_profiles
+
+
+class ConcurrencyProbeAPI(AsyncSocialMediaAPI):
+    def __init__(self):
+        self.in_flight = {}
+        self.max_in_flight = {}
+
+    async def get_follower_count(self, platform: str, username: str) -> int:
+        self.in_flight[platform] = self.in_flight.get(platform, 0) + 1
+        self.max_in_flight[platform] = max(self.max_in_flight.get(platform, 0), self.in_flight[platform])
+        await asyncio.sleep(0.01)
+        self.in_flight[platform] -= 1
+        if username == "broken":
+            raise RuntimeError("lookup failed")
+        return len(username)
+
+
+def test_fetch_respects_per_platform_concurrency():
+    accounts = [
+        SimpleNamespace(id=i, platform=platform, username=f"user_{i}")
+        for i, platform in enumerate(["twitter", "instagram"] * 10)
+    ]
+    accounts.append(SimpleNamespace(id=99, platform="twitter", username="broken"))
+    api = ConcurrencyProbeAPI()
+
+    # One account per request so every lookup competes for the semaphore
+    with patch.dict(settings.PLATFORM_BATCH_SIZES, {"twitter": 1, "instagram": 1}):
+        counts, errors = asyncio.run(fetch_follower_counts(api, accounts, concurrency_per_platform=3))
+
+    assert api.max_in_flight == {"twitter": 3, "instagram": 3}
+    assert len(counts) == 20
+    assert counts[0] == len("user_0")
+    assert list(errors) == [99]
+
+
+def test_async_check_cycle(db, test_user):
+    db.add_all([
+        Profile(user_id=test_user.id, platform="twitter", username=f"handle_{i}")
+        for i in range(4)
+    ])
+    db.commit()
+
+    source = MockSocialMediaAPI()
+    api = AsyncMockSocialMediaAPI(source, min_latency_ms=1, max_latency_ms=5)
+
+    with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.check_accounts_async') as mock_async, \
+            patch.object(settings, 'CHECK_MODE', "async"):
+        mock_session.return_value = db
+        check_all_profiles()
+        account_ids = mock_async.apply_async.call_args.kwargs["args"][0]
+
+    with patch.object(source, 'get_follower_count', side_effect=lambda platform, username: 1000 + int(username[-1])), \
+            patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.async_mock_api', api):
+        mock_session.return_value = db
+        stats = check_accounts_async(account_ids)
+
+    assert stats["accounts"] == 4
+    assert stats["fetched"] == 4
+    assert db.query(TrackedAccount).count() == 4
+    assert db.query(FollowerHistory).count() == 4
+    assert sorted(p.current_follower_count for p in db.query(Profile).all()) == [1000, 1001, 1002, 1003]
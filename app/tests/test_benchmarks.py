@@ -0,0 +1,39 @@
+import json
+from app.benchmarks.api_load import main as main_api_load
+from app.benchmarks.check_cycle import main
+
+
+def test_check_cycle_benchmark_reports_results(tmp_path):
+    output = tmp_path / "batch.json"
+    url = f"sqlite:///{tmp_path / 'bench.db'}"
+    report = main([
+        "--database-url", url, "--users", "3", "--profiles-per-user", "4",
+        "--history-per-profile", "2", "--mode", "batch", "--output", str(output)
+    ])
+
+    assert report["seeded"]["profiles"] == 12
+    results = json.loads(output.read_text())["results"]
+    assert results["profiles_checked"] == 12
+    assert results["queries"] > 0 and results["commits"] >= 1
+    assert results["latency_p99_ms"] >= results["latency_p50_ms"] > 0
+
+    rerun = main([
+        "--database-url", url, "--reset", "--users", "3", "--profiles-per-user", "4",
+        "--mode", "single", "--baseline", str(output)
+    ])
+    assert rerun["results"]["profiles_checked"] == 12
+    assert rerun["vs_baseline"]["profiles_checked"] == 1.0
+
+
+def test_api_load_reports_per_route_percentiles(tmp_path):
+    report = main_api_load([
+        "--database-url", f"sqlite:///{tmp_path / 'api.db'}", "--users", "2", "--profiles-per-user", "2",
+        "--history-per-profile", "2", "--concurrency", "2", "--requests", "20",
+        "--mix", "list_profiles=1,profile_insights=1,create_alert=1"
+    ])
+
+    assert report["results"]["requests"] == 20
+    assert report["results"]["errors"] == 0
+    assert set(report["routes"]) <= {"GET /profiles/", "GET /profiles/{id}/insights", "POST /alerts/"}
+    for stats in report["routes"].values():
+        assert stats["p99_ms"] >= stats["p95_ms"] >= stats["p50_ms"] > 0
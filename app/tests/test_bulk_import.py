@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+from app.models import Profile, Alert, TrackedAccount
+
+
+def test_bulk_create_profiles(client: TestClient, db, test_user, auth_headers):
+    client.post("/api/v1/profiles/", json={"platform": "twitter", "username": "existing"}, headers=auth_headers)
+
+    response = client.post(
+        "/api/v1/profiles/bulk",
+        json={"profiles": [
+            {"platform": "twitter", "username": "new_one", "alert_thresholds": [1000, 5000, 1000]},
+            {"platform": "instagram", "username": "new_two"},
+            {"platform": "twitter", "username": "existing", "alert_thresholds": [2000]},
+            {"platform": "twitter", "username": "new_one"},
+        ]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["skipped"] == 2
+    assert data["alerts_created"] == 3
+    assert [item["status"] for item in data["items"]] == ["created", "created", "exists", "duplicate"]
+    assert len(data["items"][0]["alert_ids"]) == 2
+
+    assert db.query(Profile).count() == 3
+    assert db.query(TrackedAccount).count() == 3
+    new_one = db.query(Profile).filter(Profile.username == "new_one").one()
+    assert new_one.tracked_account_id is not None
+    assert new_one.next_alert_threshold == 1000
+    assert {a.threshold for a in db.query(Alert).filter(Alert.profile_id == new_one.id)} == {1000, 5000}
+
+
+def test_bulk_create_alerts(client: TestClient, db, test_user, auth_headers):
+    profile_id = client.post(
+        "/api/v1/profiles/", json={"platform": "twitter", "username": "handle"}, headers=auth_headers
+    ).json()["id"]
+    client.post("/api/v1/alerts/", json={"profile_id": profile_id, "threshold": 1000}, headers=auth_headers)
+
+    response = client.post(
+        "/api/v1/alerts/bulk",
+        json={"alerts": [
+            {"profile_id": profile_id, "threshold": 1000},
+            {"profile_id": profile_id, "threshold": 3000},
+            {"profile_id": profile_id, "threshold": 2000},
+            {"profile_id": profile_id, "threshold": 3000},
+            {"profile_id": 999, "threshold": 1000},
+        ]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data["items"]] == ["exists", "created", "created", "duplicate", "not_found"]
+    assert data["alerts_created"] == 2
+
+    created = {a.id: a.threshold for a in db.query(Alert).filter(Alert.profile_id == profile_id)}
+    assert created[data["items"][1]["alert_ids"][0]] == 3000
+    assert created[data["items"][2]["alert_ids"][0]] == 2000
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from app.tasks.follower_tasks import check_profile_followers
-from app.models import Profile, Alert, FollowerHistory
+from app.tasks.follower_tasks import check_profile_followers, check_profiles_batch, check_all_profiles, check_accounts_batch
+from app.models import User, Profile, Alert, FollowerHistory, TrackedAccount
 from app.services.mock_social_api import mock_api
 
 
@@ -74,3 +74,153 @@ def test_alert_triggered(db, test_user):
             updated_alert = db.query(Alert).filter(Alert.id == alert_id).first()
             assert updated_alert.triggered == True
             assert updated_alert.triggered_at is not None
+
+
+def test_check_profiles_batch(db, test_user):
+    profiles = [
+        Profile(user_id=test_user.id, platform="twitter", username=f"handle_{i}", current_follower_count=900)
+        for i in range(3)
+    ]
+    db.add_all(profiles)
+    db.commit()
+    profile_ids = [p.id for p in profiles]
+    # Not in the chunk: left for its own check
+    other = Profile(user_id=test_user.id, platform="twitter", username="other", current_follower_count=10)
+    db.add(other)
+    db.commit()
+    other_id = other.id
+
+    alert = Alert(user_id=test_user.id, profile_id=profile_ids[0], threshold=1000)
+    db.add(alert)
+    db.commit()
+    alert_id = alert.id
+
+    counts = {"handle_0": 1100, "handle_1": 950, "handle_2": 800}
+    with patch.object(mock_api, 'get_follower_count', side_effect=lambda platform, username: counts[username]):
+        with patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+            mock_session.return_value = db
+
+            check_profiles_batch(profile_ids)
+
+            updated = {p.username: p.current_follower_count for p in db.query(Profile).filter(Profile.id.in_(profile_ids))}
+            assert updated == counts
+            assert db.get(Profile, other_id).tracked_account_id is None
+
+            assert db.query(FollowerHistory).count() == 3
+
+            updated_alert = db.query(Alert).filter(Alert.id == alert_id).first()
+            assert updated_alert.triggered == True
+            assert updated_alert.triggered_at is not None
+
+
+def test_check_all_profiles_dispatches_chunks(db, test_user):
+    db.add_all([
+        Profile(user_id=test_user.id, platform="twitter", username=f"handle_{i}")
+        for i in range(5)
+    ])
+    db.commit()
+
+    with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.check_accounts_batch') as mock_batch, \
+            patch('app.tasks.follower_tasks.settings') as mock_settings:
+        mock_session.return_value = db
+        mock_settings.CHECK_MODE = "batch"
+        mock_settings.CHECK_BATCH_SIZE = 2
+        # Chunks never straddle claimed pages, so the cycle cursor only passes published accounts
+        mock_settings.CHECK_DISPATCH_PAGE_SIZE = 4
+        mock_settings.CHECK_QUEUE_SHARDS = 1
+
+        check_all_profiles()
+
+        chunks = [call.kwargs["args"][0] for call in mock_batch.apply_async.call_args_list]
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        assert {call.kwargs["queue"] for call in mock_batch.apply_async.call_args_list} == {None}
+
+
+def test_check_all_profiles_shards_by_account(db, test_user):
+    db.add_all([
+        Profile(user_id=test_user.id, platform="twitter", username=f"handle_{i}")
+        for i in range(10)
+    ])
+    db.commit()
+
+    with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.check_accounts_batch') as mock_batch, \
+            patch('app.tasks.follower_tasks.settings') as mock_settings:
+        mock_session.return_value = db
+        mock_settings.CHECK_MODE = "batch"
+        mock_settings.CHECK_BATCH_SIZE = 2
+        mock_settings.CHECK_DISPATCH_PAGE_SIZE = 4
+        mock_settings.CHECK_QUEUE_SHARDS = 3
+
+        check_all_profiles()
+
+        calls = mock_batch.apply_async.call_args_list
+        dispatched = [i for call in calls for i in call.kwargs["args"][0]]
+        assert sorted(dispatched) == sorted(a.id for a in db.query(TrackedAccount).all())
+        for call in calls:
+            assert len(call.kwargs["args"][0]) <= 2
+            assert {f"checks.{i % 3}" for i in call.kwargs["args"][0]} == {call.kwargs["queue"]}
+
+
+def test_shared_account_fetched_once(db, test_user):
+    other_user = User(username="otheruser", hashed_password="x")
+    db.add(other_user)
+    db.commit()
+
+    db.add_all([
+        Profile(user_id=test_user.id, platform="twitter", username="popular", current_follower_count=100),
+        Profile(user_id=other_user.id, platform="twitter", username="popular", current_follower_count=120),
+    ])
+    db.commit()
+
+    with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.check_accounts_batch') as mock_batch:
+        mock_session.return_value = db
+        check_all_profiles()
+        account_ids = mock_batch.apply_async.call_args.kwargs["args"][0]
+
+    assert db.query(TrackedAccount).count() == 1
+    assert len(account_ids) == 1
+
+    with patch.object(mock_api, 'get_follower_count', return_value=150) as mock_fetch:
+        with patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+            mock_session.return_value = db
+            check_accounts_batch(account_ids)
+
+        assert mock_fetch.call_count == 1
+
+    assert {p.current_follower_count for p in db.query(Profile).all()} == {150}
+    assert db.query(FollowerHistory).count() == 2
+    assert db.query(TrackedAccount).one().follower_count == 150
+
+
+def test_check_skips_alert_work_inside_threshold_band(db, test_user):
+    profile = Profile(user_id=test_user.id, platform="twitter", username="test_handle", current_follower_count=500)
+    db.add(profile)
+    db.commit()
+    profile_id = profile.id
+
+    db.add_all([
+        Alert(user_id=test_user.id, profile_id=profile_id, threshold=400),
+        Alert(user_id=test_user.id, profile_id=profile_id, threshold=1000),
+    ])
+    db.commit()
+    db.refresh(profile)
+    assert (profile.prev_alert_threshold, profile.next_alert_threshold) == (400, 1000)
+
+    with patch.object(mock_api, 'get_follower_count', return_value=700), \
+            patch('app.services.follower_checks.refresh_alert_thresholds') as mock_refresh:
+        with patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+            mock_session.return_value = db
+            check_profile_followers(profile_id)
+        mock_refresh.assert_not_called()
+
+    with patch.object(mock_api, 'get_follower_count', return_value=1200):
+        with patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+            mock_session.return_value = db
+            check_profile_followers(profile_id)
+
+    profile = db.query(Profile).filter(Profile.id == profile_id).first()
+    assert (profile.prev_alert_threshold, profile.next_alert_threshold) == (400, None)
+    assert db.query(Alert).filter(Alert.triggered == True).count() == 1
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core.config import settings
+from app.models import Profile, TrackedAccount, FollowerHistory, CheckCycle
+from app.services.follower_checks import lease_accounts
+from app.services.mock_social_api import mock_api
+from app.tasks.follower_tasks import check_all_profiles, check_accounts_batch
+
+
+def add_profiles(db, user_id, count):
+    db.add_all([Profile(user_id=user_id, platform="twitter", username=f"handle_{i}") for i in range(count)])
+    db.commit()
+
+
+def dispatch(db, fail_after=None):
+    """Run check_all_profiles with publishing mocked; returns the published chunks"""
+    published = []
+
+    def publish(args, kwargs, queue, producer):
+        if fail_after is not None and len(published) >= fail_after:
+            raise ConnectionError("broker went away")
+        published.append(args[0])
+
+    with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.check_accounts_batch') as mock_batch, \
+            patch.object(settings, 'CHECK_MODE', "batch"), \
+            patch.object(settings, 'CHECK_BATCH_SIZE', 2), \
+            patch.object(settings, 'CHECK_DISPATCH_PAGE_SIZE', 2):
+        mock_session.return_value = db
+        mock_batch.apply_async.side_effect = publish
+        check_all_profiles()
+    return published
+
+
+def run_checks(db, chunks, count=500):
+    with patch.object(mock_api, 'get_follower_count', return_value=count), \
+            patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+        mock_session.return_value = db
+        for chunk in chunks:
+            check_accounts_batch(chunk, cycle_id=db.query(CheckCycle.id).scalar())
+
+
+def stall(db):
+    cycle = db.query(CheckCycle).one()
+    cycle.heartbeat_at = datetime.utcnow() - timedelta(seconds=settings.CHECK_CYCLE_STALE_SECONDS + 1)
+    db.commit()
+
+
+def test_cycle_skips_overlapping_dispatch_until_checked(db, test_user):
+    add_profiles(db, test_user.id, 3)
+    chunks = dispatch(db)
+    assert sorted(i for chunk in chunks for i in chunk) == [1, 2, 3]
+
+    cycle = db.query(CheckCycle).one()
+    assert (cycle.status, cycle.cursor, cycle.accounts_claimed, cycle.chunks_published) == ("running", 3, 3, 2)
+    assert cycle.dispatched_at is not None
+
+    # Still running: the next beat is coalesced into it
+    assert dispatch(db) == []
+    assert db.query(CheckCycle).count() == 1
+
+    run_checks(db, chunks)
+    db.expire_all()
+    assert db.query(CheckCycle).one().accounts_checked == 3
+
+    # Every claimed account was checked, so the next dispatch finishes the cycle and starts another
+    dispatch(db)
+    cycles = db.query(CheckCycle).order_by(CheckCycle.id).all()
+    assert [c.status for c in cycles] == ["finished", "finished"]
+    assert cycles[1].accounts_claimed == 0
+
+
+def test_crashed_dispatch_resumes_from_cursor(db, test_user):
+    add_profiles(db, test_user.id, 5)
+    # Publishing fails on the second page
+    assert dispatch(db, fail_after=1) == [[1, 2]]
+    cycle = db.query(CheckCycle).one()
+    assert (cycle.status, cycle.cursor, cycle.dispatched_at) == ("running", 2, None)
+
+    # Not stale yet: skipped rather than started twice
+    assert dispatch(db) == []
+
+    stall(db)
+    # Accounts 3 and 4 were claimed but never published; they're sent on resume, 1 and 2 aren't
+    assert dispatch(db) == [[3, 4], [5]]
+    db.expire_all()
+    cycle = db.query(CheckCycle).one()
+    assert (cycle.resumes, cycle.cursor, cycle.accounts_claimed) == (1, 5, 5)
+
+
+def test_stalled_cycle_redispatches_unchecked_accounts(db, test_user):
+    add_profiles(db, test_user.id, 4)
+    chunks = dispatch(db)
+    # The worker holding the second chunk died
+    run_checks(db, chunks[:1])
+
+    stall(db)
+    assert dispatch(db) == [[3, 4]]
+    run_checks(db, [[3, 4]])
+
+    dispatch(db)
+    assert db.query(CheckCycle).order_by(CheckCycle.id).first().status == "finished"
+    assert db.query(FollowerHistory).count() == 4
+
+
+def test_lease_allows_one_check_per_account(db, test_user):
+    add_profiles(db, test_user.id, 2)
+    dispatch(db)
+    now = datetime.utcnow()
+
+    assert [a.id for a in lease_accounts(db, [1], now)] == [1]
+    db.commit()
+    # A second check of account 1 (e.g. a redelivered message) only gets account 2
+    assert [a.id for a in lease_accounts(db, [1, 2], now)] == [2]
+    db.rollback()
+    # Abandoned leases lapse
+    later = now + timedelta(seconds=settings.CHECK_LEASE_SECONDS)
+    assert [a.id for a in lease_accounts(db, [1], later)] == [1]
+    db.rollback()
+
+    run_checks(db, [[1, 2]])
+    assert {p.current_follower_count for p in db.query(Profile).all()} == {0, 500}
+    assert db.query(FollowerHistory).count() == 1
+    assert db.query(TrackedAccount).filter(TrackedAccount.id == 2).one().lease_expires_at is None
@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.models import Profile, FollowerHistory
+
+
+def seed_history(db, user):
+    now = datetime.utcnow()
+    profiles = [
+        Profile(user_id=user.id, platform="twitter", username="first"),
+        Profile(user_id=user.id, platform="instagram", username="second"),
+    ]
+    db.add_all(profiles)
+    db.commit()
+    db.add_all([
+        FollowerHistory(profile_id=profile.id, follower_count=100 * (i + 1), recorded_at=now - timedelta(hours=3 - i))
+        for profile in profiles
+        for i in range(3)
+    ])
+    db.commit()
+    return [profile.id for profile in profiles], now
+
+
+def test_export_history_ndjson(client: TestClient, db, test_user, auth_headers):
+    profile_ids, _ = seed_history(db, test_user)
+
+    response = client.get("/api/v1/exports/history", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 6
+    assert [row["profile_id"] for row in rows] == [profile_ids[0]] * 3 + [profile_ids[1]] * 3
+    assert [row["follower_count"] for row in rows[:3]] == [100, 200, 300]
+    assert rows[3]["username"] == "second"
+
+
+def test_export_history_csv_for_profile_and_range(client: TestClient, db, test_user, auth_headers):
+    profile_ids, now = seed_history(db, test_user)
+
+    response = client.get(
+        "/api/v1/exports/history",
+        params={"format": "csv", "profile_id": profile_ids[1], "start": (now - timedelta(hours=2, minutes=30)).isoformat()},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["follower_count"]) for row in rows] == [200, 300]
+    assert {row["platform"] for row in rows} == {"instagram"}
+
+
+def test_export_history_empty_csv_has_header(client: TestClient, test_user, auth_headers):
+    response = client.get("/api/v1/exports/history", params={"format": "csv"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.text.strip() == "profile_id,platform,username,follower_count,recorded_at,confirmed_at"
+
+
+def test_export_history_unknown_profile(client: TestClient, test_user, auth_headers):
+    response = client.get("/api/v1/exports/history", params={"profile_id": 999}, headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,197 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from sqlalchemy import select
+from app.core.config import settings
+from app.models import Profile, FollowerHistory, FollowerHistoryHourly, FollowerHistoryDaily, RollupWatermark
+from app.services.follower_checks import apply_follower_counts
+from app.services.history import (
+    rollup_follower_history, prune_follower_history, choose_resolution, compact_follower_history
+)
+
+NOW = datetime(2025, 6, 15, 12, 30)
+
+
+@pytest.fixture
+def profile(db, test_user):
+    profile = Profile(user_id=test_user.id, platform="twitter", username="test_handle")
+    db.add(profile)
+    db.commit()
+    return profile
+
+
+def add_samples(db, profile_id, samples):
+    db.add_all([
+        FollowerHistory(profile_id=profile_id, follower_count=count, recorded_at=recorded_at)
+        for recorded_at, count in samples
+    ])
+    db.commit()
+
+
+def test_rollup_is_incremental(db, profile):
+    base = datetime(2025, 6, 15, 10, 0)
+    add_samples(db, profile.id, [
+        (base + timedelta(minutes=5), 100),
+        (base + timedelta(minutes=10), 90),
+        (base + timedelta(minutes=15), 120),
+    ])
+    assert rollup_follower_history(db, now=NOW) == 3
+
+    add_samples(db, profile.id, [
+        (base + timedelta(minutes=20), 110),
+        (base + timedelta(minutes=65), 130),
+        # Too recent: left for the next run
+        (NOW - timedelta(seconds=10), 140),
+    ])
+    assert rollup_follower_history(db, now=NOW) == 2
+    assert rollup_follower_history(db, now=NOW) == 0
+
+    hourly = db.query(FollowerHistoryHourly).order_by(FollowerHistoryHourly.bucket_start).all()
+    assert [(h.bucket_start.hour, h.min_count, h.max_count, h.first_count, h.last_count, h.sample_count)
+            for h in hourly] == [(10, 90, 120, 100, 110, 4), (11, 130, 130, 130, 130, 1)]
+
+    daily = db.query(FollowerHistoryDaily).one()
+    assert (daily.min_count, daily.max_count, daily.first_count, daily.last_count, daily.sample_count) == \
+        (90, 130, 100, 130, 5)
+
+
+def test_prune_keeps_rows_not_yet_rolled_up(db, profile):
+    old = NOW - timedelta(days=settings.HISTORY_RAW_RETENTION_DAYS + 1)
+    add_samples(db, profile.id, [(old, 100), (old + timedelta(minutes=5), 105)])
+
+    assert prune_follower_history(db, now=NOW)["raw"] == 0
+
+    rollup_follower_history(db, now=NOW)
+    with patch.object(settings, 'HISTORY_PRUNE_BATCH_SIZE', 1):
+        assert prune_follower_history(db, now=NOW)["raw"] == 1
+
+    # The newest row is the profile's current count, however old
+    assert db.query(FollowerHistory.follower_count).scalar() == 105
+    assert db.query(FollowerHistoryHourly).count() == 1
+
+
+def test_prune_keeps_rows_confirmed_within_retention(db, profile):
+    old = NOW - timedelta(days=settings.HISTORY_RAW_RETENTION_DAYS + 10)
+    db.add_all([
+        FollowerHistory(profile_id=profile.id, follower_count=100, recorded_at=old,
+                        confirmed_at=old + timedelta(days=1)),
+        # Stable since before the cutoff, and seen by a check yesterday
+        FollowerHistory(profile_id=profile.id, follower_count=105, recorded_at=old + timedelta(days=2),
+                        confirmed_at=NOW - timedelta(days=1)),
+        FollowerHistory(profile_id=profile.id, follower_count=110, recorded_at=NOW - timedelta(hours=12)),
+    ])
+    db.commit()
+    rollup_follower_history(db, now=NOW)
+
+    assert prune_follower_history(db, now=NOW)["raw"] == 1
+    assert [h.follower_count for h in db.query(FollowerHistory).order_by(FollowerHistory.recorded_at)] == [105, 110]
+
+
+def test_orphaned_history_does_not_stall_rollups(db, profile, test_user):
+    old = NOW - timedelta(days=1)
+    add_samples(db, profile.id, [(old, 100)])
+    # Left behind by a profile delete before its raw history was deleted with it
+    add_samples(db, None, [(old, 200), (old + timedelta(minutes=5), 210)])
+    other = Profile(user_id=test_user.id, platform="twitter", username="other_handle")
+    db.add(other)
+    db.commit()
+    add_samples(db, other.id, [(old + timedelta(minutes=10), 300)])
+
+    assert rollup_follower_history(db, now=NOW) == 2
+    assert {h.profile_id for h in db.query(FollowerHistoryHourly)} == {profile.id, other.id}
+
+    assert prune_follower_history(db, now=NOW)["orphaned"] == 2
+    assert db.query(FollowerHistory).filter(FollowerHistory.profile_id.is_(None)).count() == 0
+
+
+def test_choose_resolution():
+    assert choose_resolution(NOW - timedelta(hours=6), NOW, now=NOW) == "raw"
+    assert choose_resolution(NOW - timedelta(days=7), NOW, now=NOW) == "hourly"
+    assert choose_resolution(NOW - timedelta(days=180), NOW, now=NOW) == "daily"
+    # Recent but short range older than the raw retention
+    start = NOW - timedelta(days=settings.HISTORY_RAW_RETENTION_DAYS + 5)
+    assert choose_resolution(start, start + timedelta(hours=1), now=NOW) == "hourly"
+
+
+def test_get_profile_history(client: TestClient, db, profile, auth_headers):
+    now = datetime.utcnow()
+    add_samples(db, profile.id, [(now - timedelta(hours=3), 100), (now - timedelta(hours=1), 150)])
+
+    response = client.get(f"/api/v1/profiles/{profile.id}/history", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resolution"] == "raw"
+    assert [p["last_count"] for p in data["points"]] == [100, 150]
+
+    rollup_follower_history(db)
+    response = client.get(
+        f"/api/v1/profiles/{profile.id}/history",
+        params={"start": (now - timedelta(days=10)).isoformat()},
+        headers=auth_headers
+    )
+    data = response.json()
+    assert data["resolution"] == "hourly"
+    assert sum(p["sample_count"] for p in data["points"]) == 2
+
+
+def check(db, profile_id, count, checked_at):
+    state = db.execute(
+        select(
+            Profile.id, Profile.user_id, Profile.platform, Profile.username, Profile.current_follower_count,
+            Profile.next_alert_threshold, Profile.prev_alert_threshold
+        ).where(Profile.id == profile_id)
+    ).one()
+    apply_follower_counts(db, [state], {profile_id: count}, checked_at)
+    db.commit()
+
+
+def test_unchanged_counts_confirm_latest_sample(db, profile):
+    base = datetime(2025, 6, 15, 10, 0)
+    for minutes, count in [(0, 100), (5, 100), (10, 100), (15, 120), (20, 120)]:
+        check(db, profile.id, count, base + timedelta(minutes=minutes))
+
+    rows = db.query(FollowerHistory).order_by(FollowerHistory.recorded_at).all()
+    assert [(r.follower_count, r.recorded_at.minute, r.confirmed_at and r.confirmed_at.minute) for r in rows] == \
+        [(100, 0, 10), (120, 15, 20)]
+
+    with patch.object(settings, 'HISTORY_RECORDING', "all"):
+        check(db, profile.id, 120, base + timedelta(minutes=25))
+    assert db.query(FollowerHistory).count() == 3
+
+
+def test_history_includes_count_held_from_before_range(client: TestClient, db, profile, auth_headers):
+    now = datetime.utcnow()
+    add_samples(db, profile.id, [(now - timedelta(days=3), 80), (now - timedelta(hours=1), 150)])
+
+    response = client.get(
+        f"/api/v1/profiles/{profile.id}/history",
+        params={"start": (now - timedelta(hours=6)).isoformat()},
+        headers=auth_headers
+    )
+    assert [p["last_count"] for p in response.json()["points"]] == [80, 150]
+
+
+def test_compaction_collapses_unchanged_runs(db, profile, test_user):
+    other = Profile(user_id=test_user.id, platform="instagram", username="other")
+    db.add(other)
+    db.commit()
+    base = datetime(2025, 6, 15, 10, 0)
+    add_samples(db, profile.id, [(base + timedelta(minutes=5 * i), count) for i, count in enumerate([1, 1, 1, 2, 1, 1])])
+    add_samples(db, other.id, [(base + timedelta(minutes=5 * i), 7) for i in range(3)])
+
+    with patch.object(settings, 'HISTORY_COMPACT_PROFILES_PER_BATCH', 1):
+        assert compact_follower_history(db) == {"profiles": 2, "deleted": 5}
+
+    rows = db.query(FollowerHistory).order_by(FollowerHistory.profile_id, FollowerHistory.recorded_at).all()
+    assert [(r.follower_count, r.recorded_at.minute, r.confirmed_at and r.confirmed_at.minute) for r in rows] == \
+        [(1, 0, 10), (2, 15, None), (1, 20, 25), (7, 0, 10)]
+
+
+def test_partition_naming():
+    from datetime import date
+    from app.db.partitions import add_months, partition_name, partition_month
+
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partition_name(date(2025, 7, 1)) == "follower_history_y2025m07"
+    assert partition_month("follower_history_y2025m07") == date(2025, 7, 1)
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import numpy as np
+from sqlalchemy import select
+from app.core.config import settings
+from app.models import Profile, FollowerHistoryBlock
+from app.services.follower_checks import apply_follower_counts
+from app.services.history_blocks import (
+    zigzag_encode, zigzag_decode, varint_encode, varint_decode, encode_block, decode_block, read_history_blocks
+)
+
+
+def test_varint_round_trip():
+    rng = np.random.default_rng(7)
+    values = np.concatenate([rng.integers(-2 ** 62, 2 ** 62, 1000), [0, -1, 1, 2 ** 63 - 1, -2 ** 63]])
+    assert np.array_equal(zigzag_decode(varint_decode(varint_encode(zigzag_encode(values)))), values)
+    assert varint_encode(zigzag_encode([0, -1, 1, 150])) == bytes([0, 1, 2, 0xAC, 0x02])
+
+
+def test_block_round_trip_is_exact():
+    base = datetime(2025, 6, 15, 0, 0, 1, 123456)
+    times = [base + timedelta(minutes=5 * i, microseconds=i * 37) for i in range(288)]
+    counts = [1_000_000 + (i // 10) * 3 - (i % 7 == 0) for i in range(288)]
+
+    block = FollowerHistoryBlock(profile_id=1, day=base.date(), **encode_block(times, counts))
+    decoded_times, decoded_counts = decode_block(block)
+
+    assert decoded_times.astype(datetime).tolist() == times
+    assert decoded_counts.tolist() == counts
+    # A day of five-minute samples packs into a few bytes per point
+    assert len(block.time_deltas) + len(block.count_deltas) < 288 * 8
+
+
+def test_checks_append_to_daily_blocks(db, test_user):
+    profile = Profile(user_id=test_user.id, platform="twitter", username="blocks")
+    db.add(profile)
+    db.commit()
+    profile_id = profile.id
+    state_stmt = select(
+        Profile.id, Profile.user_id, Profile.platform, Profile.username, Profile.current_follower_count,
+        Profile.next_alert_threshold, Profile.prev_alert_threshold
+    ).where(Profile.id == profile_id)
+
+    base = datetime(2025, 6, 15, 23, 50)
+    samples = [(base + timedelta(minutes=5 * i), count) for i, count in enumerate([100, 120, 90, 95, 95])]
+    with patch.object(settings, 'HISTORY_BLOCKS_ENABLED', True), patch.object(settings, 'HISTORY_RECORDING', "all"):
+        for checked_at, count in samples:
+            apply_follower_counts(db, [db.execute(state_stmt).one()], {profile_id: count}, checked_at)
+            db.commit()
+
+    blocks = db.query(FollowerHistoryBlock).order_by(FollowerHistoryBlock.day).all()
+    assert [(b.day.day, b.sample_count, b.last_count) for b in blocks] == [(15, 2, 120), (16, 3, 95)]
+
+    times, counts = read_history_blocks(db, profile_id, base, base + timedelta(hours=1))
+    assert times.astype(datetime).tolist() == [t for t, _ in samples]
+    assert counts.tolist() == [c for _, c in samples]
+
+    times, counts = read_history_blocks(db, profile_id, base + timedelta(minutes=6), base + timedelta(minutes=16))
+    assert counts.tolist() == [90, 95]
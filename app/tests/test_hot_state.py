@@ -0,0 +1,103 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.core import hot_state as hot_state_module
+from app.core.config import settings
+from app.core.hot_state import MemoryHotState
+from app.models import Profile, FollowerHistory
+from app.services.hot_state import record_hot_state_on_commit, repopulate_hot_state
+from app.services.mock_social_api import mock_api
+from app.tasks.follower_tasks import check_profile_followers
+
+
+@pytest.fixture
+def hot_state(monkeypatch):
+    state = MemoryHotState(max_samples=3)
+    monkeypatch.setattr(settings, "HOT_STATE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "HOT_STATE_RECENT_SAMPLES", 3)
+    monkeypatch.setattr(hot_state_module, "_hot_state", state)
+    return state
+
+
+def add_profile(db, user, **fields):
+    profile = Profile(user_id=user.id, platform="twitter", username="hot_handle", **fields)
+    db.add(profile)
+    db.commit()
+    return profile.id
+
+
+def test_checks_write_through_and_reads_skip_postgres(client: TestClient, db, test_user, auth_headers, hot_state):
+    profile_id = add_profile(db, test_user)
+
+    for count in (100, 200, 300, 400):
+        with patch.object(mock_api, 'get_follower_count', return_value=count), \
+                patch('app.tasks.follower_tasks.SessionLocal', return_value=db):
+            check_profile_followers(profile_id)
+
+    state = hot_state.get_many([profile_id])[profile_id]
+    assert state.follower_count == 400
+    assert [count for _, count in state.samples] == [400, 300, 200]
+
+    with patch('app.services.hot_state.load_hot_states') as load:
+        response = client.get(f"/api/v1/profiles/{profile_id}/current", headers=auth_headers)
+        load.assert_not_called()
+    assert response.status_code == 200
+    data = response.json()
+    assert data["follower_count"] == 400
+    assert [s["follower_count"] for s in data["recent_samples"]] == [400, 300, 200]
+
+
+def test_miss_falls_back_to_postgres(client: TestClient, db, test_user, auth_headers, hot_state):
+    profile_id = add_profile(db, test_user, current_follower_count=250)
+    now = datetime.utcnow()
+    db.add_all([
+        FollowerHistory(profile_id=profile_id, follower_count=200 + 10 * i, recorded_at=now - timedelta(hours=5 - i))
+        for i in range(6)
+    ])
+    db.commit()
+
+    response = client.get(f"/api/v1/profiles/{profile_id}/current", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["follower_count"] == 250
+    assert [s["follower_count"] for s in response.json()["recent_samples"]] == [250, 240, 230]
+    assert profile_id in hot_state.get_many([profile_id])
+
+    assert client.get("/api/v1/profiles/999/current", headers=auth_headers).status_code == 404
+
+
+def test_repopulate_and_rollback(db, test_user, hot_state):
+    profile_id = add_profile(db, test_user, current_follower_count=10)
+    assert repopulate_hot_state(db, batch_size=1) == 1
+    assert hot_state.get_many([profile_id])[profile_id].follower_count == 10
+
+    stale = hot_state.get_many([profile_id])[profile_id]
+    hot_state.clear()
+    record_hot_state_on_commit(db, [stale])
+    db.rollback()
+    db.commit()
+    assert hot_state.get_many([profile_id]) == {}
+
+
+def test_hot_state_outage_does_not_fail_committed_writes(client: TestClient, db, test_user, auth_headers, hot_state):
+    profile_id = add_profile(db, test_user, current_follower_count=10)
+
+    with patch.object(hot_state, 'record_checks', side_effect=ConnectionError("redis is down")), \
+            patch.object(mock_api, 'get_follower_count', return_value=20), \
+            patch('app.tasks.follower_tasks.SessionLocal', return_value=db), \
+            patch('app.tasks.follower_tasks.logger') as task_logger:
+        check_profile_followers(profile_id)
+        task_logger.error.assert_not_called()
+    assert db.query(Profile).filter(Profile.id == profile_id).one().current_follower_count == 20
+
+    # Reads fall back to Postgres
+    with patch.object(hot_state, 'get_many', side_effect=ConnectionError("redis is down")), \
+            patch.object(hot_state, 'load') as load:
+        response = client.get(f"/api/v1/profiles/{profile_id}/current", headers=auth_headers)
+        load.assert_not_called()
+    assert response.status_code == 200
+    assert response.json()["follower_count"] == 20
+
+    with patch.object(hot_state, 'delete', side_effect=ConnectionError("redis is down")):
+        response = client.delete(f"/api/v1/profiles/{profile_id}", headers=auth_headers)
+    assert response.status_code == 200
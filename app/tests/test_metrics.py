@@ -0,0 +1,62 @@
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from app.core.metrics import DirectoriesCollector
+from app.models import Profile, Alert
+from app.services.mock_social_api import mock_api
+from app.tasks.follower_tasks import check_profile_followers
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_latency_is_labelled_by_route(client: TestClient, test_user, auth_headers):
+    labels = {"method": "GET", "route": "/api/v1/profiles/{profile_id}", "status": "404"}
+    before = sample("http_request_duration_seconds_count", **labels)
+    assert client.get("/api/v1/profiles/12345", headers=auth_headers).status_code == 404
+
+    assert sample("http_request_duration_seconds_count", **labels) == before + 1
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/api/v1/profiles/{profile_id}"' in response.text
+
+
+def test_check_records_pipeline_metrics(db, test_user):
+    profile = Profile(user_id=test_user.id, platform="twitter", username="metrics", current_follower_count=900)
+    db.add(profile)
+    db.commit()
+    db.add(Alert(user_id=test_user.id, profile_id=profile.id, threshold=1000))
+    db.commit()
+    profile_id = profile.id
+
+    before = {
+        "checked": sample("profiles_checked_total"),
+        "evaluated": sample("alerts_evaluated_total"),
+        "triggered": sample("alerts_triggered_total"),
+        "fetches": sample("follower_fetch_seconds_count", platform="twitter"),
+        "db": sample("check_db_seconds_count", task="check_profile_followers"),
+    }
+    with patch.object(mock_api, 'get_follower_count', return_value=1100):
+        with patch('app.tasks.follower_tasks.SessionLocal', return_value=db):
+            check_profile_followers(profile_id)
+
+    assert sample("profiles_checked_total") == before["checked"] + 1
+    assert sample("alerts_evaluated_total") == before["evaluated"] + 1
+    assert sample("alerts_triggered_total") == before["triggered"] + 1
+    assert sample("follower_fetch_seconds_count", platform="twitter") == before["fetches"] + 1
+    assert sample("check_db_seconds_count", task="check_profile_followers") == before["db"] + 1
+
+
+def test_multiprocess_metrics_merge_every_service_directory(tmp_path):
+    web, worker = tmp_path / "web", tmp_path / "worker"
+    for directory, pid, value in ((web, 1, 2.0), (worker, 2, 3.0)):
+        directory.mkdir()
+        values = MmapedDict(str(directory / f"counter_{pid}.db"))
+        values.write_value(mmap_key("checks", "checks_total", (), (), "Checks"), value, 0.0)
+        values.close()
+
+    registry = CollectorRegistry()
+    registry.register(DirectoriesCollector([str(web), str(worker)]))
+    assert registry.get_sample_value("checks_total") == 5.0
@@ -0,0 +1,29 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from pathlib import Path
+from sqlalchemy import create_engine
+from unittest.mock import patch
+from app.core.config import settings
+from app.db.database import Base
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+
+    with patch.object(settings, 'DATABASE_URL', url):
+        command.upgrade(config, "head")
+
+        engine = create_engine(url)
+        with engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+        engine.dispose()
+        assert diff == []
+
+        command.downgrade(config, "base")
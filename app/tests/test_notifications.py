@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from unittest.mock import patch
+from telegram.error import Forbidden, NetworkError
+from app.core.config import settings
+from app.models import Profile, Alert, NotificationOutbox
+from app.models.notification import PENDING, SENT, UNDELIVERABLE
+from app.services.mock_social_api import mock_api
+from app.services.notifications import RateLimiter, dispatch_notifications, TELEGRAM_MAX_MESSAGE_LENGTH
+from app.tasks.follower_tasks import check_profile_followers
+
+
+class FakeTelegramBot:
+    """In-process stand-in for telegram.Bot that records messages instead of sending them"""
+
+    def __init__(self):
+        self.sent: List[Tuple[str, str]] = []
+        self._errors: Dict[str, Tuple[Exception, int]] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def send_message(self, chat_id: str, text: str):
+        if chat_id in self._errors:
+            error, after = self._errors[chat_id]
+            if after == 0:
+                raise error
+            self._errors[chat_id] = (error, after - 1)
+        self.sent.append((chat_id, text))
+
+    def set_error(self, chat_id: str, error: Optional[Exception], after: int = 0):
+        """Make sends to `chat_id` raise `error` once `after` more have gone through (None clears it)"""
+        if error is None:
+            self._errors.pop(chat_id, None)
+        else:
+            self._errors[chat_id] = (error, after)
+
+
+def no_limit():
+    return RateLimiter(global_per_second=1e9, chat_interval=0)
+
+
+def add_outbox(db, user, messages, **fields):
+    rows = [NotificationOutbox(user_id=user.id, message=message, **fields) for message in messages]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def test_triggered_alert_writes_outbox_row(db, test_user):
+    profile = Profile(user_id=test_user.id, platform="twitter", username="outbox", current_follower_count=900)
+    db.add(profile)
+    db.commit()
+    db.add(Alert(user_id=test_user.id, profile_id=profile.id, threshold=1000))
+    db.commit()
+    profile_id, user_id = profile.id, test_user.id
+
+    with patch.object(mock_api, 'get_follower_count', return_value=1100):
+        with patch('app.tasks.follower_tasks.SessionLocal', return_value=db):
+            check_profile_followers(profile_id)
+
+    rows = db.query(NotificationOutbox).all()
+    assert len(rows) == 1
+    assert rows[0].user_id == user_id
+    assert rows[0].status == PENDING
+    assert "1000 followers" in rows[0].message
+
+
+def test_dispatch_coalesces_messages_per_user(db, test_user):
+    test_user.telegram_chat_id = "42"
+    db.commit()
+    ids = add_outbox(db, test_user, ["first milestone", "second milestone"])
+
+    bot = FakeTelegramBot()
+    stats = dispatch_notifications(db, bot, no_limit())
+
+    assert stats["sent"] == 2
+    assert bot.sent == [("42", "first milestone\nsecond milestone")]
+    db.expire_all()
+    assert {row.status for row in db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids))} == {SENT}
+
+
+def test_dispatch_retries_with_backoff(db, test_user):
+    test_user.telegram_chat_id = "42"
+    db.commit()
+    [row_id] = add_outbox(db, test_user, ["milestone"])
+
+    bot = FakeTelegramBot()
+    bot.set_error("42", NetworkError("timeout"))
+    now = datetime.utcnow()
+    stats = dispatch_notifications(db, bot, no_limit(), now=now)
+    assert stats["retrying"] == 1
+
+    db.expire_all()
+    row = db.get(NotificationOutbox, row_id)
+    assert row.status == PENDING
+    assert row.attempts == 1
+    assert row.next_attempt_at > now
+
+    # Not due yet, then delivered once the backoff has passed
+    bot.set_error("42", None)
+    assert dispatch_notifications(db, bot, no_limit(), now=now)["claimed"] == 0
+    assert dispatch_notifications(db, bot, no_limit(), now=now + timedelta(hours=2))["sent"] == 1
+    assert bot.sent == [("42", "milestone")]
+
+
+def test_dispatch_retries_only_undelivered_messages(db, test_user):
+    test_user.telegram_chat_id = "42"
+    db.commit()
+    # Too long to coalesce: one Telegram message each
+    messages = [c * (TELEGRAM_MAX_MESSAGE_LENGTH // 2 + 1) for c in "abc"]
+    ids = add_outbox(db, test_user, messages)
+
+    bot = FakeTelegramBot()
+    bot.set_error("42", NetworkError("timeout"), after=1)
+    now = datetime.utcnow()
+    stats = dispatch_notifications(db, bot, no_limit(), now=now)
+    assert (stats["sent"], stats["retrying"]) == (1, 2)
+
+    db.expire_all()
+    rows = db.query(NotificationOutbox).order_by(NotificationOutbox.id).all()
+    assert [(row.status, row.attempts) for row in rows] == [(SENT, 1), (PENDING, 1), (PENDING, 1)]
+    assert all(row.lease_expires_at is None for row in rows)
+
+    bot.set_error("42", None)
+    assert dispatch_notifications(db, bot, no_limit(), now=now + timedelta(hours=2))["sent"] == 2
+    assert [text for _, text in bot.sent] == messages
+
+
+def test_dispatch_skips_leased_rows(db, test_user):
+    test_user.telegram_chat_id = "42"
+    db.commit()
+    now = datetime.utcnow()
+    [leased_id] = add_outbox(db, test_user, ["in flight"], lease_expires_at=now + timedelta(minutes=1))
+    add_outbox(db, test_user, ["due"])
+
+    bot = FakeTelegramBot()
+    assert dispatch_notifications(db, bot, no_limit(), now=now + timedelta(seconds=1))["sent"] == 1
+    assert bot.sent == [("42", "due")]
+
+    # The dispatcher holding it died; its lease lapses
+    later = now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+    assert dispatch_notifications(db, bot, no_limit(), now=later)["sent"] == 1
+    db.expire_all()
+    assert db.get(NotificationOutbox, leased_id).status == SENT
+
+
+def test_dispatch_gives_up_on_unreachable_chats(db, test_user):
+    [no_chat_id] = add_outbox(db, test_user, ["milestone"])
+    bot = FakeTelegramBot()
+    assert dispatch_notifications(db, bot, no_limit())["undeliverable"] == 1
+
+    test_user.telegram_chat_id = "42"
+    db.commit()
+    [blocked_id] = add_outbox(db, test_user, ["milestone"])
+    bot.set_error("42", Forbidden("bot was blocked by the user"))
+    assert dispatch_notifications(db, bot, no_limit())["undeliverable"] == 1
+
+    db.expire_all()
+    assert db.get(NotificationOutbox, no_chat_id).status == UNDELIVERABLE
+    assert db.get(NotificationOutbox, blocked_id).status == UNDELIVERABLE
+    assert bot.sent == []
+
+
+def test_rate_limiter_spaces_sends():
+    clock = [0.0]
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    limiter = RateLimiter(global_per_second=10, chat_interval=1.0, clock=lambda: clock[0], sleep=sleep)
+
+    async def run():
+        await limiter.wait("a")
+        await limiter.wait("b")
+        await limiter.wait("a")
+
+    asyncio.run(run())
+    # "b" waits for the global slot, the second "a" for its chat interval
+    assert waits == [0.1, 1.0]
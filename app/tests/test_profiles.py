@@ -1,5 +1,13 @@
 import pytest
+from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.models import Profile, FollowerHistory, FollowerHistoryHourly, FollowerHistoryBlock
+from app.services.history import rollup_follower_history
+from app.services.history_blocks import append_samples
+from app.core.cache import get_cache
+from app.services.mock_social_api import mock_api
+from app.tasks.follower_tasks import check_profile_followers
 
 
 def test_create_profile(client: TestClient, test_user, auth_headers):
@@ -53,6 +61,32 @@ def test_get_profiles(client: TestClient, test_user, auth_headers):
     assert {p["platform"] for p in data} == {"twitter", "instagram"}
 
 
+def test_get_profiles_paginated(client: TestClient, db, test_user, auth_headers):
+    db.add_all([
+        Profile(user_id=test_user.id, platform="twitter" if i % 2 else "instagram", username=f"user{i}")
+        for i in range(5)
+    ])
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/profiles/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [p["username"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [f"user{i}" for i in range(5)]
+
+    response = client.get("/api/v1/profiles/", params={"platform": "twitter"}, headers=auth_headers)
+    assert [p["username"] for p in response.json()] == ["user1", "user3"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/v1/profiles/", params={"cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
 def test_get_profile_insights(client: TestClient, test_user, auth_headers):
     # Create profile
     response = client.post(
@@ -69,6 +103,94 @@ def test_get_profile_insights(client: TestClient, test_user, auth_headers):
     assert "recent_history" in data
 
 
+def test_get_profile_insights_values(client: TestClient, db, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/profiles/",
+        json={"platform": "twitter", "username": "test_handle"},
+        headers=auth_headers
+    )
+    profile_id = response.json()["id"]
+
+    now = datetime.utcnow()
+    db.add_all([
+        FollowerHistory(profile_id=profile_id, follower_count=50, recorded_at=now - timedelta(days=2)),
+    ] + [
+        FollowerHistory(profile_id=profile_id, follower_count=100 + i, recorded_at=now - timedelta(hours=12 - i))
+        for i in range(12)
+    ])
+    db.query(Profile).filter(Profile.id == profile_id).update({"current_follower_count": 111})
+    db.commit()
+
+    response = client.get(f"/api/v1/profiles/{profile_id}/insights", headers=auth_headers)
+    data = response.json()
+    assert data["current_follower_count"] == 111
+    # The count 24 hours ago is the 50 recorded two days ago, held until the next sample
+    assert data["follower_change_24h"] == 61
+    assert [h["follower_count"] for h in data["recent_history"]] == list(range(111, 101, -1))
+
+
+def test_profile_insights_cached_until_check(client: TestClient, db, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/profiles/",
+        json={"platform": "twitter", "username": "test_handle"},
+        headers=auth_headers
+    )
+    profile_id = response.json()["id"]
+
+    first = client.get(f"/api/v1/profiles/{profile_id}/insights", headers=auth_headers).json()
+    assert first["recent_history"] == []
+
+    with patch('app.services.insights.compute_insights') as mock_compute:
+        cached = client.get(f"/api/v1/profiles/{profile_id}/insights", headers=auth_headers).json()
+        mock_compute.assert_not_called()
+    assert cached == first
+
+    with patch.object(mock_api, 'get_follower_count', return_value=700), \
+            patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+        mock_session.return_value = db
+        check_profile_followers(profile_id)
+
+    fresh = client.get(f"/api/v1/profiles/{profile_id}/insights", headers=auth_headers).json()
+    assert fresh["current_follower_count"] == 700
+    assert len(fresh["recent_history"]) == 1
+
+
+def test_profile_reads_answer_conditional_gets(client: TestClient, db, test_user, auth_headers):
+    profile_id = client.post(
+        "/api/v1/profiles/",
+        json={"platform": "twitter", "username": "test_handle"},
+        headers=auth_headers
+    ).json()["id"]
+
+    urls = ["/api/v1/profiles/", f"/api/v1/profiles/{profile_id}", f"/api/v1/profiles/{profile_id}/insights"]
+    etags = {}
+    for url in urls:
+        response = client.get(url, headers=auth_headers)
+        etags[url] = response.headers["ETag"]
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etags[url]})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    with patch.object(mock_api, 'get_follower_count', return_value=700), \
+            patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+        mock_session.return_value = db
+        check_profile_followers(profile_id)
+
+    for url in urls:
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etags[url]})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etags[url]
+
+    # Adding a profile changes the collection's ETag but not the existing profile's
+    list_etag = client.get("/api/v1/profiles/", headers=auth_headers).headers["ETag"]
+    profile_etag = client.get(f"/api/v1/profiles/{profile_id}", headers=auth_headers).headers["ETag"]
+    client.post("/api/v1/profiles/", json={"platform": "twitter", "username": "other"}, headers=auth_headers)
+    assert client.get("/api/v1/profiles/", headers={**auth_headers, "If-None-Match": list_etag}).status_code == 200
+    assert client.get(
+        f"/api/v1/profiles/{profile_id}", headers={**auth_headers, "If-None-Match": profile_etag}
+    ).status_code == 304
+
+
 def test_update_profile(client: TestClient, test_user, auth_headers):
     # Create profile
     response = client.post(
@@ -88,6 +210,28 @@ def test_update_profile(client: TestClient, test_user, auth_headers):
     assert response.json()["username"] == "new_handle"
 
 
+def test_cache_outage_does_not_fail_committed_writes(client: TestClient, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/profiles/",
+        json={"platform": "twitter", "username": "test_handle"},
+        headers=auth_headers
+    )
+    profile_id = response.json()["id"]
+
+    with patch.object(get_cache(), 'get', side_effect=ConnectionError("cache is down")), \
+            patch.object(get_cache(), 'set', side_effect=ConnectionError("cache is down")):
+        response = client.get(f"/api/v1/profiles/{profile_id}/insights", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["username"] == "test_handle"
+
+    with patch.object(get_cache(), 'delete_many', side_effect=ConnectionError("cache is down")):
+        response = client.put(
+            f"/api/v1/profiles/{profile_id}", json={"username": "new_handle"}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert client.delete(f"/api/v1/profiles/{profile_id}", headers=auth_headers).status_code == 200
+
+
 def test_delete_profile(client: TestClient, test_user, auth_headers):
     # Create profile
     response = client.post(
@@ -106,6 +250,33 @@ def test_delete_profile(client: TestClient, test_user, auth_headers):
     assert response.status_code == 404
 
 
+def test_delete_profile_with_derived_history(client: TestClient, db, test_user, auth_headers, enforce_foreign_keys):
+    response = client.post(
+        "/api/v1/profiles/",
+        json={"platform": "twitter", "username": "test_handle"},
+        headers=auth_headers
+    )
+    profile_id = response.json()["id"]
+    recorded_at = datetime.utcnow() - timedelta(hours=2)
+    db.add(FollowerHistory(profile_id=profile_id, follower_count=100, recorded_at=recorded_at))
+    append_samples(db, {profile_id: 100}, recorded_at)
+    db.commit()
+    rollup_follower_history(db)
+    assert db.query(FollowerHistoryHourly).count() == 1
+    assert db.query(FollowerHistoryBlock).count() == 1
+    # Not rolled up yet when the profile goes
+    db.add(FollowerHistory(profile_id=profile_id, follower_count=110, recorded_at=recorded_at + timedelta(hours=1)))
+    db.commit()
+
+    response = client.delete(f"/api/v1/profiles/{profile_id}", headers=auth_headers)
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.query(FollowerHistory).count() == 0
+    assert db.query(FollowerHistoryHourly).count() == 0
+    assert db.query(FollowerHistoryBlock).count() == 0
+    assert rollup_follower_history(db) == 0
+
+
 def test_unauthorized_access(client: TestClient):
     response = client.get("/api/v1/profiles/")
     assert response.status_code == 401
@@ -0,0 +1,119 @@
+import logging
+import pytest
+from unittest.mock import patch
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.query_stats import QueryBudgetExceeded, track_queries
+from app.models import Profile, FollowerHistory
+from app.services.insights import compute_insights
+from app.services.mock_social_api import mock_api
+from app.tasks import celery_app  # noqa: F401 - connects the task signal handlers
+from app.tasks.follower_tasks import check_all_profiles, check_accounts_batch
+
+# lease accounts, load profiles, write history, update profiles, nearest thresholds, update accounts
+CHECK_BATCH_BUDGET = 6
+
+
+def dispatch_accounts(db):
+    with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            patch('app.tasks.follower_tasks.check_accounts_batch') as mock_batch:
+        mock_session.return_value = db
+        check_all_profiles()
+        return mock_batch.apply_async.call_args.kwargs["args"][0]
+
+
+def test_compute_insights_is_one_query(db, test_user, query_budget):
+    user_id = test_user.id
+    profile = Profile(user_id=user_id, platform="twitter", username="test_handle", current_follower_count=500)
+    db.add(profile)
+    db.commit()
+    profile_id = profile.id
+    db.add_all([FollowerHistory(profile_id=profile_id, follower_count=500 + i) for i in range(5)])
+    db.commit()
+
+    with query_budget(1):
+        insights = compute_insights(db, profile_id, user_id)
+    assert len(insights.recent_history) == 5
+
+
+@pytest.mark.parametrize("accounts", [1, 40])
+def test_check_batch_budget_does_not_grow_with_chunk_size(db, test_user, query_budget, accounts):
+    user_id = test_user.id
+    db.add_all([
+        Profile(user_id=user_id, platform="twitter", username=f"handle{i}", current_follower_count=100)
+        for i in range(accounts)
+    ])
+    db.commit()
+    account_ids = dispatch_accounts(db)
+    assert len(account_ids) == accounts
+
+    # A changed count inserts history, an unchanged one confirms the latest sample
+    for count in (150, 150):
+        with patch.object(mock_api, 'get_follower_count', return_value=count), \
+                patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+            mock_session.return_value = db
+            with query_budget(CHECK_BATCH_BUDGET) as stats:
+                check_accounts_batch(account_ids)
+        # The lease, then the results
+        assert stats.commits == 2
+
+    assert {p.current_follower_count for p in db.query(Profile).all()} == {150}
+
+
+def test_repeated_select_fails_the_budget(db, test_user, query_budget):
+    user_id = test_user.id
+    db.add_all([
+        Profile(user_id=user_id, platform="twitter", username=f"handle{i}", current_follower_count=100)
+        for i in range(settings.QUERY_REPEAT_THRESHOLD)
+    ])
+    db.commit()
+    profile_ids = db.scalars(select(Profile.id)).all()
+
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with query_budget(100):
+            for profile_id in profile_ids:
+                db.execute(select(Profile).where(Profile.id == profile_id)).one()
+
+
+def test_nested_tracking_counts_in_every_scope(db, test_user):
+    with track_queries() as outer:
+        db.execute(select(Profile)).all()
+        with track_queries() as inner:
+            db.execute(select(Profile)).all()
+    assert (outer.statements, inner.statements) == (2, 1)
+    assert outer.seconds >= inner.seconds > 0
+
+
+def test_api_reports_queries_in_headers(client, test_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_STATS_ENABLED", True)
+    response = client.post(
+        "/api/v1/profiles/", json={"platform": "twitter", "username": "test_handle"}, headers=auth_headers
+    )
+    profile_id = response.json()["id"]
+
+    response = client.get(f"/api/v1/profiles/{profile_id}/insights", headers=auth_headers)
+    assert response.status_code == 200
+    # Authentication, then the single insights query
+    assert 1 <= int(response.headers["X-DB-Queries"]) <= 3
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_api_headers_off_by_default(client, test_user, auth_headers):
+    response = client.get("/api/v1/profiles/", headers=auth_headers)
+    assert response.status_code == 200
+    assert "X-DB-Queries" not in response.headers
+
+
+def test_task_logs_query_stats(db, test_user, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_STATS_ENABLED", True)
+    db.add(Profile(user_id=test_user.id, platform="twitter", username="test_handle", current_follower_count=100))
+    db.commit()
+    account_ids = dispatch_accounts(db)
+
+    with patch.object(mock_api, 'get_follower_count', return_value=150), \
+            patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+            caplog.at_level(logging.INFO, logger="app.tasks.celery_app"):
+        mock_session.return_value = db
+        check_accounts_batch.apply(args=[account_ids])
+
+    assert f"task=app.tasks.follower_tasks.check_accounts_batch queries={CHECK_BATCH_BUDGET} commits=2" in caplog.text
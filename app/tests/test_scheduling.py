@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core.config import settings
+from app.models import Profile, TrackedAccount
+from app.services.mock_social_api import mock_api
+from app.services.scheduling import update_change_rate, next_check_interval
+from app.tasks.follower_tasks import check_all_profiles, check_accounts_batch
+
+
+@pytest.fixture
+def interval_settings():
+    with patch.object(settings, 'CHECK_MIN_INTERVAL_SECONDS', 60), \
+            patch.object(settings, 'CHECK_MAX_INTERVAL_SECONDS', 3600), \
+            patch.object(settings, 'CHECK_TARGET_CHANGE', 50), \
+            patch.object(settings, 'CHECK_SAMPLES_BEFORE_THRESHOLD', 4):
+        yield
+
+
+def test_update_change_rate():
+    checked_at = datetime(2025, 1, 1, 12, 0)
+    last = checked_at - timedelta(minutes=30)
+
+    assert update_change_rate(None, None, 100, None, checked_at) is None
+    assert update_change_rate(None, 100, 150, last, checked_at) == pytest.approx(100)
+
+    with patch.object(settings, 'CHECK_RATE_SMOOTHING', 0.5):
+        assert update_change_rate(100, 100, 100, last, checked_at) == pytest.approx(50)
+
+
+def test_next_check_interval(interval_settings):
+    # Unknown rate: learn it quickly
+    assert next_check_interval(None, None) == 60
+    # Dormant account: back off to the maximum
+    assert next_check_interval(0, 10) == 3600
+    # 100 followers/hour -> 50 followers every 30 minutes
+    assert next_check_interval(100, None) == pytest.approx(1800)
+    # 100 away from a milestone at 100/hour -> sample 4 times in the next hour
+    assert next_check_interval(100, 100) == pytest.approx(900)
+    # Very close to a milestone: clamped to the minimum
+    assert next_check_interval(100, 1) == 60
+
+
+def test_dispatch_only_due_accounts(db, test_user, interval_settings):
+    db.add_all([
+        Profile(user_id=test_user.id, platform="twitter", username="due"),
+        Profile(user_id=test_user.id, platform="twitter", username="not_due"),
+    ])
+    db.commit()
+
+    def dispatch():
+        with patch('app.tasks.follower_tasks.SessionLocal') as mock_session, \
+                patch('app.tasks.follower_tasks.check_accounts_batch') as mock_batch:
+            mock_session.return_value = db
+            check_all_profiles()
+            return [i for call in mock_batch.apply_async.call_args_list for i in call.kwargs["args"][0]]
+
+    assert len(dispatch()) == 2
+    # The cycle runs until its accounts are checked; dispatches until then are skipped
+    assert dispatch() == []
+
+    not_due = db.query(TrackedAccount).filter(TrackedAccount.username == "not_due").one()
+    due = db.query(TrackedAccount).filter(TrackedAccount.username == "due").one()
+    due_id, not_due_id = due.id, not_due.id
+    with patch.object(mock_api, 'get_follower_count', return_value=500), \
+            patch('app.tasks.follower_tasks.SessionLocal') as mock_session:
+        mock_session.return_value = db
+        check_accounts_batch([due_id, not_due_id])
+
+    not_due = db.query(TrackedAccount).filter(TrackedAccount.id == not_due_id).one()
+    assert not_due.last_checked_at is not None
+    # First sample has no rate yet, so the next check is at the minimum interval
+    assert not_due.next_check_at == not_due.last_checked_at + timedelta(seconds=60)
+
+    # The finished cycle gives way to a new one, with nothing due yet
+    assert dispatch() == []
+    due = db.query(TrackedAccount).filter(TrackedAccount.id == due_id).one()
+    due.next_check_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert dispatch() == [due_id]
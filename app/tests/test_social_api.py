@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.follower_checks import fetch_account_counts
+from app.services.mock_social_api import MockSocialMediaAPI, AsyncMockSocialMediaAPI
+
+
+def test_get_follower_counts_splits_by_platform_batch_size():
+    api = MockSocialMediaAPI()
+    usernames = [f"user_{i}" for i in range(7)]
+
+    with patch.dict(settings.PLATFORM_BATCH_SIZES, {"twitter": 3}), \
+            patch.object(api, 'lookup_batch', wraps=api.lookup_batch) as lookup:
+        result = api.get_follower_counts("twitter", usernames)
+
+    assert [len(call.args[1]) for call in lookup.call_args_list] == [3, 3, 1]
+    assert set(result.counts) == set(usernames)
+    assert result.errors == {}
+
+
+def test_get_follower_counts_reports_partial_failures():
+    api = MockSocialMediaAPI()
+    api.set_lookup_error("instagram", "suspended", "Account suspended")
+
+    result = api.get_follower_counts("instagram", ["alive", "suspended"])
+
+    assert list(result.counts) == ["alive"]
+    assert result.errors == {"suspended": "Account suspended"}
+
+
+def test_mock_lookup_batch_is_one_request():
+    api = MockSocialMediaAPI()
+    api.set_lookup_error("twitter", "gone", "Not found")
+
+    with patch.object(api, 'get_follower_count', return_value=42) as single:
+        result = api.lookup_batch("twitter", ["a", "gone", "b"])
+    assert result.counts == {"a": 42, "b": 42}
+    assert result.errors == {"gone": "Not found"}
+    # The failing account is answered by the batch itself, not a failed single lookup
+    assert [call.args[1] for call in single.call_args_list] == ["a", "b"]
+
+    with patch.dict(settings.PLATFORM_BATCH_SIZES, {"twitter": 2}):
+        with pytest.raises(ValueError):
+            api.lookup_batch("twitter", ["a", "b", "c"])
+
+
+def test_async_get_follower_counts():
+    source = MockSocialMediaAPI()
+    source.set_lookup_error("twitter", "gone", "Not found")
+    api = AsyncMockSocialMediaAPI(source, min_latency_ms=1, max_latency_ms=2)
+
+    result = asyncio.run(api.get_follower_counts("twitter", ["a", "b", "gone"]))
+
+    assert set(result.counts) == {"a", "b"}
+    assert result.errors == {"gone": "Not found"}
+
+
+def test_fetch_account_counts_groups_by_platform():
+    api = MockSocialMediaAPI()
+    api.set_lookup_error("twitter", "broken", "Rate limited")
+    accounts = [
+        SimpleNamespace(id=1, platform="twitter", username="a"),
+        SimpleNamespace(id=2, platform="instagram", username="a"),
+        SimpleNamespace(id=3, platform="twitter", username="broken"),
+    ]
+
+    with patch.object(api, 'get_follower_counts', wraps=api.get_follower_counts) as batch:
+        counts, errors = fetch_account_counts(api, accounts)
+
+    assert sorted(call.args[0] for call in batch.call_args_list) == ["instagram", "twitter"]
+    assert set(counts) == {1, 2}
+    assert errors == {3: "Rate limited"}
@@ -1,5 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.core.cache import get_cache
 from app.models import User
 
 
@@ -22,3 +24,51 @@ def test_register_duplicate_user(client: TestClient, test_user):
     )
     assert response.status_code == 400
     assert response.json()["detail"] == "Username already registered"
+
+
+def test_login_returns_bearer_token(client: TestClient, test_user):
+    response = client.post(
+        "/api/v1/users/login",
+        data={"username": "testuser", "password": "testpassword"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["token_type"] == "bearer"
+
+    response = client.get(
+        "/api/v1/profiles/",
+        headers={"Authorization": f"Bearer {data['access_token']}"}
+    )
+    assert response.status_code == 200
+
+
+def test_bearer_auth_survives_cache_outage(client: TestClient, test_user):
+    token = client.post(
+        "/api/v1/users/login",
+        data={"username": "testuser", "password": "testpassword"}
+    ).json()["access_token"]
+
+    with patch.object(get_cache(), 'get', side_effect=ConnectionError("cache is down")), \
+            patch.object(get_cache(), 'set', side_effect=ConnectionError("cache is down")):
+        response = client.get("/api/v1/profiles/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+
+def test_login_wrong_password(client: TestClient, test_user):
+    response = client.post(
+        "/api/v1/users/login",
+        data={"username": "testuser", "password": "wrong"}
+    )
+    assert response.status_code == 401
+
+
+def test_invalid_bearer_token_rejected(client: TestClient, test_user):
+    response = client.get("/api/v1/profiles/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_basic_auth_fallback_can_be_disabled(client: TestClient, test_user, auth_headers, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "AUTH_BASIC_FALLBACK", False)
+    response = client.get("/api/v1/profiles/", headers=auth_headers)
+    assert response.status_code == 401